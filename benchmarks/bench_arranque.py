@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tiempo de arranque de la interfaz.
+
+Cada medición corre en un proceso nuevo (sin módulos ya importados):
+  - import: segundos que tarda `import ui.main_window` y qué módulos pesados
+    quedaron cargados (deberían ser ninguno).
+  - ventana: `python main.py --medir-arranque`, segundos hasta que la ventana
+    principal está visible (necesita un display; si no hay, se omite).
+  - importtime: los módulos más lentos según `python -X importtime`.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_arranque
+    python -m benchmarks.bench_arranque --repeticiones 10
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS_PESADOS = ("mne", "pandas", "scipy", "matplotlib", "pyedflib", "h5py",
+                   "core.estadisticas", "core.mp_workers")
+
+_SCRIPT_IMPORT = """
+import sys, time, json
+t0 = time.perf_counter()
+import ui.main_window
+t = time.perf_counter() - t0
+pesados = sorted(m for m in %r if m in sys.modules)
+print(json.dumps({"segundos": t, "pesados": pesados}))
+""" % (MODULOS_PESADOS,)
+
+
+def _correr(args):
+    return subprocess.run([sys.executable] + args, cwd=RAIZ, capture_output=True, text=True)
+
+
+def medir_import(repeticiones):
+    tiempos, pesados = [], []
+    for _ in range(repeticiones):
+        r = _correr(["-c", _SCRIPT_IMPORT])
+        if r.returncode != 0:
+            raise RuntimeError(r.stderr.strip().splitlines()[-1])
+        datos = json.loads(r.stdout)
+        tiempos.append(datos["segundos"])
+        pesados = datos["pesados"]
+    return tiempos, pesados
+
+
+def medir_ventana(repeticiones):
+    """Tiempos hasta ventana visible, o None si no hay display."""
+    tiempos = []
+    for _ in range(repeticiones):
+        r = _correr(["main.py", "--medir-arranque"])
+        if r.returncode != 0:
+            return None
+        linea = [l for l in r.stdout.splitlines() if l.startswith("arranque:")][-1]
+        tiempos.append(float(linea.split()[1]))
+    return tiempos
+
+
+def importtime(n=15):
+    """Los n módulos con mayor tiempo acumulado al importar ui.main_window."""
+    r = _correr(["-X", "importtime", "-c", "import ui.main_window"])
+    filas = []
+    for linea in r.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        # "import time:   propio |   acumulado |   módulo"
+        propio, acumulado, nombre = linea.split(":", 1)[1].split("|")
+        filas.append((int(acumulado), int(propio), nombre.strip()))
+    return sorted(filas, reverse=True)[:n]
+
+
+def _resumen(tiempos):
+    return f"mediana {statistics.median(tiempos):.3f} s, mínimo {min(tiempos):.3f} s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de EDF-Viewer.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    tiempos, pesados = medir_import(args.repeticiones)
+    print(f"import ui.main_window: {_resumen(tiempos)}")
+    print(f"  módulos pesados cargados: {', '.join(pesados) if pesados else 'ninguno'}")
+
+    ventana = medir_ventana(args.repeticiones)
+    if ventana is None:
+        print("ventana visible: omitido (sin display)")
+    else:
+        print(f"ventana visible: {_resumen(ventana)}")
+
+    print("importaciones más lentas (µs acumulados):")
+    for acumulado, propio, nombre in importtime():
+        print(f"  {acumulado:>9}  {nombre}")
+
+
+if __name__ == "__main__":
+    main()
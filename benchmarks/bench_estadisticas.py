@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de los caminos calientes de análisis y de lectura de archivos.
+
+Mide tiempo de pared (mínimo y mediana de varias repeticiones) y pico de
+memoria (tracemalloc) de ordinal_patterns, codificar_patrones,
+band_and_pompe, calculate_tau_d_heatmap y detect_r_peaks sobre señales
+sintéticas (caminata aleatoria, seno + ruido y ECG sintético), y de la
+apertura de archivos EDF/MAT sintéticos de varios tamaños. ordpy se usa como
+referencia externa: se comparan las distribuciones de patrones y la entropía
+normalizada y se mide su tiempo sobre las mismas ventanas.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_estadisticas                 # grilla rápida
+    python -m benchmarks.bench_estadisticas --completo      # grilla completa
+    python -m benchmarks.bench_estadisticas --comparar A.json B.json
+
+Cada corrida se guarda en benchmarks/resultados/<fecha>.json con los
+metadatos de la máquina y el commit, así dos corridas se pueden comparar.
+"""
+import os
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import platform
+import itertools
+import tempfile
+import subprocess
+import statistics
+import tracemalloc
+
+import numpy as np
+
+from core.estadisticas import (ordinal_patterns, codificar_patrones, band_and_pompe,
+                               calculate_tau_d_heatmap, detect_r_peaks)
+from core.cache_patrones import cache_patrones
+
+DIR_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+GRILLA_RAPIDA = {
+    "N": [10_000, 100_000],
+    "D": [3, 5],
+    "tau": [1],
+    "ventana": [100, 1000],
+    "paso": [1, 10],
+}
+GRILLA_COMPLETA = {
+    "N": [10_000, 100_000, 1_000_000],
+    "D": [3, 4, 5, 6],
+    "tau": [1, 2, 5],
+    "ventana": [100, 500, 2000],
+    "paso": [1, 10, 100],
+}
+# duraciones (s) de los EDF/MAT sintéticos, a 256 Hz y 8 canales
+DURACIONES_IO = [60, 600, 3600]
+
+
+# ---------------------------------------------------------------------------
+# Señales sintéticas
+# ---------------------------------------------------------------------------
+def caminata_aleatoria(n, rng):
+    return np.cumsum(rng.standard_normal(n))
+
+
+def seno_ruido(n, rng, fs=256.0, f=10.0):
+    t = np.arange(n) / fs
+    return np.sin(2 * np.pi * f * t) + 0.5 * rng.standard_normal(n)
+
+
+def ecg_sintetico(n, rng, fs=256.0, bpm=70.0):
+    """Tren de complejos QRS gaussianos con variabilidad de ritmo + ruido de línea base."""
+    t = np.arange(n) / fs
+    rr = 60.0 / bpm
+    latidos = np.cumsum(rr + 0.05 * rng.standard_normal(int(t[-1] / rr) + 2))
+    x = np.zeros(n)
+    ancho = 0.01 * fs
+    for tb in latidos[latidos < t[-1]]:
+        c = int(tb * fs)
+        ini, fin = max(c - 5 * int(ancho), 0), min(c + 5 * int(ancho), n)
+        k = np.arange(ini, fin)
+        x[ini:fin] += np.exp(-0.5 * ((k - c) / ancho) ** 2)
+    return x + 0.3 * np.sin(2 * np.pi * 0.2 * t) + 0.05 * rng.standard_normal(n)
+
+
+SENALES = {
+    "caminata": caminata_aleatoria,
+    "seno_ruido": seno_ruido,
+    "ecg": ecg_sintetico,
+}
+
+
+# ---------------------------------------------------------------------------
+# Medición
+# ---------------------------------------------------------------------------
+def medir(funcion, repeticiones=3, preparar=None):
+    """Devuelve (tiempos en s, pico de memoria en bytes, último resultado)."""
+    tiempos = []
+    pico = 0
+    resultado = None
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+        pico = max(pico, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return tiempos, pico, resultado
+
+
+def _registro(nombre, params, tiempos, pico, **extra):
+    r = {
+        "nombre": nombre,
+        "params": params,
+        "t_min": min(tiempos),
+        "t_mediana": statistics.median(tiempos),
+        "pico_memoria": pico,
+    }
+    r.update(extra)
+    return r
+
+
+# ---------------------------------------------------------------------------
+# Referencia ordpy
+# ---------------------------------------------------------------------------
+def _indice_lexicografico(patrones, D):
+    """Rango lexicográfico de cada permutación (mismo orden que freqs)."""
+    patrones = np.asarray(patrones)
+    idx = np.zeros(len(patrones), dtype=np.int64)
+    for i in range(D - 1):
+        menores = (patrones[:, i + 1:] < patrones[:, i:i + 1]).sum(axis=1)
+        idx += menores * math.factorial(D - 1 - i)
+    return idx
+
+
+def comparar_ordpy(x, D, tau, ventana, paso, max_ventanas=200):
+    """
+    Compara band_and_pompe con ordpy sobre las primeras `max_ventanas`
+    ventanas: diferencia máxima de distribuciones y de H_norm, y tiempos.
+    Devuelve None si ordpy no está instalado.
+    """
+    try:
+        import ordpy
+    except ImportError:
+        return None
+
+    n = min(len(x), (max_ventanas - 1) * paso + ventana)
+    x = x[:n]
+    cache_patrones.limpiar()
+    t0 = time.perf_counter()
+    freqs, Hnorm, _ = band_and_pompe(x, D, tau, ventana, paso, graf=False)
+    t_propio = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    H_ordpy = []
+    dif_freqs = 0.0
+    for k, ini in enumerate(range(0, n - ventana + 1, paso)):
+        seg = x[ini:ini + ventana]
+        patrones, probs = ordpy.ordinal_distribution(seg, dx=D, taux=tau, return_missing=True)
+        p = np.zeros(math.factorial(D))
+        p[_indice_lexicografico(patrones, D)] = probs
+        dif_freqs = max(dif_freqs, float(np.abs(p - freqs[k]).max()))
+        H_ordpy.append(ordpy.permutation_entropy(seg, dx=D, taux=tau, normalized=True))
+    t_ordpy = time.perf_counter() - t0
+
+    return {
+        "max_dif_freqs": dif_freqs,
+        "max_dif_H": float(np.abs(np.asarray(H_ordpy) - Hnorm).max()),
+        "t_propio": t_propio,
+        "t_ordpy": t_ordpy,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks de análisis
+# ---------------------------------------------------------------------------
+def bench_analisis(grilla, repeticiones, rng, log):
+    resultados = []
+    sin_cache = cache_patrones.limpiar
+
+    for nombre_senal, generador in SENALES.items():
+        for N in grilla["N"]:
+            x = generador(N, rng)
+
+            for D, tau in itertools.product(grilla["D"], grilla["tau"]):
+                params = {"senal": nombre_senal, "N": N, "D": D, "tau": tau}
+                t, pico, _ = medir(lambda: codificar_patrones(x, D, tau), repeticiones)
+                resultados.append(_registro("codificar_patrones", params, t, pico))
+
+                # la versión de tuplas es lenta por diseño: solo en señales cortas
+                if N <= 100_000:
+                    t, pico, _ = medir(lambda: ordinal_patterns(x, D, tau), repeticiones, sin_cache)
+                    resultados.append(_registro("ordinal_patterns", params, t, pico))
+
+                for ventana, paso in itertools.product(grilla["ventana"], grilla["paso"]):
+                    if ventana > N:
+                        continue
+                    p = dict(params, ventana=ventana, paso=paso)
+                    t, pico, _ = medir(
+                        lambda: band_and_pompe(x, D, tau, ventana, paso, graf=False),
+                        repeticiones, sin_cache)
+                    ref = comparar_ordpy(x, D, tau, ventana, paso) if N == grilla["N"][0] else None
+                    resultados.append(_registro("band_and_pompe", p, t, pico, ordpy=ref))
+                    log(f"band_and_pompe {p}: {min(t):.4f} s")
+
+            for ventana, paso in itertools.product(grilla["ventana"], grilla["paso"]):
+                if ventana > N:
+                    continue
+                p = {"senal": nombre_senal, "N": N, "D": 3, "tau_max": 10,
+                     "ventana": ventana, "paso": paso}
+                t, pico, _ = medir(
+                    lambda: calculate_tau_d_heatmap(x, 3, 10, ventana, paso),
+                    repeticiones, sin_cache)
+                resultados.append(_registro("calculate_tau_d_heatmap", p, t, pico))
+                log(f"calculate_tau_d_heatmap {p}: {min(t):.4f} s")
+
+            if nombre_senal == "ecg":
+                p = {"senal": nombre_senal, "N": N, "fs": 256.0}
+                t, pico, picos = medir(lambda: detect_r_peaks(x, 256.0), repeticiones)
+                resultados.append(_registro("detect_r_peaks", p, t, pico, n_picos=int(len(picos))))
+                log(f"detect_r_peaks {p}: {min(t):.4f} s")
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks de lectura
+# ---------------------------------------------------------------------------
+def _escribir_edf(path, datos, fs):
+    import pyedflib
+    n_canales = datos.shape[0]
+    with pyedflib.EdfWriter(path, n_canales, file_type=pyedflib.FILETYPE_EDFPLUS) as w:
+        w.setSignalHeaders([{
+            "label": f"CH{i}", "dimension": "uV", "sample_frequency": fs,
+            "physical_min": float(datos.min()), "physical_max": float(datos.max()),
+            "digital_min": -32768, "digital_max": 32767,
+        } for i in range(n_canales)])
+        w.writeSamples(list(datos))
+
+
+def bench_io(duraciones, repeticiones, rng, log, fs=256, n_canales=8):
+    from scipy.io import loadmat, savemat
+    resultados = []
+    tmp = tempfile.mkdtemp(prefix="bench_edf_viewer_")
+    try:
+        for dur in duraciones:
+            datos = np.vstack([caminata_aleatoria(dur * fs, rng) for _ in range(n_canales)])
+            params = {"segundos": dur, "fs": fs, "canales": n_canales}
+
+            ruta_mat = os.path.join(tmp, f"s{dur}.mat")
+            savemat(ruta_mat, {f"CH{i}": datos[i] for i in range(n_canales)})
+            t, pico, _ = medir(lambda: loadmat(ruta_mat), repeticiones)
+            resultados.append(_registro("abrir_mat", dict(params, bytes=os.path.getsize(ruta_mat)), t, pico))
+            log(f"abrir_mat {params}: {min(t):.4f} s")
+
+            try:
+                import mne
+                ruta_edf = os.path.join(tmp, f"s{dur}.edf")
+                _escribir_edf(ruta_edf, datos, fs)
+            except ImportError as e:
+                log(f"abrir_edf omitido ({e})")
+                continue
+
+            def abrir_edf():
+                raw = mne.io.read_raw_edf(ruta_edf, preload=False, verbose=False)
+                return raw.get_data()
+
+            def abrir_canal_edf():
+                raw = mne.io.read_raw_edf(ruta_edf, preload=False, verbose=False)
+                return raw.get_data(picks=[0])
+
+            p = dict(params, bytes=os.path.getsize(ruta_edf))
+            t, pico, _ = medir(abrir_edf, repeticiones)
+            resultados.append(_registro("abrir_edf", p, t, pico))
+            t, pico, _ = medir(abrir_canal_edf, repeticiones)
+            resultados.append(_registro("abrir_edf_un_canal", p, t, pico))
+            log(f"abrir_edf {params}: {min(t):.4f} s")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# Resultados
+# ---------------------------------------------------------------------------
+def metadatos():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(DIR_RESULTADOS)).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor(),
+        "nucleos": os.cpu_count(),
+    }
+
+
+def _clave(r):
+    return r["nombre"], json.dumps(r["params"], sort_keys=True)
+
+
+def comparar(ruta_a, ruta_b):
+    """Imprime la razón de tiempos B/A para cada benchmark presente en ambas corridas."""
+    with open(ruta_a) as f:
+        a = {_clave(r): r for r in json.load(f)["resultados"]}
+    with open(ruta_b) as f:
+        b = {_clave(r): r for r in json.load(f)["resultados"]}
+    print(f"{'benchmark':<28} {'parámetros':<70} {'A (s)':>9} {'B (s)':>9} {'B/A':>6}")
+    for clave in sorted(a.keys() & b.keys()):
+        ta, tb = a[clave]["t_min"], b[clave]["t_min"]
+        print(f"{clave[0]:<28} {clave[1]:<70} {ta:9.4f} {tb:9.4f} {tb / ta:6.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de EDF-Viewer.")
+    parser.add_argument("--completo", action="store_true", help="Usar la grilla completa.")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--sin-io", action="store_true", help="No medir la lectura de archivos.")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default=None, help="Ruta del JSON de resultados.")
+    parser.add_argument("--comparar", nargs=2, metavar=("A", "B"),
+                        help="Comparar dos corridas guardadas y salir.")
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    rng = np.random.default_rng(args.semilla)
+    grilla = GRILLA_COMPLETA if args.completo else GRILLA_RAPIDA
+    resultados = bench_analisis(grilla, args.repeticiones, rng, print)
+    if not args.sin_io:
+        duraciones = DURACIONES_IO if args.completo else DURACIONES_IO[:2]
+        resultados += bench_io(duraciones, args.repeticiones, rng, print)
+
+    salida = args.salida or os.path.join(DIR_RESULTADOS, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w") as f:
+        json.dump({"meta": metadatos(), "grilla": grilla, "resultados": resultados}, f, indent=1)
+    print(f"Resultados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
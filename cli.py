@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Procesamiento por lotes sin interfaz gráfica.
+
+Ejemplo:
+    python cli.py "estudio/**/*.edf" -o resultados --canales "EEG*" ECG \
+        --analisis bp tau ibi --dim 4 --tau 1 --ventana 500 --paso 50
+
+Si la corrida se interrumpe, volver a ejecutar el mismo comando retoma desde
+los archivos que faltaban.
+
+Figuras (se dibujan fuera de pantalla, en paralelo, en <salida>/figuras):
+    python cli.py "estudio/*.edf" -o resultados --canales ECG \
+        --figuras senal ibi entropia apilados --formato pdf --solo-figuras
+    python cli.py -o resultados --trabajos trabajos.csv --formato png --dpi 200
+donde trabajos.csv tiene columnas archivo,canal,figura.
+"""
+import os
+# Nunca abrir ventanas: matplotlib queda en el backend Agg y no se importa tkinter.
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import argparse
+from multiprocessing import freeze_support
+
+from core.lote import ejecutar_lote, ANALISIS
+from core.exportar_figuras import (exportar_figuras, trabajos_desde_entradas, leer_trabajos,
+                                   FIGURAS, FORMATOS)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Corre análisis de core.estadisticas sobre carpetas de archivos EDF/MAT."
+    )
+    parser.add_argument("entradas", nargs="*",
+                        help="Archivos, directorios o patrones glob (admite **).")
+    parser.add_argument("-o", "--salida", required=True,
+                        help="Directorio de salida (.npz por archivo + resumen.csv).")
+    parser.add_argument("--canales", nargs="*", default=[],
+                        help="Nombres, comodines o índices de canal (por defecto, todos).")
+    parser.add_argument("--analisis", nargs="+", choices=ANALISIS, default=["bp"],
+                        help="bp = Bandt & Pompe, tau = mapa tau(d), ibi = intervalos inter-latido, "
+                             "hrv = variabilidad (SDNN, RMSSD, pNN50, LF/HF) en ventanas de 5 min.")
+    parser.add_argument("--dim", type=int, default=3, help="Dimensión de embedding D.")
+    parser.add_argument("--tau", type=int, default=1, help="Retardo para bp.")
+    parser.add_argument("--tau-max", type=int, default=10, help="Retardo máximo para tau.")
+    parser.add_argument("--ventana", type=int, default=100, help="Tamaño de ventana.")
+    parser.add_argument("--paso", type=int, default=1, help="Paso entre ventanas.")
+    parser.add_argument("--fs", type=float, default=None,
+                        help="Frecuencia de muestreo para IBI en archivos .mat.")
+    parser.add_argument("-j", "--procesos", type=int, default=None,
+                        help="Procesos en paralelo (por defecto, todos los núcleos).")
+
+    figuras = parser.add_argument_group("figuras")
+    figuras.add_argument("--figuras", nargs="+", choices=FIGURAS, default=[],
+                         help="Figuras a exportar por archivo y canal.")
+    figuras.add_argument("--trabajos", default=None,
+                         help="CSV con columnas archivo,canal,figura (en vez de entradas y --figuras).")
+    figuras.add_argument("--formato", choices=FORMATOS, default="png")
+    figuras.add_argument("--dpi", type=int, default=150)
+    figuras.add_argument("--solo-figuras", action="store_true",
+                         help="No escribir los .npz ni resumen.csv, solo las figuras.")
+
+    args = parser.parse_args(argv)
+    if not args.entradas and not args.trabajos:
+        parser.error("Indique entradas o --trabajos.")
+    if args.solo_figuras and not (args.figuras or args.trabajos):
+        parser.error("--solo-figuras requiere --figuras o --trabajos.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = vars(args)
+    if args.entradas and not args.solo_figuras:
+        ejecutar_lote(config)
+
+    if args.figuras or args.trabajos:
+        trabajos = leer_trabajos(args.trabajos) if args.trabajos else \
+            trabajos_desde_entradas(args.entradas, args.canales, args.figuras)
+        exportar_figuras(trabajos, dict(config, salida=os.path.join(args.salida, "figuras")))
+
+
+if __name__ == "__main__":
+    freeze_support()
+    main()
@@ -0,0 +1,151 @@
+"""
+Caché persistente en disco para resultados de estadísticas.
+
+Cada resultado se guarda como un .npz comprimido cuyo nombre es el hash de
+(huella del archivo, canal, función, parámetros). La huella depende del
+contenido y de la fecha de modificación del archivo, no de su ruta: renombrar
+o mover un EDF no invalida sus resultados (copiarlo sin conservar la fecha,
+sí). Una entrada dañada (p.ej. truncada) se borra y cuenta como ausente.
+Cuando el directorio supera el tamaño máximo se borran primero los resultados
+usados hace más tiempo (LRU por mtime, que se actualiza en cada acierto); los
+temporales abandonados por un proceso que murió a mitad de escritura también.
+"""
+import os
+import time
+import zlib
+import json
+import zipfile
+import hashlib
+import numpy as np
+
+DIR_CACHE = os.environ.get(
+    "EDF_VIEWER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".edf_viewer", "cache")
+)
+TAMANO_MAXIMO = int(float(os.environ.get("EDF_VIEWER_CACHE_MB", 2048)) * 1024 * 1024)
+
+# Bytes del comienzo y del final del archivo que entran en la huella.
+_BYTES_HUELLA = 1024 * 1024
+
+# Un .tmp más viejo que esto (s) es de un proceso que ya no va a terminarlo.
+_EDAD_TEMPORAL = 3600
+
+
+def huella_archivo(path):
+    """
+    Huella de un archivo: blake2b del tamaño, la fecha de modificación (en
+    ns) y el primer y el último MiB. No hace falta leer el archivo completo
+    (que puede pesar varios GB): una edición de muestras en el medio que no
+    cambia el tamaño se detecta por la fecha de modificación.
+    """
+    estado = os.stat(path)
+    tamano = estado.st_size
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{tamano}:{estado.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(_BYTES_HUELLA))
+        if tamano > _BYTES_HUELLA:
+            f.seek(max(_BYTES_HUELLA, tamano - _BYTES_HUELLA))
+            h.update(f.read(_BYTES_HUELLA))
+    return h.hexdigest()
+
+
+def clave_resultado(huella, canal, funcion, **parametros):
+    """Clave de caché para (huella, canal, función, parámetros)."""
+    texto = json.dumps([huella, str(canal), funcion, sorted(parametros.items())])
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+class CacheDisco:
+
+    def __init__(self, directorio=DIR_CACHE, tamano_maximo=TAMANO_MAXIMO):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.npz")
+
+    def obtener(self, clave):
+        """
+        Devuelve el dict de arrays guardado para `clave`, o None si no está.
+        Una entrada ilegible se borra, así el resultado se vuelve a calcular.
+        """
+        ruta = self._ruta(clave)
+        try:
+            with np.load(ruta, allow_pickle=False) as z:
+                arrays = {k: z[k] for k in z.files}
+            os.utime(ruta)   # marca de uso para el LRU
+            return arrays
+        except (zipfile.BadZipFile, EOFError, zlib.error):
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+            return None
+        except (OSError, ValueError):
+            return None
+
+    def guardar(self, clave, **arrays):
+        """
+        Guarda los arrays bajo `clave`. Escribe en un temporal y lo renombra,
+        así un proceso que lee en paralelo nunca ve un .npz a medio escribir.
+        Un error de disco no debe tirar abajo el cálculo: se ignora, pero sin
+        dejar el temporal a medias ocupando lugar.
+        """
+        tmp = os.path.join(self.directorio, f"{clave}.{os.getpid()}.tmp")
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp, self._ruta(clave))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self.recortar()
+
+    def recortar(self):
+        """
+        Borra los resultados menos usados hasta quedar bajo tamano_maximo, y
+        los temporales viejos que dejó un proceso interrumpido.
+        """
+        entradas = []
+        total = 0
+        limite_tmp = time.time() - _EDAD_TEMPORAL
+        try:
+            with os.scandir(self.directorio) as it:
+                for e in it:
+                    if e.name.endswith(".tmp"):
+                        try:
+                            if e.stat().st_mtime < limite_tmp:
+                                os.remove(e.path)
+                        except OSError:
+                            pass
+                    elif e.name.endswith(".npz"):
+                        st = e.stat()
+                        entradas.append((st.st_mtime, st.st_size, e.path))
+                        total += st.st_size
+        except OSError:
+            return
+
+        entradas.sort()
+        for _, tamano, ruta in entradas:
+            if total <= self.tamano_maximo:
+                break
+            try:
+                os.remove(ruta)
+                total -= tamano
+            except OSError:
+                pass
+
+    def limpiar(self):
+        """Vacía la caché por completo."""
+        tamano_maximo = self.tamano_maximo
+        self.tamano_maximo = 0
+        self.recortar()
+        self.tamano_maximo = tamano_maximo
+
+
+cache_disco = CacheDisco()
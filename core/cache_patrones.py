@@ -0,0 +1,149 @@
+"""
+Memoización en memoria de las secuencias de patrones ordinales codificados.
+
+Bandt & Pompe, patrones apilados y el mapa tau(d) codifican los mismos
+patrones para el mismo canal y el mismo (D, tau). Esta caché LRU, única por
+proceso y acotada en bytes, guarda el array de códigos de cada
+(identidad de señal, D, tau) para que un segundo análisis sobre un canal ya
+analizado se salte la etapa de codificación.
+
+La identidad de una señal es un hash de su contenido, así que la misma señal
+tiene la misma clave en el proceso de la GUI y en los workers: los workers
+devuelven sus entradas nuevas y la GUI se las vuelve a pasar al próximo
+worker sobre ese canal.
+
+Además de su propio límite, la caché está registrada en el gestor de memoria
+(core.memoria), que puede desalojar sus entradas para hacer lugar a otros
+datos re-derivables.
+"""
+import os
+import hashlib
+import weakref
+from collections import OrderedDict
+import numpy as np
+from core.memoria import gestor_memoria, tic
+
+MAX_BYTES = int(float(os.environ.get("EDF_VIEWER_CACHE_PATRONES_MB", 512)) * 1024 * 1024)
+
+
+# ---------------------------------------------------------------------------
+# Identidad de señal
+# ---------------------------------------------------------------------------
+# Hashear una señal de cientos de MB cuesta, y tau(d) llama a band_and_pompe
+# una vez por tau con el mismo array: se memoiza el hash por objeto base.
+_identidades = {}
+
+
+def _raiz(arr):
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+def identidad_senal(series):
+    """Hash del contenido (dtype, forma y bytes) de la señal."""
+    arr = np.asarray(series)
+    raiz = _raiz(arr)
+    memo = (id(raiz), arr.__array_interface__["data"][0], arr.shape, arr.strides, arr.dtype.str)
+
+    guardado = _identidades.get(memo)
+    if guardado is not None and guardado[0]() is raiz:
+        return guardado[1]
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{arr.dtype.str}{arr.shape}".encode())
+    h.update(memoryview(np.ascontiguousarray(arr)).cast("B"))
+    ident = h.hexdigest()
+
+    try:
+        ref = weakref.ref(raiz, lambda _, m=memo: _identidades.pop(m, None))
+        _identidades[memo] = (ref, ident)
+    except TypeError:
+        pass
+    return ident
+
+
+# ---------------------------------------------------------------------------
+# Caché LRU
+# ---------------------------------------------------------------------------
+class CachePatrones:
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()   # (identidad, D, tau) -> códigos
+        self._usos = {}                  # (identidad, D, tau) -> tic() del último uso
+        self._bytes = 0
+
+    def obtener(self, ident, D, tau):
+        clave = (ident, D, tau)
+        codigos = self._entradas.get(clave)
+        if codigos is not None:
+            self._entradas.move_to_end(clave)
+            self._usos[clave] = tic()
+        return codigos
+
+    def guardar(self, ident, D, tau, codigos):
+        clave = (ident, D, tau)
+        if clave in self._entradas:
+            self.descartar(clave)
+        if codigos.nbytes > self.max_bytes:
+            return
+        codigos.setflags(write=False)
+        self._entradas[clave] = codigos
+        self._usos[clave] = tic()
+        self._bytes += codigos.nbytes
+        self._recortar()
+        gestor_memoria.equilibrar(proteger=(self, clave))
+
+    def descartar(self, clave):
+        """Saca una entrada y devuelve los bytes liberados."""
+        codigos = self._entradas.pop(clave, None)
+        self._usos.pop(clave, None)
+        if codigos is None:
+            return 0
+        self._bytes -= codigos.nbytes
+        return codigos.nbytes
+
+    def descartar_senal(self, ident):
+        """Saca todas las entradas de una señal; devuelve los bytes liberados."""
+        return sum(self.descartar(c) for c in list(self._entradas) if c[0] == ident)
+
+    def _recortar(self):
+        while self._bytes > self.max_bytes and self._entradas:
+            self.descartar(next(iter(self._entradas)))
+
+    def limpiar(self):
+        self._entradas.clear()
+        self._usos.clear()
+        self._bytes = 0
+
+    def bytes_usados(self):
+        return self._bytes
+
+    def bytes_senal(self, ident):
+        return sum(v.nbytes for c, v in self._entradas.items() if c[0] == ident)
+
+    # --- protocolo del gestor de memoria ---
+    def desalojables(self):
+        return [(self._usos[c], c, v.nbytes) for c, v in self._entradas.items()]
+
+    def desalojar(self, clave):
+        return self.descartar(clave)
+
+    def entradas(self):
+        """Lista de (clave, bytes) de la menos a la más recientemente usada."""
+        return [(c, v.nbytes) for c, v in self._entradas.items()]
+
+    # --- intercambio entre procesos ---
+    def exportar(self, ident, excluir=()):
+        """Entradas de una señal como lista [(D, tau, códigos)], para pasar por una Queue."""
+        return [(D, tau, v) for (i, D, tau), v in self._entradas.items()
+                if i == ident and (D, tau) not in excluir]
+
+    def importar(self, ident, entradas):
+        for D, tau, codigos in entradas or ():
+            self.guardar(ident, D, tau, codigos)
+
+
+cache_patrones = CachePatrones()
+gestor_memoria.registrar(cache_patrones)
@@ -1,36 +1,62 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
 from itertools import permutations
 import math
 import os
-from scipy.io import loadmat
-from scipy.ndimage import gaussian_filter1d
-from scipy.signal import find_peaks, medfilt, butter, filtfilt
+import warnings
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+from core.cache_patrones import cache_patrones, identidad_senal
+from core.perfilado import tramo
+from core.memoria import gestor_memoria
 
-def patrones_apilados(freqs,D):
-    
-    ' calculos necesarios para graficar los patrones apilados.'
-    n_windows, n_patterns = freqs.shape
+# matplotlib y scipy.signal se importan dentro de las funciones que los usan:
+# así importar este módulo (la GUI, cada worker, el CLI) no carga pyplot.
 
-    cum = np.zeros((n_windows, n_patterns + 1))
-    cum[:, 0] = 1.0
-    for k in range(n_patterns):
-        cum[:, k+1] = cum[:, k] - freqs[:, k]
+def patrones_apilados(freqs, D, umbral=0.0):
+    """
+    Datos para graficar la distribución de patrones apilada (sin matplotlib).
 
-    # eje principal = índice
-    indices = np.arange(n_windows)
-    mid = (cum[:, :-1] + cum[:, 1:]) / 2.0
-    all_perms = list(permutations(range(D)))
-    pattern_labels = [f"{idx} → {perm}" for idx, perm in enumerate(all_perms)]
-    colors = plt.cm.inferno(np.linspace(0, 1, n_patterns))
-    handles = [
-        Line2D([], [], color=colors[k], lw=6, label=pattern_labels[k])
-        for k in range(n_patterns)
-    ]
+    Los patrones cuya frecuencia nunca llega a `umbral` en ninguna ventana se
+    juntan en una única banda "otros", apilada al final (abajo).
+    Devuelve (cum, patrones, etiquetas):
+      cum       (n_ventanas, n_bandas + 1), bordes de las bandas: cum[:, 0] = 1
+                y la banda b ocupa [cum[:, b+1], cum[:, b]].
+      patrones  índice de patrón de cada banda (-1 para "otros").
+      etiquetas texto de cada banda, "índice → orden".
+    """
+    freqs = np.asarray(freqs, dtype=float)
 
-    return n_windows, n_patterns, cum, indices, mid, colors, handles
+    visibles = np.flatnonzero(freqs.max(axis=0, initial=0.0) >= umbral) if umbral > 0 \
+        else np.arange(freqs.shape[1])
+    bandas = freqs[:, visibles]
+    patrones = visibles
+    # solo las etiquetas de las bandas visibles: con D=7 son 5040 permutaciones
+    etiquetas = [f"{idx} → {patron_de_indice(int(idx), D)}" for idx in visibles]
 
+    n_otros = freqs.shape[1] - len(visibles)
+    if n_otros:
+        otros = freqs.sum(axis=1) - bandas.sum(axis=1)
+        bandas = np.column_stack([bandas, otros])
+        patrones = np.append(patrones, -1)
+        etiquetas.append(f"otros ({n_otros} patrones < {umbral:g})")
+
+    cum = np.empty((freqs.shape[0], bandas.shape[1] + 1))
+    cum[:, 0] = 1.0
+    cum[:, 1:] = 1.0 - np.cumsum(bandas, axis=1)
+    return cum, patrones, etiquetas
+
+
+def patron_de_indice(indice, D):
+    """
+    Permutación de índice `indice` en el orden de itertools.permutations
+    (lexicográfico), sin generar las D! anteriores.
+    """
+    restantes = list(range(D))
+    patron = []
+    for k in range(D - 1, -1, -1):
+        pos, indice = divmod(indice, math.factorial(k))
+        patron.append(restantes.pop(pos))
+    return tuple(patron)
 
 
 def ordinal_patterns(series, D, tau):
@@ -39,17 +65,338 @@ def ordinal_patterns(series, D, tau):
     Las tuplas son la permutación de posiciones: por ejemplo (2,1,0).
     Usamos np.argsort(..., kind='mergesort') para mantener estabilidad (rompe empates por orden).
     """
-    N = len(series)
-    m = D
-    max_shift = (m - 1) * tau
-    patterns = []
-    for i in range(0, N - max_shift):
-        # construir vector embebido
-        vec = series[i : i + (m - 1)*tau + 1 : tau]
-        # índice de orden ascendente (0..D-1) con mergesort estable para tratamiento de empates
-        order = tuple(np.argsort(vec, kind='mergesort'))
-        patterns.append(order)
-    return patterns
+    all_perms = list(permutations(range(D)))
+    return [all_perms[c] for c in obtener_codigos(series, D, tau)]
+
+
+# Filas del embedding que se ordenan de una vez al codificar (acota la memoria
+# del argsort en señales muy largas).
+_BLOQUE_CODIFICACION = 1 << 20
+
+
+def codificar_patrones(series, D, tau):
+    """
+    Codifica todos los patrones ordinales de la serie como enteros.
+
+    El código de cada embedding es el índice de su permutación (la de
+    ordinal_patterns) en list(permutations(range(D))), es decir, su rango
+    lexicográfico, que se obtiene con el código de Lehmer de la permutación.
+    Así los códigos indexan directamente las columnas de `freqs`.
+    """
+    x = np.asarray(series, dtype=float)
+    max_shift = (D - 1) * tau
+    n = len(x) - max_shift
+    n_patterns = math.factorial(D)
+    codigos = np.zeros(max(n, 0), dtype=np.min_scalar_type(n_patterns - 1))
+    if n <= 0:
+        return codigos
+
+    # vista (n, D) sin copiar: fila i = x[i], x[i+tau], ..., x[i+(D-1)tau]
+    emb = sliding_window_view(x, max_shift + 1)[:, ::tau]
+    pesos = np.array([math.factorial(D - 1 - i) for i in range(D)])
+
+    for ini in range(0, n, _BLOQUE_CODIFICACION):
+        bloque = emb[ini:ini + _BLOQUE_CODIFICACION]
+        orden = np.argsort(bloque, axis=1, kind='mergesort')
+        lehmer = np.zeros(len(bloque), dtype=np.int64)
+        for i in range(D - 1):
+            menores = (orden[:, i + 1:] < orden[:, i:i + 1]).sum(axis=1)
+            lehmer += menores * pesos[i]
+        codigos[ini:ini + len(bloque)] = lehmer
+    return codigos
+
+
+# Estimadores de la entropía de permutaciones: cada patrón cuenta 1
+# (clasica), la varianza de su embedding (ponderada, WPE) o una mezcla de
+# amplitud media y variación absoluta (amplitud, AAPE).
+ESTIMADORES = ("clasica", "ponderada", "amplitud")
+
+
+def pesos_patrones(series, D, tau, estimador, A=0.5):
+    """
+    Peso de cada embedding (uno por código de codificar_patrones), calculado
+    de una vez sobre las D columnas del embedding (vistas de la serie, sin
+    copiar):
+      ponderada: varianza de (x_i, x_{i+tau}, ..., x_{i+(D-1)tau})   [Fadlallah 2013]
+      amplitud:  A/D * sum|x_k| + (1-A)/(D-1) * sum|x_k - x_{k-1}|   [Azami 2016]
+    Devuelve None para el estimador clásico.
+    """
+    if estimador == "clasica":
+        return None
+    if estimador not in ESTIMADORES:
+        raise ValueError(f"Estimador desconocido: {estimador}")
+    x = np.asarray(series, dtype=float)
+    max_shift = (D - 1) * tau
+    n = len(x) - max_shift
+    pesos = np.zeros(max(n, 0))
+    if n <= 0:
+        return pesos
+
+    # columnas del embedding como vistas de x: columnas[k][i] = x[i + k*tau]
+    columnas = [x[k * tau:k * tau + n] for k in range(D)]
+    if estimador == "ponderada":
+        suma = np.zeros(n)
+        for col in columnas:
+            suma += col
+        media = suma / D
+        for col in columnas:
+            dif = col - media
+            dif *= dif
+            pesos += dif
+        pesos /= D
+    else:
+        for col in columnas:
+            pesos += np.abs(col)
+        pesos *= A / D
+        variacion = np.zeros(n)
+        for anterior, col in zip(columnas, columnas[1:]):
+            variacion += np.abs(col - anterior)
+        pesos += (1 - A) / (D - 1) * variacion
+    return pesos
+
+
+def obtener_codigos(series, D, tau):
+    """codificar_patrones pasando por la caché de patrones del proceso."""
+    ident = identidad_senal(series)
+    codigos = cache_patrones.obtener(ident, D, tau)
+    if codigos is None:
+        with tramo("codificar_patrones", D=D, tau=tau, n=len(series)):
+            codigos = codificar_patrones(series, D, tau)
+        cache_patrones.guardar(ident, D, tau, codigos)
+    return codigos
+
+
+def conteos_por_ventana(codigos, n_categorias, largo, step, n_ventanas, pesos=None, inicios=None):
+    """
+    Histograma de `codigos` en cada ventana deslizante [k*step, k*step+largo).
+
+    Equivale a mantener un histograma incremental (al deslizar la ventana se
+    suma lo que entra y se resta lo que sale), pero vectorizado: cada posición
+    i aporta +1 en la primera ventana que la contiene y -1 después de la
+    última, y una suma acumulada sobre el eje de ventanas reconstruye los
+    conteos. Costo O(len(codigos) + n_ventanas * n_categorias).
+
+    Con `pesos` (uno por código) cada posición aporta su peso en vez de 1 y
+    el histograma es de floats, armado sin restas (ver _conteos_ponderados).
+    Con `inicios` (crecientes, uno por ventana) las ventanas son
+    [inicios[k], inicios[k]+largo) y step no se usa; las posiciones que caen
+    fuera de `codigos` no se cuentan.
+    """
+    conteos = np.zeros((n_ventanas, n_categorias), dtype=np.int64 if pesos is None else float)
+    if largo <= 0 or n_ventanas == 0:
+        return conteos
+    if pesos is not None:
+        if inicios is None:
+            inicios = np.arange(n_ventanas, dtype=np.int64) * step
+        return _conteos_ponderados(codigos, pesos, n_categorias, largo, np.asarray(inicios, dtype=np.int64))
+
+    if inicios is None:
+        i = np.arange(min(len(codigos), (n_ventanas - 1) * step + largo))
+        k_ini = np.maximum((i - largo) // step + 1, 0)
+        k_fin = np.minimum(i // step, n_ventanas - 1)
+    else:
+        i = np.arange(min(len(codigos), inicios[-1] + largo))
+        k_ini = np.searchsorted(inicios, i - largo, side='right')
+        k_fin = np.searchsorted(inicios, i, side='right') - 1
+    validos = k_ini <= k_fin
+    c = codigos[:len(i)][validos].astype(np.int64)
+
+    tamano = (n_ventanas + 1) * n_categorias
+    delta = np.bincount(k_ini[validos] * n_categorias + c, minlength=tamano)
+    delta -= np.bincount((k_fin[validos] + 1) * n_categorias + c, minlength=tamano)
+    np.cumsum(delta.reshape(n_ventanas + 1, n_categorias)[:-1], axis=0, out=conteos)
+    return conteos
+
+
+def _conteos_ponderados(codigos, pesos, n_categorias, largo, inicios):
+    """
+    Histograma ponderado de cada ventana [inicios[k], inicios[k]+largo) sin
+    restar nunca un peso: con +w/-w y una suma acumulada quedan restos de
+    redondeo que arrastran las ventanas de poco peso (una señal plana no daba
+    peso total 0, una de amplitud 1e-3 tras otra de 1e4 se corría).
+
+    La serie se parte en tramos de `largo` posiciones. Una ventana que empieza
+    en el tramo s cubre el final de s (desde su inicio) y el principio de
+    s+1: la primera parte es una suma acumulada hacia atrás y la segunda una
+    hacia adelante, ambas sobre las ventanas del tramo s. Como solo se suman
+    pesos no negativos, cada celda es la suma de lo que contiene su ventana
+    (0 exacto si no pesa nada) con error relativo de redondeo propio.
+    """
+    n_ventanas = len(inicios)
+    n = min(len(codigos), int(inicios[-1]) + largo)
+    c = codigos[:n].astype(np.int64)
+    w = pesos[:n]
+
+    # ventanas agrupadas por el tramo donde empiezan (son contiguas: inicios crece)
+    tramo_v = inicios // largo
+    nuevo = np.concatenate(([True], tramo_v[1:] != tramo_v[:-1]))
+    grupo = np.cumsum(nuevo) - 1
+    en_grupo = np.arange(n_ventanas) - np.flatnonzero(nuevo)[grupo]
+    n_grupos, m = grupo[-1] + 1, int(en_grupo.max()) + 1
+    fila = grupo * m + en_grupo
+    tamano = n_grupos * m * n_categorias
+
+    i = np.arange(n)
+    tramo_i = i // largo
+    # final del tramo: la última ventana del mismo tramo que empieza en o antes de i
+    kA = np.searchsorted(inicios, i, side="right") - 1
+    okA = kA >= 0
+    okA[okA] = tramo_v[kA[okA]] == tramo_i[okA]
+    A = np.bincount(fila[kA[okA]] * n_categorias + c[okA], weights=w[okA], minlength=tamano)
+    A = A.reshape(n_grupos, m, n_categorias)[:, ::-1]
+    np.cumsum(A, axis=1, out=A)
+    conteos = A[:, ::-1][grupo, en_grupo]
+    del A
+
+    # principio del tramo siguiente: la primera ventana del tramo anterior que todavía llega a i
+    kB = np.searchsorted(inicios, i - largo, side="right")
+    okB = kB < n_ventanas
+    okB[okB] = tramo_v[kB[okB]] == tramo_i[okB] - 1
+    B = np.bincount(fila[kB[okB]] * n_categorias + c[okB], weights=w[okB], minlength=tamano)
+    B = B.reshape(n_grupos, m, n_categorias)
+    np.cumsum(B, axis=1, out=B)
+    conteos += B[grupo, en_grupo]
+    return conteos
+
+
+def faltantes_por_ventana(codigos, n_categorias, largo, step, n_ventanas):
+    """
+    Cantidad de categorías que no aparecen en cada ventana [k*step, k*step+largo).
+
+    Es lo que daría el histograma incremental llevando la cuenta de celdas en
+    cero (al deslizar, solo cambia cuando una celda pasa de 0 a 1 o de 1 a 0),
+    pero sin armar el histograma denso (n_ventanas, n_categorias): la
+    posición i es la primera aparición de su código en la ventana que empieza
+    en a si a <= i < a + largo y la aparición anterior del mismo código es
+    < a. Eso da un rango contiguo de ventanas por posición, y con +1/-1 y una
+    suma acumulada sale la cantidad de códigos distintos de cada ventana.
+    Costo O(n log n + n_ventanas), independiente de n_categorias.
+    """
+    faltantes = np.full(n_ventanas, n_categorias, dtype=np.int64)
+    if largo <= 0 or n_ventanas == 0:
+        return faltantes
+
+    n = min(len(codigos), (n_ventanas - 1) * step + largo)
+    c = codigos[:n]
+    # aparición anterior de cada código (-1 si es la primera)
+    orden = np.argsort(c, kind='stable')
+    anterior = np.full(n, -1, dtype=np.int64)
+    mismo = c[orden[1:]] == c[orden[:-1]]
+    anterior[orden[1:][mismo]] = orden[:-1][mismo]
+
+    i = np.arange(n)
+    k_ini = np.maximum(np.maximum(anterior, i - largo) // step + 1, 0)
+    k_fin = np.minimum(i // step, n_ventanas - 1)
+    validos = k_ini <= k_fin
+    delta = np.bincount(k_ini[validos], minlength=n_ventanas + 1)
+    delta -= np.bincount(k_fin[validos] + 1, minlength=n_ventanas + 1)
+    faltantes -= np.cumsum(delta[:-1])
+    return faltantes
+
+
+def ausentes_globales(codigos, n_categorias, largo, step, n_ventanas):
+    """Categorías que no aparecen en ninguna de las ventanas (ver faltantes_por_ventana)."""
+    if largo <= 0 or n_ventanas == 0:
+        return np.arange(n_categorias)
+    usados = codigos[:min(len(codigos), (n_ventanas - 1) * step + largo)]
+    if step > largo:
+        # quedan huecos entre ventanas que no cuentan
+        usados = usados[np.arange(len(usados)) % step < largo]
+    return np.flatnonzero(np.bincount(usados, minlength=n_categorias) == 0)
+
+
+def patrones_faltantes(time_serie, embeding, delay, window, step):
+    """
+    Patrones prohibidos/faltantes con las mismas ventanas que band_and_pompe.
+    Devuelve (n_faltantes, ausentes, start_indices): cuántos de los D!
+    patrones no aparecen en cada ventana y los índices de los patrones que no
+    aparecen en ninguna. No arma freqs, así que sirve también para D grande.
+    """
+    validar_parametros(time_serie, embeding, window, step)
+    n_patterns = math.factorial(embeding)
+    start_indices = np.arange(0, len(time_serie) - window + 1, step)
+    if len(start_indices) == 0:
+        raise ValueError("Con win_size y la longitud de IBI no se forma ninguna ventana. Reduce win_size o cambia step.")
+
+    largo = window - (embeding - 1) * delay
+    if largo <= 0:
+        return np.full(len(start_indices), n_patterns, dtype=np.int64), np.arange(n_patterns), start_indices
+
+    codigos = obtener_codigos(time_serie, embeding, delay)
+    with tramo("patrones_faltantes", D=embeding, ventanas=len(start_indices)):
+        n_faltantes = faltantes_por_ventana(codigos, n_patterns, largo, step, len(start_indices))
+        ausentes = ausentes_globales(codigos, n_patterns, largo, step, len(start_indices))
+    return n_faltantes, ausentes, start_indices
+
+
+@lru_cache(maxsize=None)
+def constante_js(n_patrones):
+    """
+    Q0: inversa de la divergencia de Jensen-Shannon máxima (entre una delta y
+    la distribución uniforme) para n_patrones = D! estados.
+    """
+    N = n_patrones
+    return -2.0 / ((N + 1.0) / N * np.log(N + 1.0) - 2.0 * np.log(2.0 * N) + np.log(N))
+
+
+def complejidad_js(freqs, H_norm=None):
+    """
+    Complejidad estadística de Jensen-Shannon (Rosso et al.) de cada ventana:
+        C = Q0 * JS(P, U) * H_norm,
+        JS(P, U) = S((P + U)/2) - S(P)/2 - S(U)/2
+    con S la entropía de Shannon. freqs es (n_ventanas, D!); si ya se tiene
+    H_norm se reutiliza y solo falta S((P + U)/2), vectorizada sobre todas
+    las ventanas.
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    N = freqs.shape[1]
+    log_N = np.log(N)
+    if H_norm is None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plogp = np.where(freqs > 0, freqs * np.log(freqs), 0.0)
+        H_norm = -plogp.sum(axis=1) / log_N
+
+    # (P + U)/2 nunca tiene ceros: el logaritmo va directo. Operaciones en
+    # el lugar y einsum para no crear más temporales del tamaño de freqs.
+    m = np.multiply(freqs, 0.5)
+    m += 0.5 / N
+    S_m = -np.einsum('ij,ij->i', m, np.log(m, out=np.empty_like(m)))
+    js = S_m - 0.5 * H_norm * log_N - 0.5 * log_N
+    C = constante_js(N) * js * H_norm
+    # ventanas sin patrones (freqs todo cero) no tienen complejidad definida
+    return np.where(freqs.any(axis=1), C, 0.0)
+
+
+def curvas_complejidad(n_patrones, puntos=100):
+    """
+    Cotas teóricas del plano complejidad-entropía para N = n_patrones:
+    devuelve ((H_min, C_min), (H_max, C_max)), cada una ordenada por H.
+    Mínima: una probabilidad p y el resto repartido igual. Máxima: n estados
+    en cero, uno con p y el resto igual (se muestrean hasta ~200 valores de n).
+    """
+    N = n_patrones
+    log_N = np.log(N)
+
+    def _plano(p, q, n_q, n_cero):
+        # distribución con un estado en p, n_q estados en q y n_cero en 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            S = -(np.where(p > 0, p * np.log(p), 0.0) + n_q * np.where(q > 0, q * np.log(q), 0.0))
+        m1, m2, m0 = 0.5 * p + 0.5 / N, 0.5 * q + 0.5 / N, 0.5 / N
+        S_m = -(m1 * np.log(m1) + n_q * m2 * np.log(m2) + n_cero * m0 * np.log(m0))
+        H = S / log_N
+        return H, constante_js(N) * (S_m - 0.5 * S - 0.5 * log_N) * H
+
+    p = np.linspace(1.0 / N, 1.0, puntos)
+    H_min, C_min = _plano(p, (1 - p) / (N - 1), N - 1, 0)
+
+    n = np.unique(np.linspace(0, N - 2, min(N - 1, 200)).astype(int))[:, None]
+    p = np.linspace(0.0, 1.0, puntos)[None, :] / (N - n)
+    n_q = N - n - 1
+    H_max, C_max = _plano(p, (1 - p) / n_q, n_q, n)
+    H_max, C_max = H_max.ravel(), C_max.ravel()
+
+    orden_min, orden_max = np.argsort(H_min), np.argsort(H_max)
+    return (H_min[orden_min], C_min[orden_min]), (H_max[orden_max], C_max[orden_max])
 
 
 def validar_parametros(time_serie, embeding, window, step):
@@ -68,64 +415,81 @@ def validar_parametros(time_serie, embeding, window, step):
 def band_and_pompe(time_serie, embeding, delay, window, step,
                    graf, beat_times=None, plot=False, paso_ejeT=10,
                    paso_color=10, color1='red', color2='blue',
-                   ruta_guardar='/', output_graf='/'):
+                   ruta_guardar='/', output_graf='/', complejidad=False,
+                   estimador="clasica", faltantes=False):
+    """
+    Entropía de permutaciones normalizada por ventana. Devuelve
+    (freqs, H_norm, win_times) y, con complejidad=True, además la
+    complejidad de Jensen-Shannon de cada ventana (ver complejidad_js).
+    Con faltantes=True agrega al final (n_faltantes, ausentes): patrones que
+    no aparecen en cada ventana y los que no aparecen en ninguna (ver
+    patrones_faltantes).
+    estimador elige cómo pesa cada patrón (ver ESTIMADORES); con pesos,
+    freqs es la fracción del peso total de la ventana.
+    """
 
     # Validaciones
     validar_parametros(time_serie, embeding, window, step)
 
-    # Crear patrones ordinales posibles
-    all_perms = list(permutations(range(embeding)))
-    perm_to_index = {perm: idx for idx, perm in enumerate(all_perms)}
     n_patterns = math.factorial(embeding)
 
-    freqs_list = []
-    H_norm = []
-    win_times = []
-
     # Índices de inicio de cada ventana
-    start_indices = list(range(0, len(time_serie) - window + 1, step))
+    start_indices = np.arange(0, len(time_serie) - window + 1, step)
     if len(start_indices) == 0:
         raise ValueError("Con win_size y la longitud de IBI no se forma ninguna ventana. Reduce win_size o cambia step.")
 
-    for start in start_indices:
-        segment = time_serie[start : start + window]
-        
-        pats = ordinal_patterns(segment, embeding, delay)
-
-        # Calcular distribución de patrones
-        if len(pats) == 0:
-            p_vec = np.zeros(n_patterns)
-            Hn = 0.0
-        else:
-            counts = np.zeros(n_patterns, dtype=float)
-            for p in pats:
-                idx = perm_to_index[p]
-                counts[idx] += 1.0
-
-            p_vec = counts / counts.sum()
-            p_nonzero = p_vec[p_vec > 0]
-            H = -np.sum(p_nonzero * np.log(p_nonzero))
-            Hn = H / np.log(math.factorial(embeding))
-
-        # Manejo seguro de beat_times
-        if beat_times is None:
-            # valor por defecto (tiempo relativo)
-            win_times.append(start)
-        else:
-            # valor original si existe beat_times real
-            bt = np.asarray(beat_times)
-            if len(bt) >= start + window:
-                win_times.append(np.mean(bt[start:start+window]))
+    # Los patrones de una ventana son los que empiezan en [start, start + largo):
+    # se codifica la serie completa una sola vez y cada ventana es un tramo.
+    largo = window - (embeding - 1) * delay
+    if largo > 0:
+        codigos = obtener_codigos(time_serie, embeding, delay)
+        pesos = pesos_patrones(time_serie, embeding, delay, estimador)
+        with tramo("histograma_ventanas", D=embeding, ventanas=len(start_indices)):
+            counts = conteos_por_ventana(codigos, n_patterns, largo, step, len(start_indices), pesos)
+            if pesos is None:
+                freqs = counts / float(largo)
             else:
-                # Si beat_times es más corto, evitar crash
-                win_times.append(np.nan)
+                # ventanas de peso total cero (señal constante) quedan sin patrones
+                total = counts.sum(axis=1, keepdims=True)
+                freqs = np.divide(counts, total, out=np.zeros_like(counts), where=total > 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                plogp = np.where(freqs > 0, freqs * np.log(freqs), 0.0)
+            H_norm = -plogp.sum(axis=1) / np.log(n_patterns)
+            if pesos is not None:
+                # sin peso no hay distribución: la entropía no está definida
+                H_norm[total[:, 0] <= 0] = np.nan
+        if faltantes:
+            # un patrón falta si no aparece, pese o no (WPE puede dar peso 0)
+            with tramo("patrones_faltantes", D=embeding, ventanas=len(start_indices)):
+                n_faltantes = faltantes_por_ventana(codigos, n_patterns, largo, step, len(start_indices))
+                ausentes = ausentes_globales(codigos, n_patterns, largo, step, len(start_indices))
+    else:
+        # ventana más corta que un embedding: no hay patrones
+        freqs = np.zeros((len(start_indices), n_patterns))
+        H_norm = np.zeros(len(start_indices))
+        n_faltantes = np.full(len(start_indices), n_patterns, dtype=np.int64)
+        ausentes = np.arange(n_patterns)
+    if complejidad:
+        with tramo("complejidad_js", D=embeding, ventanas=len(start_indices)):
+            C = complejidad_js(freqs, H_norm)
 
-        freqs_list.append(p_vec)
-        H_norm.append(Hn)
+    # Manejo seguro de beat_times
+    if beat_times is None:
+        # valor por defecto (tiempo relativo)
+        win_times = start_indices
+    else:
+        # valor original si existe beat_times real
+        bt = np.asarray(beat_times)
+        win_times = np.array([
+            np.mean(bt[start:start+window]) if len(bt) >= start + window
+            else np.nan   # Si beat_times es más corto, evitar crash
+            for start in start_indices
+        ])
 
     # === GRAFICADOS (idénticos a tu código original, sin tocar) ===
     if graf and plot and beat_times is not None:
         # todo este bloque queda EXACTO, no lo modifico
+        import matplotlib.pyplot as plt
         ibi = np.asarray(time_serie)
         tiempos_ibi = np.asarray(beat_times)[1:]
         index = np.arange(len(ibi))
@@ -164,13 +528,463 @@ def band_and_pompe(time_serie, embeding, delay, window, step,
         plt.tight_layout()
         plt.close()
 
-    return np.array(freqs_list), np.array(H_norm), np.array(win_times)
+    resultado = (freqs, H_norm, win_times)
+    if complejidad:
+        resultado += (C,)
+    if faltantes:
+        resultado += (n_faltantes, ausentes)
+    return resultado
+
+################################################################################
+# Entropía de permutaciones multiescala
+################################################################################
+# estandar:  una serie gruesa por escala (promedios de bloques de `escala` muestras)
+# compuesta: las `escala` series gruesas desplazadas; se promedia su entropía
+# refinada:  las mismas series, pero se suman sus conteos antes de la entropía
+VARIANTES_MULTIESCALA = ("estandar", "compuesta", "refinada")
+
+
+def serie_gruesa(acumulada, escala, offset=0):
+    """
+    Serie de promedios de bloques [offset + j*escala, offset + (j+1)*escala)
+    a partir de la suma acumulada (con un 0 adelante) de la serie original:
+    cada escala y desplazamiento sale de dos rebanadas de la misma acumulada.
+    """
+    m = (len(acumulada) - 1 - offset) // escala
+    inicio = acumulada[offset:offset + m * escala:escala]
+    fin = acumulada[offset + escala:offset + (m + 1) * escala:escala]
+    return (fin - inicio) / escala
+
+
+def entropia_escala(time_serie, escala, embeding, delay, window, step,
+                    variante="estandar", estimador="clasica", acumulada=None):
+    """
+    H_norm por ventana a una escala. Las ventanas son las de band_and_pompe
+    sobre la serie original ([k*step, k*step+window) en muestras); en la serie
+    gruesa cada ventana abarca window // escala muestras desde su primer
+    bloque completo. Devuelve un vector de n_ventanas (NaN donde la ventana
+    no alcanza para un patrón).
+    """
+    x = np.asarray(time_serie, dtype=float)
+    validar_parametros(x, embeding, window, step)
+    n_patterns = math.factorial(embeding)
+    start_indices = np.arange(0, len(x) - window + 1, step)
+    n_ventanas = len(start_indices)
+    largo = window // escala - (embeding - 1) * delay
+    if largo <= 0 or n_ventanas == 0:
+        return np.full(n_ventanas, np.nan)
+
+    if acumulada is None and escala > 1:
+        acumulada = np.concatenate([[0.0], np.cumsum(x)])
+
+    offsets = range(escala) if variante in ("compuesta", "refinada") else (0,)
+    conteos_total = None
+    entropias = []
+    for offset in offsets:
+        if escala == 1:
+            y, codigos = x, obtener_codigos(x, embeding, delay)
+        else:
+            y = serie_gruesa(acumulada, escala, offset)
+            codigos = codificar_patrones(y, embeding, delay)
+        # primer bloque completo de cada ventana en la serie gruesa
+        inicios = -((offset - start_indices) // escala)
+        conteos = conteos_por_ventana(codigos, n_patterns, largo, step, n_ventanas,
+                                      pesos_patrones(y, embeding, delay, estimador), inicios)
+        if variante == "refinada":
+            conteos_total = conteos if conteos_total is None else conteos_total + conteos
+        else:
+            entropias.append(_entropia_normalizada(conteos))
+
+    if variante == "refinada":
+        return _entropia_normalizada(conteos_total)
+    # compuesta: promedio entre desplazamientos que tienen patrones en la ventana
+    E = np.vstack(entropias)
+    n_validas = np.isfinite(E).sum(axis=0)
+    with np.errstate(invalid='ignore'):
+        return np.where(n_validas > 0, np.nansum(E, axis=0) / n_validas, np.nan)
+
+
+def _entropia_normalizada(conteos):
+    """Entropía normalizada de cada fila de conteos (NaN en filas vacías)."""
+    total = conteos.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = conteos / total
+        plogp = np.where(p > 0, p * np.log(p), 0.0)
+    H = -plogp.sum(axis=1) / np.log(conteos.shape[1])
+    H[total[:, 0] <= 0] = np.nan
+    return H
+
+
+def entropia_multiescala(time_serie, escalas, embeding, delay, window, step,
+                         variante="estandar", estimador="clasica"):
+    """Matriz (n_escalas, n_ventanas) de H_norm; la suma acumulada se calcula una vez."""
+    x = np.asarray(time_serie, dtype=float)
+    acumulada = np.concatenate([[0.0], np.cumsum(x)])
+    return np.vstack([
+        entropia_escala(x, s, embeding, delay, window, step, variante, estimador, acumulada)
+        for s in escalas
+    ])
+
+
+################################################################################
+# Redes de transición ordinal
+################################################################################
+# Nodos: patrones. Arista a -> b: el patrón b sigue al a (embeddings i e i+1).
+# Cada transición se codifica como un único entero a * D! + b; con D = 7 hay
+# 25 millones de aristas posibles, así que nunca se arma la matriz densa.
+METRICAS_TRANSICIONES = ("entropia_aristas", "autolazos", "nodos", "aristas")
+
+
+def pares_transicion(codigos, n_categorias):
+    """Código de cada transición (codigos[i], codigos[i+1]) como a * n_categorias + b."""
+    codigos = np.asarray(codigos)
+    return codigos[:-1].astype(np.int64) * n_categorias + codigos[1:]
+
+
+def red_transiciones(codigos, n_categorias, inicio=0, fin=None):
+    """
+    Red de transiciones del tramo [inicio, fin) de `codigos` como matriz
+    dispersa (scipy.sparse, CSR) de n_categorias x n_categorias con la
+    cantidad de veces que cada patrón siguió a otro.
+    """
+    from scipy.sparse import csr_matrix
+    pares = pares_transicion(codigos[inicio:fin], n_categorias)
+    aristas, conteos = np.unique(pares, return_counts=True)
+    return csr_matrix((conteos, (aristas // n_categorias, aristas % n_categorias)),
+                      shape=(n_categorias, n_categorias))
+
+
+def _xlogx(x):
+    x = np.asarray(x, dtype=float)
+    return x * np.log(np.where(x > 0, x, 1.0))
+
+
+def suma_nlogn_por_ventana(codigos, largo, step, n_ventanas):
+    """
+    S = sum(n * log n) sobre los conteos n de cada código en cada ventana
+    [k*step, k*step+largo), sin armar histogramas: la entropía de la ventana
+    es log(largo) - S / largo.
+
+    Al pasar de la ventana que empieza en a a la que empieza en a + 1 sale
+    la posición a (con n apariciones de su código en [a, a+largo)) y entra
+    la a + largo (con n apariciones en [a+1, a+largo]); S cambia en
+    g(n) = n log n - (n-1) log(n-1). Cuántas veces aparece un código en un
+    tramo sale de un searchsorted sobre las posiciones ordenadas por
+    (código, posición). Costo O(n log n) para todas las ventanas juntas,
+    sea cual sea la cantidad de códigos posibles.
+    """
+    inicios = np.arange(n_ventanas) * step
+    m = min(len(codigos), inicios[-1] + largo)
+    codigos = np.asarray(codigos[:m], dtype=np.int64)
+
+    # las apariciones de un código c en [p, q) son las claves entre c*m + p y c*m + q
+    orden = np.argsort(codigos, kind='stable')
+    claves = codigos[orden] * m + orden
+    rango = np.empty(m, dtype=np.int64)
+    rango[orden] = np.arange(m)
+
+    salen = np.arange(inicios[-1])
+    n_sale = np.searchsorted(claves, codigos[salen] * m + salen + largo) - rango[salen]
+    entran = salen + largo
+    n_entra = rango[entran] - np.searchsorted(claves, codigos[entran] * m + entran - largo + 1) + 1
+    dS = (_xlogx(n_entra) - _xlogx(n_entra - 1)) - (_xlogx(n_sale) - _xlogx(n_sale - 1))
+
+    _, conteos = np.unique(codigos[:largo], return_counts=True)
+    S = np.concatenate([[0.0], np.cumsum(dS)]) + _xlogx(conteos).sum()
+    return S[inicios]
+
+
+def metricas_transiciones(codigos, n_categorias, largo, step, n_ventanas):
+    """
+    Métricas de la red de transiciones de cada ventana de `largo` patrones
+    (las transiciones de la ventana son las que unen dos de sus patrones):
+
+      entropia_aristas  entropía de Shannon (nats) de los pesos de las aristas
+      autolazos         probabilidad de que un patrón se siga a sí mismo
+      nodos             patrones distintos de la ventana
+      aristas           transiciones distintas de la ventana
+
+    La entropía sale de suma_nlogn_por_ventana sobre los códigos de arista:
+    todas las ventanas juntas en O(n log n), sin histogramas por ventana.
+    Devuelve un dict con un array por métrica.
+    """
+    metricas = {nombre: np.zeros(n_ventanas) for nombre in METRICAS_TRANSICIONES}
+    if n_ventanas == 0 or largo <= 0:
+        return metricas
+    metricas["nodos"] = (n_categorias - faltantes_por_ventana(
+        codigos, n_categorias, largo, step, n_ventanas)).astype(float)
+    L = largo - 1
+    if L <= 0:
+        return metricas
+
+    inicios = np.arange(n_ventanas) * step
+    m = min(len(codigos) - 1, inicios[-1] + L)
+    pares = pares_transicion(codigos[:m + 1], n_categorias)
+
+    bucles = np.concatenate([[0], np.cumsum(pares // n_categorias == pares % n_categorias)])
+    metricas["autolazos"] = (bucles[inicios + L] - bucles[inicios]) / L
+
+    n_aristas = n_categorias * n_categorias
+    metricas["aristas"] = (n_aristas - faltantes_por_ventana(
+        pares, n_aristas, L, step, n_ventanas)).astype(float)
+
+    S = suma_nlogn_por_ventana(pares, L, step, n_ventanas)
+    metricas["entropia_aristas"] = np.maximum(np.log(L) - S / L, 0.0)
+    return metricas
+
+
+def transiciones_ordinales(time_serie, embeding, delay, window, step):
+    """
+    Redes de transición ordinal con las mismas ventanas que band_and_pompe.
+    Devuelve (metricas, red, start_indices): el dict de metricas_transiciones
+    y la red de toda la señal (dispersa, ver red_transiciones).
+    """
+    validar_parametros(time_serie, embeding, window, step)
+    n_patterns = math.factorial(embeding)
+    start_indices = np.arange(0, len(time_serie) - window + 1, step)
+    if len(start_indices) == 0:
+        raise ValueError("Con win_size y la longitud de IBI no se forma ninguna ventana. Reduce win_size o cambia step.")
+
+    largo = window - (embeding - 1) * delay
+    codigos = obtener_codigos(time_serie, embeding, delay)
+    with tramo("transiciones_ordinales", D=embeding, ventanas=len(start_indices)):
+        metricas = metricas_transiciones(codigos, n_patterns, largo, step, len(start_indices))
+        red = red_transiciones(codigos, n_patterns)
+    return metricas, red, start_indices
+
+
+################################################################################
+# Sincronía ordinal entre canales
+################################################################################
+# informacion_mutua: I(X;Y) = H(X) + H(Y) - H(X,Y) de los patrones de dos
+#                    canales en la misma ventana (nats)
+# coincidencia:      fracción de posiciones en que los dos canales tienen el
+#                    mismo patrón
+MEDIDAS_SINCRONIA = ("informacion_mutua", "coincidencia")
+
+# hasta esta cantidad de celdas (ventanas x categorías) la entropía por ventana
+# se saca del histograma denso; por encima, con suma_nlogn_por_ventana
+_MAX_CELDAS_DENSAS = 1 << 22
+
+
+def entropia_codigos_por_ventana(codigos, n_categorias, largo, step, n_ventanas):
+    """Entropía de Shannon (nats, sin normalizar) de los códigos de cada ventana."""
+    if n_ventanas * n_categorias <= _MAX_CELDAS_DENSAS:
+        conteos = conteos_por_ventana(codigos, n_categorias, largo, step, n_ventanas)
+        S = _xlogx(conteos).sum(axis=1)
+    else:
+        S = suma_nlogn_por_ventana(codigos, largo, step, n_ventanas)
+    return np.maximum(np.log(largo) - S / largo, 0.0)
+
+
+def sincronia_pares(codigos, pares, n_categorias, largo, step, n_ventanas, medida,
+                    entropias=None):
+    """
+    Sincronía de cada par (i, j) de `pares` en cada ventana: (len(pares), n_ventanas).
+    codigos es (canales, n) con los códigos de patrón de cada canal, todos del
+    mismo largo. Para la información mutua, `entropias` (canales, n_ventanas)
+    son las entropías marginales ya calculadas (se comparten entre pares);
+    el código conjunto de un par es ci * n_categorias + cj.
+    """
+    if medida not in MEDIDAS_SINCRONIA:
+        raise ValueError(f"Medida de sincronía desconocida: {medida}")
+    inicios = np.arange(n_ventanas) * step
+    resultado = np.empty((len(pares), n_ventanas))
+    for p, (i, j) in enumerate(pares):
+        ci, cj = codigos[i], codigos[j]
+        if medida == "coincidencia":
+            iguales = np.concatenate([[0], np.cumsum(ci == cj)])
+            resultado[p] = (iguales[inicios + largo] - iguales[inicios]) / largo
+        else:
+            conjunto = ci.astype(np.int64) * n_categorias + cj
+            H_xy = entropia_codigos_por_ventana(conjunto, n_categorias * n_categorias,
+                                                largo, step, n_ventanas)
+            resultado[p] = np.maximum(entropias[i] + entropias[j] - H_xy, 0.0)
+    return resultado
+
+
+def matriz_sincronia(triangulo, diagonal):
+    """
+    Matriz (canales, canales) de una ventana a partir de su triángulo superior
+    condensado (los pares (i, j) con i < j en orden de filas) y su diagonal.
+    """
+    C = len(diagonal)
+    matriz = np.empty((C, C), dtype=np.result_type(triangulo, diagonal))
+    filas, columnas = np.triu_indices(C, 1)
+    matriz[filas, columnas] = triangulo
+    matriz[columnas, filas] = triangulo
+    matriz[np.arange(C), np.arange(C)] = diagonal
+    return matriz
+
+
+################################################################################
+# Datos sustitutos (hipótesis nula para las curvas de entropía)
+################################################################################
+# barajado: misma distribución de amplitudes, sin estructura temporal
+# fase:     mismo espectro de potencia (fases aleatorias), amplitudes gaussianas
+# iaaft:    mismo espectro y misma distribución de amplitudes (Schreiber-Schmitz)
+TIPOS_SUSTITUTOS = ("barajado", "fase", "iaaft")
+
+
+def _fases_aleatorias(modulos, n, rng):
+    """Serie real de largo n con el espectro `modulos` (rfft) y fases uniformes."""
+    fases = rng.uniform(0.0, 2.0 * np.pi, len(modulos))
+    fases[0] = 0.0
+    if n % 2 == 0:
+        # el bin de Nyquist de una señal real no tiene fase
+        fases[-1] = 0.0
+    return np.fft.irfft(modulos * np.exp(1j * fases), n)
+
+
+def generar_sustituto(x, tipo, rng, iteraciones=100):
+    """
+    Un sustituto de la serie x. rng es un numpy.random.Generator: con la misma
+    semilla se obtiene el mismo sustituto.
+    """
+    x = np.asarray(x, dtype=float)
+    if tipo == "barajado":
+        return rng.permutation(x)
+    modulos = np.abs(np.fft.rfft(x))
+    if tipo == "fase":
+        # la media (bin 0) se conserva con su fase nula
+        return _fases_aleatorias(modulos, len(x), rng)
+    if tipo != "iaaft":
+        raise ValueError(f"Tipo de sustituto desconocido: {tipo}")
+
+    ordenada = np.sort(x)
+    s = rng.permutation(x)
+    orden_previo = None
+    for _ in range(iteraciones):
+        # espectro del original con las fases actuales...
+        espectro = np.fft.rfft(s)
+        espectro *= modulos / np.maximum(np.abs(espectro), np.finfo(float).tiny)
+        y = np.fft.irfft(espectro, len(x))
+        # ...y las amplitudes del original, repartidas según el rango de y
+        orden = np.argsort(y, kind='stable')
+        s[orden] = ordenada
+        if orden_previo is not None and np.array_equal(orden, orden_previo):
+            break
+        orden_previo = orden
+    return s
+
+
+def entropia_sustituto(serie, embeding, delay, window, step, estimador="clasica"):
+    """
+    H_norm por ventana como en band_and_pompe, sin pasar por la caché de
+    patrones: cada sustituto se usa una sola vez y solo desplazaría a los
+    códigos de las señales reales.
+    """
+    n_patterns = math.factorial(embeding)
+    n_ventanas = len(range(0, len(serie) - window + 1, step))
+    largo = window - (embeding - 1) * delay
+    if largo <= 0:
+        return np.zeros(n_ventanas)
+    codigos = codificar_patrones(serie, embeding, delay)
+    pesos = pesos_patrones(serie, embeding, delay, estimador)
+    conteos = conteos_por_ventana(codigos, n_patterns, largo, step, n_ventanas, pesos)
+    return np.nan_to_num(_entropia_normalizada(conteos))
+
+
+################################################################################
+# Entropía muestral (SampEn) y aproximada (ApEn)
+################################################################################
+# Plantillas de vecinos que se comparan de a bloques (acota la memoria de los pares).
+_BLOQUE_PLANTILLAS = 1024
+
+
+def coincidencias_plantillas(x, m, r):
+    """
+    Cuántas plantillas coinciden con cada una (distancia de Chebyshev <= r,
+    contándose a sí misma): (c_m, c_m1) para las N-m+1 plantillas de largo m
+    y las N-m de largo m+1.
+
+    En vez de comparar todos los pares (O(N²)) se ordenan las plantillas por
+    su primera coordenada y se parten en bloques con un cKDTree cada uno; solo
+    se buscan vecinos entre bloques cuyas primeras coordenadas quedan a menos
+    de r (query_pairs dentro del bloque, sparse_distance_matrix entre dos).
+    Una coincidencia de largo m+1 es una de largo m que además coincide en la
+    última muestra, así que alcanza con un único árbol de dimensión m.
+    """
+    from scipy.spatial import cKDTree
+    x = np.asarray(x, dtype=float)
+    plantillas = sliding_window_view(x, m)
+    n = len(plantillas)
+    orden = np.argsort(plantillas[:, 0], kind='stable')
+    ordenadas = plantillas[orden]
+    primera = ordenadas[:, 0]
+    # muestra m+1 de cada plantilla (NaN en la última, que no tiene: nunca coincide)
+    ultima = np.append(x, np.nan)[orden + m]
+
+    cortes = list(range(0, n, _BLOQUE_PLANTILLAS)) + [n]
+    arboles = [cKDTree(ordenadas[a:b]) for a, b in zip(cortes[:-1], cortes[1:])]
+    c_m = np.ones(n, dtype=np.int64)
+    c_m1 = np.ones(n, dtype=np.int64)
+    for a, (a0, a1) in enumerate(zip(cortes[:-1], cortes[1:])):
+        for b in range(a, len(arboles)):
+            b0, b1 = cortes[b], cortes[b + 1]
+            if primera[b0] - primera[a1 - 1] > r:
+                break
+            if a == b:
+                i, j = arboles[a].query_pairs(r, p=np.inf, output_type='ndarray').T
+            else:
+                pares = arboles[a].sparse_distance_matrix(arboles[b], r, p=np.inf, output_type='ndarray')
+                i, j = pares['i'], pares['j']
+            c_m[a0:a1] += np.bincount(i, minlength=a1 - a0)
+            c_m[b0:b1] += np.bincount(j, minlength=b1 - b0)
+            ok = np.abs(ultima[a0 + i] - ultima[b0 + j]) <= r
+            c_m1[a0:a1] += np.bincount(i[ok], minlength=a1 - a0)
+            c_m1[b0:b1] += np.bincount(j[ok], minlength=b1 - b0)
+
+    # de vuelta al orden temporal
+    resultado_m = np.empty(n, dtype=np.int64)
+    resultado_m[orden] = c_m
+    resultado_m1 = np.empty(n, dtype=np.int64)
+    resultado_m1[orden] = c_m1
+    return resultado_m, resultado_m1[:n - 1]
+
+
+def sampen_apen(x, m, r):
+    """
+    (SampEn, ApEn) de la serie x con plantillas de largo m y tolerancia r.
+    SampEn (Richman-Moorman) compara las primeras N-m plantillas de largo m y
+    m+1 sin contar la propia; queda NaN si no hay coincidencias. ApEn
+    (Pincus) cuenta la propia plantilla y usa todas las de cada largo.
+    """
+    c_m, c_m1 = coincidencias_plantillas(x, m, r)
+    n = len(c_m)
+    # pares ordenados (i != j) entre las n-1 primeras plantillas de largo m:
+    # se descuentan la propia y las coincidencias con la última plantilla
+    B = c_m[:-1].sum() - (n - 1) - (c_m[-1] - 1)
+    A = c_m1.sum() - (n - 1)
+    sampen = -np.log(A / B) if A > 0 and B > 0 else np.nan
+    apen = np.mean(np.log(c_m / n)) - np.mean(np.log(c_m1 / (n - 1)))
+    return sampen, apen
+
+
+def sampen_apen_ventanas(time_serie, m, r_factor, window, step):
+    """
+    SampEn y ApEn de cada ventana (mismas ventanas que band_and_pompe). La
+    tolerancia de cada ventana es r_factor veces su desvío estándar.
+    Devuelve (sampen, apen, start_indices).
+    """
+    validar_parametros(time_serie, m + 2, window, step)
+    x = np.asarray(time_serie, dtype=float)
+    start_indices = np.arange(0, len(x) - window + 1, step)
+    sampen = np.empty(len(start_indices))
+    apen = np.empty(len(start_indices))
+    with tramo("sampen_apen", m=m, ventanas=len(start_indices), window=window):
+        for k, inicio in enumerate(start_indices):
+            segmento = x[inicio:inicio + window]
+            sampen[k], apen[k] = sampen_apen(segmento, m, r_factor * np.std(segmento))
+    return sampen, apen, start_indices
+
 
 ################################################################################
 # Funciones para calcular el IBI
 ################################################################################
 def butter_bandpass_filter(data, lowcut, highcut, fs, order=5):
     """Filtro pasa banda Butterworth."""
+    from scipy.signal import butter, filtfilt
     nyq = 0.5 * fs
     low = lowcut / nyq
     high = highcut / nyq
@@ -189,6 +1003,8 @@ def detect_r_peaks(signal, fs):
     Returns:
         np.array: Índices de los picos detectados.
     """
+    from scipy.signal import find_peaks, medfilt
+
     # 1. Pre-procesamiento: Filtrado de la señal para enfatizar picos R
     # Frecuencias típicas para ECG: 5 a 15 Hz
     filtered_signal = butter_bandpass_filter(signal, 5, 15, fs, order=3)
@@ -214,10 +1030,10 @@ def detect_r_peaks(signal, fs):
     return peaks_indices
 
 
-def calculate_ibi(raw_signal, fs, tab_ax, tab_canvas, plot_style_var, title_var, xlabel_var, ylabel_var):
+def ibi_from_signal(raw_signal, fs):
     """
-    Calcula los IBI a partir de la señal bruta (detectando picos R), 
-    grafica y actualiza el canvas de Tkinter con títulos de ejes personalizados.
+    Detecta los picos R y devuelve (ibi_values_ms, peaks_indices), sin graficar.
+    Es la parte de cálculo de calculate_ibi, usable fuera de la GUI.
     """
     if len(raw_signal) < fs * 2:
         raise ValueError("La señal es demasiado corta para calcular IBI.")
@@ -233,6 +1049,17 @@ def calculate_ibi(raw_signal, fs, tab_ax, tab_canvas, plot_style_var, title_var,
     ibi_values_seconds = np.diff(peak_times_seconds)
     ibi_values_ms = ibi_values_seconds * 1000 
 
+    return ibi_values_ms, peaks_indices
+
+
+def calculate_ibi(raw_signal, fs, tab_ax, tab_canvas, plot_style_var, title_var, xlabel_var, ylabel_var):
+    """
+    Calcula los IBI a partir de la señal bruta (detectando picos R), 
+    grafica y actualiza el canvas de Tkinter con títulos de ejes personalizados.
+    """
+    import matplotlib.pyplot as plt
+    ibi_values_ms, peaks_indices = ibi_from_signal(raw_signal, fs)
+
     # --- Lógica de Graficación ---
     plt.style.use(plot_style_var) # style_var será 'default' ahora
     tab_ax.clear()
@@ -251,6 +1078,466 @@ def calculate_ibi(raw_signal, fs, tab_ax, tab_canvas, plot_style_var, title_var,
     # Devolvemos los datos por si se quieren guardar
     return ibi_values_ms
 
+################################################################################
+# Análisis de fluctuaciones sin tendencia (DFA)
+################################################################################
+# Rangos habituales (en latidos) para HRV: alfa1 de corto plazo, alfa2 de largo.
+RANGO_ALFA1 = (4, 16)
+RANGO_ALFA2 = (16, 64)
+
+# valores del residuo que se calculan de una vez al desestimar tendencias
+_BLOQUE_DFA = 1 << 22
+
+
+def escalas_dfa(n_min, n_max, por_octava=4):
+    """Tamaños de caja enteros, espaciados logarítmicamente entre n_min y n_max."""
+    if n_max < n_min:
+        return np.array([], dtype=np.int64)
+    n = int(np.floor(np.log2(n_max / n_min) * por_octava)) + 1
+    return np.unique(np.round(n_min * 2.0 ** (np.arange(n) / por_octava)).astype(np.int64))
+
+
+def _base_polinomica(escala, orden):
+    """Base ortonormal (escala x orden+1) de los polinomios de grado <= orden."""
+    t = np.linspace(-1.0, 1.0, escala)
+    q, _ = np.linalg.qr(np.vander(t, orden + 1))
+    return q
+
+
+def fluctuacion_cajas(perfil, inicios, largo, escala, orden=1):
+    """
+    F(escala)² de cada tramo [inicio, inicio + largo) del perfil.
+
+    Las cajas de cada tramo se toman desde el principio y desde el final
+    (2 * largo // escala cajas, como en Peng et al.) y se arman con vistas
+    con strides sobre el perfil, sin copiar ni recorrer cajas en Python. El
+    ajuste polinomial de todas las cajas de todos los tramos es una sola
+    proyección sobre una base ortonormal. Con orden >= 1 el perfil global
+    sirve para cualquier tramo: su propio perfil difiere en una recta, que
+    el ajuste quita igual.
+    """
+    from numpy.lib.stride_tricks import as_strided
+    perfil = np.ascontiguousarray(perfil, dtype=float)
+    inicios = np.asarray(inicios, dtype=np.int64)
+    k = largo // escala
+    if k == 0 or len(inicios) == 0:
+        return np.full(len(inicios), np.nan)
+    base = _base_polinomica(escala, orden)
+    paso_bytes = perfil.strides[0]
+    pasos = np.diff(inicios)
+    paso = int(pasos[0]) if len(pasos) else 0
+    if len(pasos) and not np.all(pasos == paso):
+        raise ValueError("Los inicios de los tramos deben estar equiespaciados.")
+
+    F2 = np.zeros(len(inicios))
+    # de a bloques de tramos, para que el residuo no ocupe más de _BLOQUE_DFA valores
+    por_bloque = max(1, _BLOQUE_DFA // (k * escala))
+    for b0 in range(0, len(inicios), por_bloque):
+        b1 = min(b0 + por_bloque, len(inicios))
+        # desde el principio del tramo y desde el final (resto = largo % escala)
+        for desplazamiento in {0, largo - k * escala}:
+            cajas = as_strided(perfil[inicios[b0] + desplazamiento:], shape=(b1 - b0, k, escala),
+                               strides=(paso * paso_bytes, escala * paso_bytes, paso_bytes),
+                               writeable=False)
+            residuo = cajas - (cajas @ base) @ base.T
+            F2[b0:b1] += np.einsum('wkn,wkn->w', residuo, residuo) / (k * escala)
+    return F2 / (1 if largo % escala == 0 else 2)
+
+
+def dfa(x, escalas, orden=1):
+    """F(n) de la serie completa para cada tamaño de caja de `escalas`."""
+    x = np.asarray(x, dtype=float)
+    perfil = np.cumsum(x - x.mean())
+    return np.sqrt(np.array([fluctuacion_cajas(perfil, [0], len(x), n, orden)[0] for n in escalas]))
+
+
+def exponentes_dfa(escalas, F, rango):
+    """
+    Pendiente de log F vs log n para las escalas dentro de `rango` (inclusive).
+    F puede ser (n_escalas,) o (n_tramos, n_escalas): todas las rectas se
+    ajustan juntas por mínimos cuadrados.
+    """
+    escalas = np.asarray(escalas)
+    usar = (escalas >= rango[0]) & (escalas <= rango[1])
+    F = np.atleast_2d(F)[:, usar]
+    if usar.sum() < 2:
+        return np.full(F.shape[0], np.nan)
+    lx = np.log(escalas[usar])
+    lx = lx - lx.mean()
+    with np.errstate(divide='ignore'):
+        ly = np.log(F)
+    ly = ly - ly.mean(axis=1, keepdims=True)
+    return ly @ lx / (lx @ lx)
+
+
+def dfa_ventanas(x, window, step, escalas, orden=1):
+    """
+    DFA de cada ventana deslizante [k*step, k*step + window): matriz
+    (n_ventanas, n_escalas) de F(n). Un único perfil (suma acumulada) para
+    toda la serie y, por escala, una proyección para todas las ventanas.
+    """
+    validar_parametros(x, 2, window, step)
+    x = np.asarray(x, dtype=float)
+    perfil = np.cumsum(x - x.mean())
+    inicios = np.arange(0, len(x) - window + 1, step)
+    F = np.empty((len(inicios), len(escalas)))
+    with tramo("dfa_ventanas", ventanas=len(inicios), escalas=len(escalas)):
+        for e, n in enumerate(escalas):
+            F[:, e] = np.sqrt(fluctuacion_cajas(perfil, inicios, window, n, orden))
+    return F, inicios
+
+
+
+################################################################################
+# Variabilidad de la frecuencia cardíaca (HRV)
+################################################################################
+# Bandas de frecuencia estándar (Hz) y límites fisiológicos de un IBI (ms).
+BANDA_LF = (0.04, 0.15)
+BANDA_HF = (0.15, 0.4)
+LIMITES_IBI = (300.0, 2000.0)
+METRICAS_HRV = ("media_nn", "sdnn", "rmssd", "pnn50", "lf", "hf", "lf_hf")
+
+# ventana estándar de 5 min para el espectro y paso por defecto de la HRV por ventanas (s)
+VENTANA_HRV = 300.0
+PASO_HRV = 30.0
+
+# valores (ventana x latido) que se recorren de una vez en Lomb-Scargle
+_BLOQUE_LOMB = 1 << 18
+
+
+def filtrar_ectopicos(ibi_ms, umbral=0.2, vecinos=5, limites=LIMITES_IBI):
+    """
+    Máscara de latidos normales (NN). Se descartan los IBI fuera de `limites`
+    y los que se apartan más de `umbral` (fracción) de la mediana de sus
+    `vecinos` latidos a cada lado. Todo vectorizado: una mediana móvil sobre
+    una vista de ventanas, sin recorrer latido por latido.
+    """
+    ibi = np.asarray(ibi_ms, dtype=float)
+    validos = (ibi >= limites[0]) & (ibi <= limites[1])
+    if len(ibi) < 2 * vecinos + 1:
+        return validos
+    # los fuera de límite no deben arrastrar la mediana local
+    limpio = np.where(validos, ibi, np.nan)
+    relleno = np.pad(limpio, vecinos, mode="edge")
+    with warnings.catch_warnings():
+        # tramos sin ningún latido dentro de límites: mediana NaN, queda descartado
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mediana = np.nanmedian(sliding_window_view(relleno, 2 * vecinos + 1), axis=1)
+    with np.errstate(invalid="ignore"):
+        return validos & (np.abs(ibi - mediana) <= umbral * mediana)
+
+
+def _sumas_ventana(acumulada, a, b):
+    return acumulada[b] - acumulada[a]
+
+
+def _acumular(x):
+    return np.concatenate(([0.0], np.cumsum(x, dtype=float)))
+
+
+def hrv_temporal(ibi_ms, validos, a, b):
+    """
+    Métricas temporales de los tramos de latidos [a, b) con sumas prefijas:
+    cada ventana cuesta O(1) sin importar su largo. Devuelve un dict con
+    media_nn, sdnn, rmssd y pnn50 (arrays de len(a)); NaN si no alcanzan los
+    latidos normales.
+    Las diferencias sucesivas solo cuentan si los dos latidos son normales.
+    """
+    ibi = np.asarray(ibi_ms, dtype=float)
+    v = np.asarray(validos, dtype=bool)
+    # centrar antes de acumular cuadrados evita la cancelación en 24 h de latidos
+    centro = ibi[v].mean() if v.any() else 0.0
+    x = np.where(v, ibi - centro, 0.0)
+    n = _sumas_ventana(_acumular(v), a, b)
+    s1 = _sumas_ventana(_acumular(x), a, b)
+    s2 = _sumas_ventana(_acumular(x * x), a, b)
+
+    d = np.diff(ibi)
+    vd = v[1:] & v[:-1]
+    d = np.where(vd, d, 0.0)
+    # la diferencia j une los latidos j y j+1: dentro de [a, b) van de a a b-2
+    bd = np.maximum(b - 1, a)
+    nd = _sumas_ventana(_acumular(vd), a, bd)
+    sd2 = _sumas_ventana(_acumular(d * d), a, bd)
+    n50 = _sumas_ventana(_acumular(np.abs(d) > 50.0), a, bd)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = s1 / n
+        var = np.maximum(s2 - s1 * media, 0.0) / (n - 1)
+        return {
+            "media_nn": np.where(n > 0, media + centro, np.nan),
+            "sdnn": np.where(n > 1, np.sqrt(var), np.nan),
+            "rmssd": np.where(nd > 0, np.sqrt(sd2 / nd), np.nan),
+            "pnn50": np.where(nd > 0, 100.0 * n50 / nd, np.nan),
+        }
+
+
+def lomb_scargle_ventanas(tiempos, valores, validos, a, b, frecuencias):
+    """
+    Periodograma de Lomb-Scargle de cada tramo [a, b) de la serie no
+    uniforme (tiempos en s, valores), en densidad espectral unilateral
+    (unidades²/Hz). `frecuencias` debe ser una grilla uniforme.
+
+    Todos los tramos se evalúan juntos: se rellenan a un mismo largo con
+    peso cero y se recorren las frecuencias con la recurrencia
+    z <- z * exp(iΔωt), así no hay un seno ni un coseno por punto y
+    frecuencia. De z salen las dos sumas que necesita el periodograma:
+    Σ y·z (= YC + i·YS) y Σ z² (= CC - SS + 2i·CS), y con ellas el desfase
+    tau que desacopla seno y coseno. Se procesa por bloques de ventanas.
+    Devuelve (n_tramos, n_frecuencias).
+    """
+    t = np.asarray(tiempos, dtype=float)
+    y = np.asarray(valores, dtype=float)
+    v = np.asarray(validos, dtype=bool)
+    f = np.asarray(frecuencias, dtype=float)
+    a = np.asarray(a)
+    b = np.asarray(b)
+    largo = int((b - a).max(initial=0))
+    P = np.full((len(a), len(f)), np.nan)
+    if largo < 2 or len(f) == 0:
+        return P
+    dw = 2.0 * np.pi * (f[1] - f[0]) if len(f) > 1 else 0.0
+    bloque = max(1, _BLOQUE_LOMB // largo)
+    offs = np.arange(largo)
+    for k0 in range(0, len(a), bloque):
+        ak, bk = a[k0:k0 + bloque], b[k0:k0 + bloque]
+        idx = np.minimum(ak[:, None] + offs, len(t) - 1)
+        peso = (offs < (bk - ak)[:, None]) & v[idx]
+        n = peso.sum(axis=1)
+        tk = np.where(peso, t[idx] - t[ak][:, None], 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            yk = np.where(peso, y[idx], 0.0)
+            yk = np.where(peso, yk - (yk.sum(axis=1) / n)[:, None], 0.0)
+        duracion = tk.max(axis=1)
+
+        # z = 0 en el relleno: la recurrencia lo mantiene en 0
+        z = np.where(peso, np.exp(2j * np.pi * f[0] * tk), 0.0)
+        paso = np.exp(1j * dw * tk)
+        syz = np.empty((len(ak), len(f)), dtype=complex)
+        sz2 = np.empty((len(ak), len(f)), dtype=complex)
+        for j in range(len(f)):
+            syz[:, j] = np.einsum("kl,kl->k", yk, z)
+            sz2[:, j] = np.einsum("kl,kl->k", z, z)
+            z *= paso
+
+        nn = n[:, None]
+        cc = 0.5 * (nn + sz2.real)
+        ss = nn - cc
+        cs = 0.5 * sz2.imag
+        yc, ys = syz.real, syz.imag
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ang = 0.5 * np.arctan2(2.0 * cs, cc - ss)
+            ct, st = np.cos(ang), np.sin(ang)
+            num_c = (yc * ct + ys * st) ** 2
+            den_c = cc * ct * ct + 2.0 * cs * ct * st + ss * st * st
+            num_s = (ys * ct - yc * st) ** 2
+            den_s = ss * ct * ct - 2.0 * cs * ct * st + cc * st * st
+            potencia = 0.5 * (num_c / den_c + num_s / den_s)
+            # a densidad unilateral: con muestreo uniforme sería 2 P / fs, fs = N / duración
+            P[k0:k0 + bloque] = potencia * 2.0 * (duracion / n)[:, None]
+    P[~np.isfinite(P)] = np.nan
+    return P
+
+
+def potencia_banda(P, frecuencias, banda):
+    """Integral (trapecios) de la densidad P en la banda [f_min, f_max] de una grilla uniforme."""
+    f = np.asarray(frecuencias)
+    usar = (f >= banda[0]) & (f <= banda[1])
+    Pb = P[..., usar]
+    if Pb.shape[-1] < 2:
+        return np.zeros(Pb.shape[:-1])
+    df = f[1] - f[0]
+    return df * (Pb.sum(axis=-1) - 0.5 * (Pb[..., 0] + Pb[..., -1]))
+
+
+def frecuencias_hrv(duracion, sobremuestreo=2):
+    """Grilla de frecuencias que cubre LF y HF con resolución 1 / (sobremuestreo * duración)."""
+    df = 1.0 / (sobremuestreo * duracion)
+    return np.arange(BANDA_LF[0], BANDA_HF[1] + df / 2, df)
+
+
+def hrv(ibi_ms, tiempos=None, validos=None):
+    """
+    Métricas HRV de toda la serie: dict con las claves de METRICAS_HRV
+    (escalares). tiempos: instante de cada latido en s (por defecto, la
+    suma acumulada de los IBI). En registros más largos que VENTANA_HRV el
+    espectro es el promedio de los de tramos consecutivos de VENTANA_HRV
+    (como en Welch): un único periodograma de 24 h necesitaría una grilla
+    de frecuencias finísima para integrar bien las bandas.
+    """
+    ibi = np.asarray(ibi_ms, dtype=float)
+    t = np.cumsum(ibi) / 1000.0 if tiempos is None else np.asarray(tiempos, dtype=float)
+    v = filtrar_ectopicos(ibi) if validos is None else np.asarray(validos, dtype=bool)
+    res = hrv_temporal(ibi, v, np.array([0]), np.array([len(ibi)]))
+
+    duracion = max(t[-1] - t[0], 1.0)
+    tramo_s = min(duracion, VENTANA_HRV)
+    inicios = t[0] + tramo_s * np.arange(max(int(duracion // tramo_s), 1))
+    a = np.searchsorted(t, inicios, side="left")
+    b = np.searchsorted(t, inicios + tramo_s, side="left")
+    frecuencias = frecuencias_hrv(tramo_s)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        P = np.nanmean(lomb_scargle_ventanas(t, ibi, v, a, b, frecuencias), axis=0)
+    res.update(_bandas(P, frecuencias))
+    return {k: float(np.asarray(val).ravel()[0]) for k, val in res.items()}
+
+
+def _bandas(P, frecuencias):
+    lf = potencia_banda(P, frecuencias, BANDA_LF)
+    hf = potencia_banda(P, frecuencias, BANDA_HF)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {"lf": lf, "hf": hf, "lf_hf": lf / hf}
+
+
+def hrv_ventanas(ibi_ms, ventana_s, paso_s, tiempos=None, validos=None, min_latidos=10):
+    """
+    Métricas HRV en ventanas deslizantes de `ventana_s` segundos cada
+    `paso_s` segundos sobre los latidos. Los bordes de cada ventana se
+    ubican con searchsorted; las métricas temporales salen de sumas prefijas
+    y las espectrales de un único Lomb-Scargle por bloques.
+    Devuelve (metricas, inicios_s): dict METRICAS_HRV -> (n_ventanas,) y el
+    inicio de cada ventana en segundos. Las ventanas con menos de
+    `min_latidos` latidos normales quedan en NaN.
+    """
+    ibi = np.asarray(ibi_ms, dtype=float)
+    t = np.cumsum(ibi) / 1000.0 if tiempos is None else np.asarray(tiempos, dtype=float)
+    v = filtrar_ectopicos(ibi) if validos is None else np.asarray(validos, dtype=bool)
+    if ventana_s <= 0 or paso_s <= 0:
+        raise ValueError("La ventana y el paso deben ser positivos.")
+    if t[-1] - t[0] < ventana_s:
+        raise ValueError("El registro es más corto que la ventana de HRV.")
+
+    inicios = np.arange(t[0], t[-1] - ventana_s + 1e-9, paso_s)
+    a = np.searchsorted(t, inicios, side="left")
+    b = np.searchsorted(t, inicios + ventana_s, side="left")
+    with tramo("hrv_ventanas", ventanas=len(inicios), latidos=len(ibi)):
+        metricas = hrv_temporal(ibi, v, a, b)
+        frecuencias = frecuencias_hrv(ventana_s)
+        metricas.update(_bandas(lomb_scargle_ventanas(t, ibi, v, a, b, frecuencias), frecuencias))
+    pocos = _sumas_ventana(_acumular(v), a, b) < min_latidos
+    for valores in metricas.values():
+        valores[pocos] = np.nan
+    return metricas, inicios
+
+
+
+def resultado_hrv(ibi_ms, tiempos=None, ventana_s=VENTANA_HRV, paso_s=PASO_HRV, umbral=0.2):
+    """
+    Todo el análisis HRV de una serie de IBI como dict de arrays (listo para
+    la caché en disco, .npz o .mat): ibi_ms, tiempos, validos, las métricas
+    globales como global_<métrica> y, si el registro alcanza para una
+    ventana, las métricas por ventana (<métrica>) con sus inicios (s).
+    """
+    ibi = np.asarray(ibi_ms, dtype=float)
+    t = np.cumsum(ibi) / 1000.0 if tiempos is None else np.asarray(tiempos, dtype=float)
+    v = filtrar_ectopicos(ibi, umbral)
+    res = {"ibi_ms": ibi, "tiempos": t, "validos": v}
+    res.update({f"global_{k}": np.array(val) for k, val in hrv(ibi, t, v).items()})
+    if t[-1] - t[0] >= ventana_s:
+        metricas, inicios = hrv_ventanas(ibi, ventana_s, paso_s, t, v)
+        res.update(metricas)
+        res["inicios"] = inicios
+    return res
+
+
+################################################################################
+# Análisis espectral: PSD de Welch y espectrograma por tramos
+################################################################################
+# Bandas clásicas del EEG (Hz), en orden de frecuencia.
+BANDAS_EEG = (("delta", (0.5, 4.0)), ("theta", (4.0, 8.0)), ("alfa", (8.0, 13.0)), ("beta", (13.0, 30.0)))
+
+# muestras de señal que se leen y transforman de una vez
+_BLOQUE_ESPECTRO = 1 << 20
+
+
+def segmentos_espectro(n_muestras, nperseg, solape):
+    """(paso, n_segmentos) de la STFT: segmentos de nperseg muestras cada nperseg - solape."""
+    if nperseg < 2 or not 0 <= solape < nperseg:
+        raise ValueError("nperseg debe ser >= 2 y el solape estar en [0, nperseg).")
+    if n_muestras < nperseg:
+        raise ValueError("La señal es más corta que un segmento (nperseg).")
+    paso = nperseg - solape
+    return paso, (n_muestras - nperseg) // paso + 1
+
+
+def comprobar_memoria_espectro(nperseg, n_segmentos):
+    """
+    Sxx (float32) ocupa (nperseg // 2 + 1) * n_segmentos * 4 bytes y no se
+    puede desalojar mientras se calcula: con solape cercano a nperseg en una
+    señal larga supera con facilidad la memoria disponible. Se rechaza antes
+    de empezar si no entra en el presupuesto del gestor de memoria.
+    """
+    necesario = (nperseg // 2 + 1) * n_segmentos * 4
+    if necesario > gestor_memoria.presupuesto:
+        raise ValueError(
+            f"El espectrograma ocuparía {necesario / 2**20:.0f} MB, más que el "
+            f"presupuesto de memoria ({gestor_memoria.presupuesto / 2**20:.0f} MB). "
+            "Use un nperseg mayor o un solape menor.")
+
+
+def rangos_segmentos(n_segmentos, nperseg, paso, muestras_bloque=_BLOQUE_ESPECTRO):
+    """Rangos [s0, s1) de segmentos cuyo tramo de señal ronda muestras_bloque muestras."""
+    por_bloque = max(1, (muestras_bloque - nperseg) // paso + 1)
+    return [(s0, min(s0 + por_bloque, n_segmentos)) for s0 in range(0, n_segmentos, por_bloque)]
+
+
+def frecuencias_espectro(fs, nperseg):
+    return np.fft.rfftfreq(nperseg, 1.0 / fs)
+
+
+def espectro_bloque(leer, s0, s1, fs, nperseg, paso):
+    """
+    Densidad espectral (n_frecuencias, s1 - s0) de los segmentos [s0, s1).
+    leer(inicio, fin) devuelve las muestras [inicio, fin) de la señal: solo
+    se lee el tramo que cubren esos segmentos. Igual que scipy.signal con
+    window="hann", detrend="constant" y scaling="density".
+    """
+    x = np.asarray(leer(s0 * paso, (s1 - 1) * paso + nperseg), dtype=float)
+    # Hann periódica, como scipy.signal.get_window
+    ventana = 0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(nperseg) / nperseg)
+    segmentos = sliding_window_view(x, nperseg)[::paso]
+    segmentos = (segmentos - segmentos.mean(axis=1, keepdims=True)) * ventana
+    X = np.fft.rfft(segmentos, axis=1)
+    P = (X.real ** 2 + X.imag ** 2) / (fs * (ventana ** 2).sum())
+    # unilateral: se duplica todo menos la continua y, si nperseg es par, Nyquist
+    if nperseg % 2:
+        P[:, 1:] *= 2.0
+    else:
+        P[:, 1:-1] *= 2.0
+    return P.T
+
+
+def espectrograma(leer, n_muestras, fs, nperseg, solape, muestras_bloque=_BLOQUE_ESPECTRO):
+    """
+    Espectrograma y PSD de Welch de una señal que se lee por tramos con
+    leer(inicio, fin), así la memoria de trabajo queda acotada por
+    muestras_bloque (la salida es float32). Devuelve (f, t, Sxx, psd): t es
+    el centro de cada segmento en s, Sxx (n_frecuencias, n_segmentos) y psd
+    el promedio de los segmentos (Welch).
+    """
+    paso, n_seg = segmentos_espectro(n_muestras, nperseg, solape)
+    comprobar_memoria_espectro(nperseg, n_seg)
+    f = frecuencias_espectro(fs, nperseg)
+    Sxx = np.empty((len(f), n_seg), dtype=np.float32)
+    suma = np.zeros(len(f))
+    for s0, s1 in rangos_segmentos(n_seg, nperseg, paso, muestras_bloque):
+        P = espectro_bloque(leer, s0, s1, fs, nperseg, paso)
+        Sxx[:, s0:s1] = P
+        suma += P.sum(axis=1)
+    t = (np.arange(n_seg) * paso + nperseg / 2) / fs
+    return f, t, Sxx, suma / n_seg
+
+
+def potencia_bandas(f, Sxx, bandas=BANDAS_EEG):
+    """
+    Potencia de cada banda a lo largo del tiempo, (n_bandas, n_segmentos),
+    integrando las filas del espectrograma ya calculado.
+    """
+    filas = np.asarray(Sxx, dtype=float).T
+    return np.array([potencia_banda(filas, f, banda) for _, banda in bandas])
+
+
 def calculate_tau_d_heatmap(time_serie, embeding, delay_max, window, step):
 
     ts = np.array(time_serie)
@@ -0,0 +1,234 @@
+"""
+Exportación de figuras por lotes, fuera de pantalla y en paralelo.
+
+Un trabajo es (archivo, canal, figura): el canal admite los mismos selectores
+que el procesamiento por lotes (nombre, comodín o índice; vacío = todos) y la
+figura es una de FIGURAS. Los trabajos de un mismo (archivo, canal) van en una
+sola tarea del Pool, así la señal se lee una vez y Bandt & Pompe se calcula
+una vez aunque se pidan la entropía y los patrones apilados.
+
+Cada proceso dibuja con matplotlib.figure.Figure sobre un FigureCanvasAgg:
+no se usa pyplot (no hay estado global ni ventanas) y se guarda directo en
+PNG, SVG o PDF. Los mapas de calor y las señales largas se reducen a la
+resolución de salida antes de dibujar. Al final se escribe figuras.csv con el
+estado de cada figura.
+
+Este módulo nunca importa tkinter.
+"""
+import os
+import re
+import csv
+import time
+import hashlib
+from multiprocessing import Pool
+
+import numpy as np
+
+from core.lote import expandir_entradas, leer_senales, analizar
+
+FIGURAS = ("senal", "ibi", "entropia", "heatmap", "apilados")
+FORMATOS = ("png", "svg", "pdf")
+
+# análisis de core.lote que necesita cada figura
+_ANALISIS_FIGURA = {"ibi": "ibi", "entropia": "bp", "apilados": "bp", "heatmap": "tau"}
+
+COLUMNAS_FIGURAS = ["archivo", "canal", "figura", "estado", "ruta", "segundos", "error"]
+
+
+# ---------------------------------------------------------------------------
+# Trabajos
+# ---------------------------------------------------------------------------
+def trabajos_desde_entradas(entradas, canales, figuras):
+    """Un trabajo por archivo, selector de canal y figura."""
+    selectores = list(canales) or [""]
+    return [(path, canal, figura)
+            for path in expandir_entradas(entradas)
+            for canal in selectores
+            for figura in figuras]
+
+
+def leer_trabajos(ruta):
+    """
+    Lee un CSV con columnas archivo, canal, figura (el canal puede quedar
+    vacío). Las rutas relativas se toman desde la carpeta del CSV.
+    """
+    base = os.path.dirname(os.path.abspath(ruta))
+    trabajos = []
+    with open(ruta, newline="", encoding="utf-8") as f:
+        for fila in csv.DictReader(f):
+            figura = fila["figura"].strip()
+            if figura not in FIGURAS:
+                raise ValueError(f"Figura desconocida en {ruta}: {figura}")
+            archivo = os.path.join(base, fila["archivo"].strip())
+            trabajos.append((os.path.abspath(archivo), (fila.get("canal") or "").strip(), figura))
+    return trabajos
+
+
+def _agrupar(trabajos):
+    """{(archivo, canal): [figuras]} respetando el orden de llegada."""
+    grupos = {}
+    for archivo, canal, figura in trabajos:
+        figuras = grupos.setdefault((archivo, canal), [])
+        if figura not in figuras:
+            figuras.append(figura)
+    return list(grupos.items())
+
+
+def ruta_figura(path, canal, figura, config):
+    nombre = os.path.splitext(os.path.basename(path))[0]
+    sufijo = hashlib.sha1(path.encode()).hexdigest()[:8]
+    canal = re.sub(r"[^\w.-]+", "_", canal).strip("_") or "canal"
+    return os.path.join(config["salida"], f"{nombre}_{sufijo}_{canal}_{figura}.{config['formato']}")
+
+
+# ---------------------------------------------------------------------------
+# Dibujo (Agg, sin pyplot)
+# ---------------------------------------------------------------------------
+def _nueva_figura(config):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=config.get("tamano", (10, 4)), dpi=config.get("dpi", 150))
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot(111)
+
+
+def _envolvente(y, columnas):
+    """
+    Mínimo y máximo de cada bloque de muestras, intercalados: con dos puntos
+    por columna de salida la curva se ve igual que con todas las muestras.
+    """
+    n = len(y)
+    bloque = n // columnas
+    if bloque < 2:
+        return np.arange(n), y
+    m = bloque * columnas
+    tramos = y[:m].reshape(columnas, bloque)
+    x = np.repeat(np.arange(columnas) * bloque + bloque // 2, 2)
+    yy = np.column_stack([tramos.min(axis=1), tramos.max(axis=1)]).ravel()
+    return x, yy
+
+
+def _dibujar(figura, ax, canal, signal, fs, resultados, config):
+    from utils.plotting import Lienzo, colores_patrones
+    from core.estadisticas import patrones_apilados
+
+    lienzo = Lienzo(ax, ax.figure.canvas)
+    if figura == "senal":
+        x, y = _envolvente(np.asarray(signal, dtype=float), max(int(ax.bbox.width), 100))
+        x = x / fs if fs else x
+        lienzo.linea("senal", x, y, linewidth=0.6)
+        lienzo.textos(f"Canal: {canal}", "Tiempo [s]" if fs else "Muestra", "Amplitud")
+        ax.grid(True)
+    elif figura == "ibi":
+        ibi_ms = resultados["ibi"]["ibi_ms"]
+        lienzo.linea("ibi", np.arange(len(ibi_ms)), ibi_ms, marker='o', markersize=3, linewidth=1)
+        lienzo.textos(f"IBI — {canal}", "Índice de latido", "IBI [ms]")
+        ax.grid(True)
+    elif figura == "entropia":
+        Hnorm = resultados["bp"]["Hnorm"]
+        lienzo.linea("Hnorm", np.arange(len(Hnorm)), Hnorm, linewidth=1)
+        lienzo.textos(f"Entropía Bandt & Pompe (normalizada) — {canal}", "Ventana", "H_norm")
+        ax.grid(True)
+    elif figura == "heatmap":
+        lienzo.usar("imagen")
+        lienzo.imagen_piramide(resultados["tau"]["mapa"], config.get("agregacion", "max"), cmap='jet')
+        lienzo.textos(f"Tau(d) — {canal}", "Índice de ventana", "Tau")
+    elif figura == "apilados":
+        freqs = resultados["bp"]["freqs"]
+        cum, patrones, etiquetas = patrones_apilados(freqs, config["dim"], config.get("umbral", 0.01))
+        lienzo.apilado(cum, etiquetas, colores_patrones(patrones, freqs.shape[1]))
+        ax.set_ylim(-0.02, 1.02)
+        lienzo.textos(f"Frecuencia de Patrones Apilados — {canal}", "Ventana", "Frecuencia relativa (pₖ)")
+    else:
+        raise ValueError(f"Figura desconocida: {figura}")
+    if lienzo.tipo != "imagen":
+        ax.relim()
+        ax.autoscale_view()
+
+
+def _fila(archivo, canal, figura, ruta, segundos, error=""):
+    return {"archivo": archivo, "canal": canal, "figura": figura,
+            "estado": "error" if error else "ok", "ruta": "" if error else ruta,
+            "segundos": round(segundos, 3), "error": error}
+
+
+def _exportar_canal(path, canal, signal, fs, figuras, config):
+    filas = []
+    resultados = {}
+    for figura in figuras:
+        t0 = time.perf_counter()
+        destino = ruta_figura(path, canal, figura, config)
+        try:
+            analisis = _ANALISIS_FIGURA.get(figura)
+            if analisis is not None and analisis not in resultados:
+                resultados[analisis], _ = analizar(analisis, signal, fs, config)
+            fig, ax = _nueva_figura(config)
+            _dibujar(figura, ax, canal, signal, fs, resultados, config)
+            fig.tight_layout()
+            fig.savefig(destino, format=config["formato"])
+            filas.append(_fila(path, canal, figura, destino, time.perf_counter() - t0))
+        except Exception as e:
+            filas.append(_fila(path, canal, figura, destino, time.perf_counter() - t0, str(e)))
+    return filas
+
+
+def exportar_grupo(path, selector, figuras, config):
+    """
+    Dibuja y guarda las figuras pedidas para los canales del archivo que
+    coinciden con el selector (de a un canal por vez). Un error en una
+    figura queda anotado en su fila sin cortar las demás. Devuelve la lista
+    de filas.
+    """
+    filas = []
+    try:
+        for canal, signal, fs in leer_senales(path, [selector] if selector else [], config.get("fs")):
+            filas.extend(_exportar_canal(path, canal, signal, fs, figuras, config))
+        if not filas:
+            raise ValueError(f"Ningún canal coincide con '{selector}'.")
+    except Exception as e:
+        filas.extend(_fila(path, selector, f, "", 0.0, str(e)) for f in figuras)
+    return filas
+
+
+def _tarea(args):
+    (path, selector), figuras, config = args
+    return exportar_grupo(path, selector, figuras, config)
+
+
+# ---------------------------------------------------------------------------
+# Lote completo
+# ---------------------------------------------------------------------------
+def exportar_figuras(trabajos, config, log=print, progreso=None):
+    """
+    trabajos: lista de (archivo, canal, figura). config: dict con salida,
+    formato, dpi y los parámetros de los análisis (dim, tau, ventana, paso,
+    tau_max, fs) más procesos. progreso(hechos, total) se llama al terminar
+    cada tarea. Devuelve la ruta de figuras.csv.
+    """
+    if config["formato"] not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {config['formato']}")
+    os.makedirs(config["salida"], exist_ok=True)
+    grupos = _agrupar(trabajos)
+    log(f"{len(trabajos)} figuras pedidas en {len(grupos)} tareas.")
+
+    filas = []
+    procesos = config.get("procesos") or os.cpu_count() or 1
+    procesos = max(1, min(procesos, len(grupos) or 1))
+    if grupos:
+        with Pool(processes=procesos) as pool:
+            tareas = [(clave, figuras, config) for clave, figuras in grupos]
+            for i, filas_grupo in enumerate(pool.imap_unordered(_tarea, tareas), start=1):
+                filas.extend(filas_grupo)
+                errores = sum(f["estado"] == "error" for f in filas_grupo)
+                log(f"[{i}/{len(grupos)}] {os.path.basename(filas_grupo[0]['archivo'])}: "
+                    f"{len(filas_grupo)} figuras, {errores} errores")
+                if progreso is not None:
+                    progreso(i, len(grupos))
+
+    resumen = os.path.join(config["salida"], "figuras.csv")
+    with open(resumen, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=COLUMNAS_FIGURAS)
+        w.writeheader()
+        w.writerows(sorted(filas, key=lambda r: (r["archivo"], r["canal"], r["figura"])))
+    log(f"Resumen de figuras en {resumen}")
+    return resumen
@@ -0,0 +1,253 @@
+"""
+Procesamiento por lotes, sin interfaz gráfica, de carpetas de registros.
+
+Cada archivo (.edf o .mat) es una tarea del Pool: se leen los canales
+seleccionados, se corren los análisis pedidos de core.estadisticas y se
+escribe un <nombre>.npz comprimido con todos los resultados del archivo más
+sus filas de resumen. Como el .npz se escribe de forma atómica al terminar el
+archivo, una corrida interrumpida se retoma saltando los archivos cuyo .npz
+ya existe con los mismos parámetros. Al final se arma resumen.csv a partir de
+todos los .npz.
+
+Este módulo nunca importa tkinter ni crea figuras.
+"""
+import os
+import csv
+import zlib
+import glob
+import json
+import time
+import fnmatch
+import hashlib
+import zipfile
+from multiprocessing import Pool
+
+import numpy as np
+
+from core.estadisticas import band_and_pompe, calculate_tau_d_heatmap, ibi_from_signal
+from core.estadisticas import resultado_hrv
+
+ANALISIS = ("bp", "ibi", "tau", "hrv")
+EXTENSIONES = (".edf", ".mat")
+
+COLUMNAS_RESUMEN = ["archivo", "canal", "analisis", "estado", "n", "media", "desvio",
+                    "minimo", "maximo", "segundos", "error"]
+
+
+# ---------------------------------------------------------------------------
+# Entradas
+# ---------------------------------------------------------------------------
+def expandir_entradas(patrones):
+    """
+    Lista ordenada de archivos .edf/.mat que coinciden con los patrones glob
+    (se admite ** recursivo). Un directorio se toma como todo su contenido.
+    """
+    archivos = set()
+    for patron in patrones:
+        if os.path.isdir(patron):
+            patron = os.path.join(patron, "**", "*")
+        for ruta in glob.glob(patron, recursive=True):
+            if os.path.isfile(ruta) and ruta.lower().endswith(EXTENSIONES):
+                archivos.add(os.path.abspath(ruta))
+    return sorted(archivos)
+
+
+def seleccionar_canales(nombres, selectores):
+    """
+    Filtra `nombres` según los selectores: nombres exactos, patrones con
+    comodines (EEG*) o índices. Sin selectores se devuelven todos.
+    """
+    if not selectores:
+        return list(nombres)
+    elegidos = []
+    for i, nombre in enumerate(nombres):
+        for sel in selectores:
+            if sel == str(i) or fnmatch.fnmatchcase(nombre, sel):
+                elegidos.append(nombre)
+                break
+    return elegidos
+
+
+def leer_senales(path, selectores, fs_mat=None):
+    """
+    Genera (canal, señal, fs) para los canales seleccionados del archivo.
+    En los EDF cada canal se decodifica por separado; en los .mat los
+    "canales" son las variables numéricas 1D (o 2D con una dimensión 1).
+    """
+    if path.lower().endswith(".edf"):
+        from core.reader import abrir_edf
+        raw = abrir_edf(path)
+        fs = float(raw.info["sfreq"])
+        for canal in seleccionar_canales(raw.ch_names, selectores):
+            idx = raw.ch_names.index(canal)
+            yield canal, raw.get_data(picks=[idx])[0], fs
+    else:
+        from core.reader import leer_mat
+        data = {k: v for k, v in leer_mat(path).items() if not k.startswith("__")}
+        vectores = [k for k, v in data.items()
+                    if isinstance(v, np.ndarray) and v.dtype.kind in "iuf"
+                    and v.size > 1 and (v.ndim == 1 or (v.ndim == 2 and min(v.shape) == 1))]
+        for canal in seleccionar_canales(vectores, selectores):
+            yield canal, np.ravel(data[canal]).astype(float), fs_mat
+
+
+# ---------------------------------------------------------------------------
+# Procesamiento de un archivo
+# ---------------------------------------------------------------------------
+def huella_parametros(config):
+    """Hash de los parámetros que afectan los resultados (para retomar)."""
+    claves = ("analisis", "canales", "dim", "tau", "ventana", "paso", "tau_max", "fs")
+    texto = json.dumps({k: config.get(k) for k in claves}, sort_keys=True)
+    return hashlib.sha256(texto.encode()).hexdigest()[:16]
+
+
+def _fila(archivo, canal, analisis, valores, segundos, error=""):
+    v = np.asarray(valores, dtype=float) if valores is not None else np.array([])
+    v = v[np.isfinite(v)]
+    return {
+        "archivo": archivo, "canal": canal, "analisis": analisis,
+        "estado": "error" if error else "ok", "n": int(v.size),
+        "media": float(v.mean()) if v.size else "",
+        "desvio": float(v.std()) if v.size else "",
+        "minimo": float(v.min()) if v.size else "",
+        "maximo": float(v.max()) if v.size else "",
+        "segundos": round(segundos, 3), "error": error,
+    }
+
+
+def analizar(analisis, signal, fs, config):
+    """Corre un análisis y devuelve (dict de arrays, valores para el resumen)."""
+    if analisis == "bp":
+        freqs, Hnorm, times = band_and_pompe(signal, config["dim"], config["tau"],
+                                             config["ventana"], config["paso"],
+                                             graf=False, beat_times=None)
+        return {"Hnorm": Hnorm, "freqs": freqs, "times": times}, Hnorm
+    if analisis == "tau":
+        mapa = calculate_tau_d_heatmap(signal, config["dim"], config["tau_max"],
+                                       config["ventana"], config["paso"])
+        return {"mapa": mapa}, mapa.ravel()
+    if analisis == "ibi":
+        if not fs:
+            raise ValueError("Falta la frecuencia de muestreo (--fs) para calcular IBI.")
+        ibi_ms, picos = ibi_from_signal(signal, fs)
+        return {"ibi_ms": ibi_ms, "picos": picos}, ibi_ms
+    if analisis == "hrv":
+        if not fs:
+            raise ValueError("Falta la frecuencia de muestreo (--fs) para calcular HRV.")
+        ibi_ms, picos = ibi_from_signal(signal, fs)
+        res = resultado_hrv(ibi_ms, picos[1:] / fs)
+        # en el resumen: SDNN por ventana (o el global si el registro es más corto que una ventana)
+        return res, res.get("sdnn", res["global_sdnn"])
+    raise ValueError(f"Análisis desconocido: {analisis}")
+
+
+def ruta_salida(path, config):
+    nombre = os.path.splitext(os.path.basename(path))[0]
+    # hash corto de la ruta: dos sujetos con el mismo nombre de archivo no se pisan
+    sufijo = hashlib.sha1(path.encode()).hexdigest()[:8]
+    return os.path.join(config["salida"], f"{nombre}_{sufijo}.npz")
+
+
+def procesar_archivo(path, config):
+    """
+    Procesa un archivo completo y escribe su .npz. Un error en un canal o
+    análisis queda anotado en el resumen sin cortar el resto del archivo.
+    Devuelve la lista de filas de resumen.
+    """
+    arrays = {}
+    filas = []
+    try:
+        for canal, signal, fs in leer_senales(path, config["canales"], config.get("fs")):
+            for analisis in config["analisis"]:
+                t0 = time.perf_counter()
+                try:
+                    res, valores = analizar(analisis, signal, fs, config)
+                    for nombre, arr in res.items():
+                        arrays[f"{canal}/{analisis}/{nombre}"] = arr
+                    filas.append(_fila(path, canal, analisis, valores, time.perf_counter() - t0))
+                except Exception as e:
+                    filas.append(_fila(path, canal, analisis, None, time.perf_counter() - t0, str(e)))
+    except Exception as e:
+        filas.append(_fila(path, "", "lectura", None, 0.0, str(e)))
+
+    destino = ruta_salida(path, config)
+    tmp = destino + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(
+            f,
+            __parametros__=np.array(huella_parametros(config)),
+            __resumen__=np.array(json.dumps(filas)),
+            **arrays
+        )
+    os.replace(tmp, destino)
+    return filas
+
+
+def _tarea(args):
+    path, config = args
+    t0 = time.perf_counter()
+    return path, procesar_archivo(path, config), time.perf_counter() - t0
+
+
+def _leer_resumen(destino, huella):
+    """
+    Filas de resumen de un .npz ya escrito, o None si no sirve para retomar:
+    parámetros distintos, archivo dañado o un error al leer el registro (el
+    archivo queda pendiente y se vuelve a intentar).
+    """
+    try:
+        with np.load(destino, allow_pickle=False) as z:
+            if str(z["__parametros__"]) != huella:
+                return None
+            filas = json.loads(str(z["__resumen__"]))
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile, zlib.error):
+        return None
+    if any(f["analisis"] == "lectura" for f in filas):
+        return None
+    return filas
+
+
+# ---------------------------------------------------------------------------
+# Lote completo
+# ---------------------------------------------------------------------------
+def ejecutar_lote(config, log=print):
+    """
+    config: dict con entradas, salida, canales, analisis, dim, tau, ventana,
+    paso, tau_max, fs y procesos. Devuelve la ruta del resumen.csv.
+    """
+    os.makedirs(config["salida"], exist_ok=True)
+    archivos = expandir_entradas(config["entradas"])
+    huella = huella_parametros(config)
+
+    filas = {}
+    pendientes = []
+    for path in archivos:
+        previas = _leer_resumen(ruta_salida(path, config), huella)
+        if previas is None:
+            pendientes.append(path)
+        else:
+            filas[path] = previas
+
+    log(f"{len(archivos)} archivos, {len(archivos) - len(pendientes)} ya procesados, "
+        f"{len(pendientes)} pendientes.")
+
+    procesos = config.get("procesos") or os.cpu_count() or 1
+    procesos = max(1, min(procesos, len(pendientes) or 1))
+    if pendientes:
+        with Pool(processes=procesos) as pool:
+            tareas = [(path, config) for path in pendientes]
+            for i, (path, filas_archivo, segundos) in enumerate(
+                    pool.imap_unordered(_tarea, tareas), start=1):
+                filas[path] = filas_archivo
+                errores = sum(f["estado"] == "error" for f in filas_archivo)
+                log(f"[{i}/{len(pendientes)}] {os.path.basename(path)}: "
+                    f"{len(filas_archivo)} resultados, {errores} errores ({segundos:.1f} s)")
+
+    resumen = os.path.join(config["salida"], "resumen.csv")
+    with open(resumen, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=COLUMNAS_RESUMEN)
+        w.writeheader()
+        for path in archivos:
+            w.writerows(filas.get(path, []))
+    log(f"Resumen en {resumen}")
+    return resumen
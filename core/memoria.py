@@ -0,0 +1,129 @@
+"""
+Presupuesto global de memoria para los datos que se pueden volver a obtener.
+
+Los almacenes de datos re-derivables (canales EDF decodificados y variables
+de un .mat, que se vuelven a leer del archivo; la caché de códigos de
+patrones, las pirámides de dibujo y los Derivados de un resultado, que se
+vuelven a calcular) se registran en el gestor. Cuando la suma de lo que
+ocupan supera el presupuesto, el gestor desaloja entradas de la menos a la
+más recientemente usada, mirando todos los almacenes a la vez.
+
+Un almacén es cualquier objeto con:
+    bytes_usados()          -> bytes que ocupa
+    desalojables()          -> iterable de (ultimo_uso, clave, bytes)
+    desalojar(clave)        -> bytes liberados
+donde ultimo_uso sale de tic(), un reloj común a todos los almacenes.
+
+El presupuesto se toma de EDF_VIEWER_MEMORIA_MB (por defecto 2048) y se puede
+cambiar en caliente con fijar_presupuesto(). Cada proceso tiene su gestor.
+"""
+import os
+import itertools
+import weakref
+
+_ENV_PRESUPUESTO = "EDF_VIEWER_MEMORIA_MB"
+PRESUPUESTO = int(float(os.environ.get(_ENV_PRESUPUESTO, 2048)) * 1024 * 1024)
+
+_reloj = itertools.count()
+
+
+def tic():
+    """Marca de tiempo lógica para ordenar los usos entre almacenes."""
+    return next(_reloj)
+
+
+class GestorMemoria:
+
+    def __init__(self, presupuesto=PRESUPUESTO):
+        self.presupuesto = presupuesto
+        # WeakSet: un almacén que nadie más referencia deja de contarse solo
+        self._almacenes = weakref.WeakSet()
+
+    def registrar(self, almacen):
+        self._almacenes.add(almacen)
+
+    def quitar(self, almacen):
+        self._almacenes.discard(almacen)
+
+    def uso(self):
+        return sum(a.bytes_usados() for a in list(self._almacenes))
+
+    def fijar_presupuesto(self, presupuesto):
+        """Cambia el presupuesto (en bytes); los workers que se creen después lo heredan."""
+        self.presupuesto = int(presupuesto)
+        os.environ[_ENV_PRESUPUESTO] = str(self.presupuesto / (1024 * 1024))
+        return self.equilibrar()
+
+    def equilibrar(self, proteger=None):
+        """
+        Desaloja entradas hasta quedar dentro del presupuesto. proteger es un
+        par (almacén, clave) que no se toca, típicamente la entrada que se
+        acaba de pedir. Devuelve los bytes liberados.
+        """
+        exceso = self.uso() - self.presupuesto
+        if exceso <= 0:
+            return 0
+
+        candidatos = []
+        for almacen in list(self._almacenes):
+            for ultimo_uso, clave, _ in almacen.desalojables():
+                if proteger is not None and proteger[0] is almacen and proteger[1] == clave:
+                    continue
+                candidatos.append((ultimo_uso, almacen, clave))
+        candidatos.sort(key=lambda c: c[0])
+
+        liberados = 0
+        for _, almacen, clave in candidatos:
+            if liberados >= exceso:
+                break
+            liberados += almacen.desalojar(clave)
+        return liberados
+
+
+gestor_memoria = GestorMemoria()
+
+
+class Derivados:
+    """
+    Arrays derivados de un resultado (p.ej. el espectrograma en dB) que se
+    guardan para no recalcularlos en cada redibujo. Son un almacén más del
+    gestor: si desaloja una entrada, obtener() la vuelve a calcular.
+    """
+
+    def __init__(self):
+        self._valores = {}   # clave -> (parametros, array)
+        self._usos = {}      # clave -> tic() del último acceso
+        gestor_memoria.registrar(self)
+
+    def obtener(self, clave, calcular, parametros=None):
+        """
+        Devuelve el array guardado bajo `clave` si se calculó con los mismos
+        `parametros`; si no, lo calcula con calcular() y reemplaza el anterior.
+        """
+        guardado = self._valores.get(clave)
+        self._usos[clave] = tic()
+        if guardado is not None and guardado[0] == parametros:
+            return guardado[1]
+        self._valores.pop(clave, None)
+        valor = calcular()
+        self._valores[clave] = (parametros, valor)
+        gestor_memoria.equilibrar(proteger=(self, clave))
+        return valor
+
+    def bytes_usados(self):
+        return sum(v.nbytes for _, v in self._valores.values())
+
+    def desalojables(self):
+        return [(self._usos[k], k, v.nbytes) for k, (_, v) in self._valores.items()]
+
+    def desalojar(self, clave):
+        guardado = self._valores.pop(clave, None)
+        self._usos.pop(clave, None)
+        return 0 if guardado is None else guardado[1].nbytes
+
+    def vaciar(self):
+        """Suelta todo (el resultado del que derivan cambió); devuelve los bytes liberados."""
+        liberados = self.bytes_usados()
+        self._valores.clear()
+        self._usos.clear()
+        return liberados
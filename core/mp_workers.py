@@ -1,52 +1,877 @@
-from multiprocessing import Process, Queue
+from multiprocessing import Process, Queue, Pool
+import os
+import math
+import time
 import numpy as np
 from core.estadisticas import band_and_pompe
 from core.estadisticas import calculate_tau_d_heatmap
-from core.estadisticas import patrones_apilados
+from core.estadisticas import complejidad_js
+from core.estadisticas import patrones_faltantes
+from core.estadisticas import transiciones_ordinales
+from core.estadisticas import generar_sustituto, entropia_sustituto
+from core.estadisticas import codificar_patrones, entropia_codigos_por_ventana, sincronia_pares
+from core.estadisticas import sampen_apen_ventanas
+from core.estadisticas import ibi_from_signal, dfa, dfa_ventanas, escalas_dfa, exponentes_dfa
+from core.estadisticas import RANGO_ALFA1, RANGO_ALFA2
+from core.estadisticas import resultado_hrv
+from core.estadisticas import (segmentos_espectro, comprobar_memoria_espectro, rangos_segmentos,
+                               frecuencias_espectro, espectro_bloque)
+from core.estadisticas import entropia_escala
+from core.reader import leer_canal_edf, leer_tramo_edf, abrir_edf
+from core.cache_disco import cache_disco
+from core.cache_patrones import cache_patrones, identidad_senal
+from core import perfilado
+from core.perfilado import tramo
 
 
-def worker_patrones_apilados(signal, dim, tau, win, step, queue):
+def _sembrar_codigos(signal, codigos):
+    """Carga en la caché de patrones de este proceso las entradas que mandó la GUI."""
+    ident = identidad_senal(signal)
+    cache_patrones.importar(ident, codigos)
+    return ident, {(D, tau) for D, tau, _ in codigos or ()}
+
+
+def _devolver_codigos(queue, ident, sembrados):
+    """Manda a la GUI los códigos que se calcularon en este worker."""
+    nuevas = cache_patrones.exportar(ident, excluir=sembrados)
+    if nuevas:
+        queue.put(("codigos", (ident, nuevas)))
+
+
+def _devolver_tiempos(queue):
+    """Manda a la GUI los tramos medidos en este worker (si la instrumentación está activa)."""
+    if perfilado.esta_activo():
+        queue.put(("tiempos", perfilado.extraer()))
+
+
+def worker_patrones_apilados(signal, dim, tau, win, step, queue, clave_cache=None, codigos=None):
     
     try:
-        # debe primero calcular entropia bandt and pompe
-        freqs, Hnorm, times = band_and_pompe(
-            signal, dim, tau, win, step,
-            graf=False, beat_times=None
-        )
+        with tramo("worker.patrones_apilados", memoria=True, D=dim, n=len(signal)):
+            ident, sembrados = _sembrar_codigos(signal, codigos)
 
-        n_windows, n_patterns, cum, indices, mid, colors, handles = patrones_apilados(
-            freqs,
-            dim
-        )
+            # debe primero calcular entropia bandt and pompe
+            freqs, Hnorm, times = band_and_pompe(
+                signal, dim, tau, win, step,
+                graf=False, beat_times=None
+            )
+            # comparte la entrada de caché con la pestaña Bandt & Pompe
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, freqs=freqs, Hnorm=Hnorm, times=times)
+            _devolver_codigos(queue, ident, sembrados)
 
-        queue.put(("ok", (n_windows, n_patterns, cum, indices, mid, colors, handles)))
+        _devolver_tiempos(queue)
+        # la GUI arma las bandas (y el umbral de "otros") al dibujar
+        queue.put(("ok", (freqs, dim)))
 
     except Exception as e:
         
         queue.put(("error", str(e)))
 
 
-def worker_bandt_pompe(signal, dim, tau, win, step, queue):
+################################################################################
+# Bandt & Pompe de una sola señal larga, repartido en bloques de ventanas.
+################################################################################
+# Por debajo de esta cantidad de ventanas por bloque no compensa levantar el Pool.
+MIN_VENTANAS_POR_BLOQUE = 2000
+
+
+def _band_and_pompe_bloque(args):
+    segmento, offset, dim, tau, win, step, estimador = args
+    freqs, Hnorm, times = band_and_pompe(
+        segmento, dim, tau, win, step,
+        graf=False, beat_times=None, estimador=estimador
+    )
+    # los códigos del segmento ya quedaron en la caché de este proceso
+    codigos = cache_patrones.obtener(identidad_senal(segmento), dim, tau)
+    return freqs, Hnorm, times + offset, codigos, perfilado.extraer()
+
+
+def band_and_pompe_paralelo(signal, dim, tau, win, step, n_procesos=None, estimador="clasica"):
+    """
+    Igual que band_and_pompe(..., beat_times=None) pero reparte el rango de
+    índices de ventana en bloques contiguos que se calculan en procesos
+    distintos. Cada bloque recibe solo las muestras que necesitan sus
+    ventanas: desde el inicio de su primera ventana hasta el final de la
+    última, lo que incluye el halo de (D-1)*tau muestras de los últimos
+    patrones. Los pedazos de freqs/H_norm/times se vuelven a unir en orden,
+    por lo que con el estimador "clasica" el resultado es idéntico al del
+    cálculo serie. Con los ponderados ("ponderada", "amplitud") cada bloque
+    suma los pesos de sus ventanas en otro orden: coincide con el serie
+    salvo redondeo (np.allclose, diferencias del orden de 1e-15).
+
+    Los códigos de patrones de cada bloque también se unen y quedan en la
+    caché de patrones, igual que si la señal se hubiera codificado entera.
+    """
+    if n_procesos is None:
+        n_procesos = os.cpu_count() or 1
+
+    n_ventanas = len(range(0, len(signal) - win + 1, step))
+    n_bloques = min(n_procesos, n_ventanas // MIN_VENTANAS_POR_BLOQUE)
+
+    # con los códigos ya en caché solo queda contar, que es barato
+    ident = identidad_senal(signal)
+    if n_bloques <= 1 or cache_patrones.obtener(ident, dim, tau) is not None:
+        return band_and_pompe(signal, dim, tau, win, step, graf=False, beat_times=None,
+                              estimador=estimador)
+
+    # bordes[b]..bordes[b+1] = rango de índices de ventana del bloque b
+    bordes = np.linspace(0, n_ventanas, n_bloques + 1).astype(int)
+    inicios = bordes[:-1] * step
+    tareas = []
+    for b, (w0, w1) in enumerate(zip(bordes[:-1], bordes[1:])):
+        # el último bloque se lleva la cola de la señal para completar los códigos
+        fin = len(signal) if b == n_bloques - 1 else (w1 - 1) * step + win
+        tareas.append((signal[inicios[b]:fin], inicios[b], dim, tau, win, step, estimador))
+
+    with Pool(processes=n_bloques) as pool:
+        partes = pool.map(_band_and_pompe_bloque, tareas)
+    for p in partes:
+        perfilado.importar(p[4])
+
+    freqs = np.concatenate([p[0] for p in partes])
+    Hnorm = np.concatenate([p[1] for p in partes])
+    times = np.concatenate([p[2] for p in partes])
+
+    # El bloque b aporta los códigos de las posiciones [inicio_b, inicio_b+1).
+    # Si step supera los patrones por ventana quedan huecos sin codificar.
+    largo = win - (dim - 1) * tau
+    if largo >= step and all(p[3] is not None for p in partes):
+        tramos = [p[3][:sig - ini] for p, ini, sig in zip(partes, inicios, inicios[1:])]
+        tramos.append(partes[-1][3])
+        cache_patrones.guardar(ident, dim, tau, np.concatenate(tramos))
+
+    return freqs, Hnorm, times
+
+
+def worker_bandt_pompe(signal, dim, tau, win, step, queue, clave_cache=None, codigos=None,
+                       estimador="clasica"):
     try:
+        with tramo("worker.bandt_pompe", memoria=True, D=dim, n=len(signal), estimador=estimador):
+            ident, sembrados = _sembrar_codigos(signal, codigos)
 
-        freqs, Hnorm, times = band_and_pompe(
-            signal, dim, tau, win, step,
-            graf=False, beat_times=None
-        )
+            freqs, Hnorm, times = band_and_pompe_paralelo(signal, dim, tau, win, step,
+                                                          estimador=estimador)
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, freqs=freqs, Hnorm=Hnorm, times=times)
+            _devolver_codigos(queue, ident, sembrados)
+        _devolver_tiempos(queue)
         queue.put(("ok", (freqs, Hnorm, times)))
     except Exception as e:
         queue.put(("error", str(e)))
 
 
-def worker_tau_d_heatmap(signal, embeding, delay_max, window, step, queue):
+def worker_tau_d_heatmap(signal, embeding, delay_max, window, step, queue, clave_cache=None, codigos=None):
     try:
-        result = calculate_tau_d_heatmap(
-            time_serie=signal,
-            embeding=embeding,
-            delay_max=delay_max,
-            window=window,
-            step=step
-        )
+        with tramo("worker.tau_d_heatmap", memoria=True, D=embeding, n=len(signal)):
+            ident, sembrados = _sembrar_codigos(signal, codigos)
+            result = calculate_tau_d_heatmap(
+                time_serie=signal,
+                embeding=embeding,
+                delay_max=delay_max,
+                window=window,
+                step=step
+            )
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, mapa=result)
+            _devolver_codigos(queue, ident, sembrados)
+        _devolver_tiempos(queue)
         queue.put(("ok", result))
     except Exception as e:
         queue.put(("error", str(e)))
+
+
+
+################################################################################
+# Modo "todos los canales": un canal por tarea sobre un Pool de procesos.
+# Cada tarea lee su canal del EDF de forma perezosa, así el proceso padre
+# nunca tiene que mandar por pickle la matriz completa de señales.
+################################################################################
+def _bandt_pompe_canal(args):
+    path, idx, dim, tau, win, step, clave_cache, estimador = args
+    if clave_cache is not None:
+        cacheado = cache_disco.obtener(clave_cache)
+        if cacheado is not None:
+            return idx, cacheado["Hnorm"]
+
+    signal = leer_canal_edf(path, idx)
+    freqs, Hnorm, times = band_and_pompe(
+        signal, dim, tau, win, step,
+        graf=False, beat_times=None, estimador=estimador
+    )
+    if clave_cache is not None:
+        with tramo("cache_disco.guardar"):
+            cache_disco.guardar(clave_cache, freqs=freqs, Hnorm=Hnorm, times=times)
+    return idx, Hnorm
+
+
+def _tau_d_heatmap_canal(args):
+    path, idx, embeding, delay_max, window, step, clave_cache = args
+    if clave_cache is not None:
+        cacheado = cache_disco.obtener(clave_cache)
+        if cacheado is not None:
+            return idx, cacheado["mapa"]
+
+    signal = leer_canal_edf(path, idx)
+    mapa = calculate_tau_d_heatmap(
+        time_serie=signal,
+        embeding=embeding,
+        delay_max=delay_max,
+        window=window,
+        step=step
+    )
+    if clave_cache is not None:
+        with tramo("cache_disco.guardar"):
+            cache_disco.guardar(clave_cache, mapa=mapa)
+    return idx, mapa
+
+
+def _apilar_por_canal(resultados, canales):
+    """Apila los resultados en el orden de `canales`, rellenando con NaN si
+    algún canal produjo menos ventanas que el resto."""
+    n_max = max(r.shape[-1] for r in resultados.values())
+    filas = []
+    for idx in canales:
+        r = resultados[idx]
+        if r.shape[-1] < n_max:
+            pad = [(0, 0)] * (r.ndim - 1) + [(0, n_max - r.shape[-1])]
+            r = np.pad(r.astype(float), pad, constant_values=np.nan)
+        filas.append(r)
+    return np.stack(filas)
+
+
+def _tarea_medida(args):
+    """Corre una tarea de canal y devuelve además los tramos que midió."""
+    funcion, tarea = args
+    return funcion(tarea), perfilado.extraer()
+
+
+def _mapear_canales(funcion, tareas, queue, n_procesos=None):
+    if n_procesos is None:
+        n_procesos = os.cpu_count() or 1
+    n_procesos = max(1, min(n_procesos, len(tareas)))
+
+    resultados = {}
+    with Pool(processes=n_procesos) as pool:
+        medidas = [(funcion, t) for t in tareas]
+        for (idx, res), tiempos in pool.imap_unordered(_tarea_medida, medidas):
+            perfilado.importar(tiempos)
+            resultados[idx] = res
+            queue.put(("progreso", (len(resultados), len(tareas))))
+    return resultados
+
+
+def worker_bandt_pompe_canales(path, canales, dim, tau, win, step, queue, n_procesos=None, claves_cache=None,
+                               estimador="clasica"):
+    """
+    Devuelve una matriz (n_canales, n_ventanas) con H_norm de cada canal.
+    claves_cache: lista opcional (una por canal) de claves de la caché en disco.
+    """
+    try:
+        if claves_cache is None:
+            claves_cache = [None] * len(canales)
+        tareas = [(path, idx, dim, tau, win, step, clave, estimador)
+                  for idx, clave in zip(canales, claves_cache)]
+        with tramo("worker.bandt_pompe_canales", canales=len(canales), estimador=estimador):
+            resultados = _mapear_canales(_bandt_pompe_canal, tareas, queue, n_procesos)
+            matriz = _apilar_por_canal(resultados, canales)
+        _devolver_tiempos(queue)
+        queue.put(("ok", matriz))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+def worker_tau_d_heatmap_canales(path, canales, embeding, delay_max, window, step, queue, n_procesos=None, claves_cache=None):
+    """Devuelve un cubo (n_canales, delay_max, n_ventanas) de mapas tau(d)."""
+    try:
+        if claves_cache is None:
+            claves_cache = [None] * len(canales)
+        tareas = [(path, idx, embeding, delay_max, window, step, clave)
+                  for idx, clave in zip(canales, claves_cache)]
+        with tramo("worker.tau_d_heatmap_canales", canales=len(canales)):
+            resultados = _mapear_canales(_tau_d_heatmap_canal, tareas, queue, n_procesos)
+            matriz = _apilar_por_canal(resultados, canales)
+        _devolver_tiempos(queue)
+        queue.put(("ok", matriz))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+def worker_exportar_figuras(trabajos, config, queue):
+    """Exporta figuras por lotes (ver core.exportar_figuras) informando el avance a la GUI."""
+    try:
+        from core.exportar_figuras import exportar_figuras
+        resumen = exportar_figuras(
+            trabajos, config, log=lambda texto: None,
+            progreso=lambda hechos, total: queue.put(("progreso", (hechos, total)))
+        )
+        queue.put(("ok", resumen))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+def worker_complejidad(signal, dim, tau, win, step, queue, clave_cache=None, codigos=None):
+    """Entropía normalizada y complejidad de Jensen-Shannon de cada ventana (plano H-C)."""
+    try:
+        with tramo("worker.complejidad", memoria=True, D=dim, n=len(signal)):
+            ident, sembrados = _sembrar_codigos(signal, codigos)
+
+            freqs, Hnorm, times = band_and_pompe_paralelo(signal, dim, tau, win, step)
+            with tramo("complejidad_js", D=dim, ventanas=len(Hnorm)):
+                C = complejidad_js(freqs, Hnorm)
+            if clave_cache is not None:
+                # misma entrada que Bandt & Pompe: C sale de freqs en un paso
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, freqs=freqs, Hnorm=Hnorm, times=times)
+            _devolver_codigos(queue, ident, sembrados)
+        _devolver_tiempos(queue)
+        queue.put(("ok", (Hnorm, C, dim)))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+
+def worker_patrones_faltantes(signal, dim, tau, win, step, queue, clave_cache=None, codigos=None):
+    """Patrones faltantes por ventana y prohibidos en toda la señal, sin armar freqs."""
+    try:
+        with tramo("worker.patrones_faltantes", memoria=True, D=dim, n=len(signal)):
+            ident, sembrados = _sembrar_codigos(signal, codigos)
+
+            n_faltantes, ausentes, times = patrones_faltantes(signal, dim, tau, win, step)
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, n_faltantes=n_faltantes, ausentes=ausentes, times=times)
+            _devolver_codigos(queue, ident, sembrados)
+        _devolver_tiempos(queue)
+        queue.put(("ok", (n_faltantes, ausentes, times, dim)))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+def worker_transiciones(signal, dim, tau, win, step, queue, clave_cache=None, codigos=None):
+    """Métricas por ventana de la red de transición ordinal y la red de toda la señal."""
+    try:
+        with tramo("worker.transiciones", memoria=True, D=dim, n=len(signal)):
+            ident, sembrados = _sembrar_codigos(signal, codigos)
+
+            metricas, red, times = transiciones_ordinales(signal, dim, tau, win, step)
+            if clave_cache is not None:
+                # la red se guarda en formato COO (filas, columnas, conteos)
+                coo = red.tocoo()
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, times=times, red_filas=coo.row,
+                                        red_columnas=coo.col, red_conteos=coo.data, **metricas)
+            _devolver_codigos(queue, ident, sembrados)
+        _devolver_tiempos(queue)
+        queue.put(("ok", (metricas, red, dim)))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+################################################################################
+# Entropía multiescala: una tarea del Pool por escala. La señal y su suma
+# acumulada se mandan una vez por proceso (initializer), no una vez por
+# escala, y todas las series gruesas salen de esa misma acumulada.
+################################################################################
+_MULTIESCALA = {}
+
+
+def _iniciar_multiescala(signal):
+    _MULTIESCALA["x"] = signal
+    _MULTIESCALA["acumulada"] = np.concatenate([[0.0], np.cumsum(signal)])
+
+
+def _multiescala_escala(args):
+    escala, dim, tau, win, step, variante, estimador = args
+    with tramo("multiescala.escala", escala=escala, variante=variante):
+        H = entropia_escala(_MULTIESCALA["x"], escala, dim, tau, win, step,
+                            variante, estimador, _MULTIESCALA["acumulada"])
+    return escala, H, perfilado.extraer()
+
+
+def entropia_multiescala_paralelo(signal, escalas, dim, tau, win, step, variante="estandar",
+                                  estimador="clasica", queue=None, n_procesos=None):
+    """
+    Igual que entropia_multiescala pero con las escalas repartidas en un Pool.
+    Con queue, informa ("progreso", (hechos, total, "escalas")) por escala.
+    """
+    if n_procesos is None:
+        n_procesos = os.cpu_count() or 1
+    n_procesos = max(1, min(n_procesos, len(escalas)))
+    tareas = [(e, dim, tau, win, step, variante, estimador) for e in escalas]
+
+    filas = {}
+    def _recibir(resultados):
+        for escala, H, tiempos in resultados:
+            perfilado.importar(tiempos)
+            filas[escala] = H
+            if queue is not None:
+                queue.put(("progreso", (len(filas), len(escalas), "escalas")))
+
+    if n_procesos == 1:
+        _iniciar_multiescala(signal)
+        _recibir(map(_multiescala_escala, tareas))
+    else:
+        with Pool(processes=n_procesos, initializer=_iniciar_multiescala, initargs=(signal,)) as pool:
+            _recibir(pool.imap_unordered(_multiescala_escala, tareas))
+    _MULTIESCALA.clear()
+    return np.vstack([filas[e] for e in escalas])
+
+
+def worker_multiescala(signal, escalas, dim, tau, win, step, variante, estimador, queue,
+                       clave_cache=None, codigos=None):
+    """Devuelve (matriz (n_escalas, n_ventanas) de H_norm, escalas)."""
+    try:
+        with tramo("worker.multiescala", memoria=True, D=dim, n=len(signal), escalas=len(escalas)):
+            ident, sembrados = _sembrar_codigos(signal, codigos)
+            matriz = entropia_multiescala_paralelo(signal, escalas, dim, tau, win, step,
+                                                   variante, estimador, queue)
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, matriz=matriz, escalas=np.asarray(escalas))
+            _devolver_codigos(queue, ident, sembrados)
+        _devolver_tiempos(queue)
+        queue.put(("ok", (matriz, list(escalas))))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+################################################################################
+# Datos sustitutos: lotes de sustitutos repartidos en un Pool. Cada sustituto
+# tiene su propia semilla hija de SeedSequence(semilla), así el resultado no
+# depende de la cantidad de procesos ni del orden en que terminan los lotes.
+################################################################################
+_SUSTITUTOS = {}
+
+# cada cuánto (segundos) se manda a la GUI una envolvente parcial
+INTERVALO_ENVOLVENTE = 0.5
+
+
+def _iniciar_sustitutos(signal):
+    _SUSTITUTOS["x"] = signal
+
+
+def _lote_sustitutos(args):
+    inicio, semillas, tipo, dim, tau, win, step, estimador = args
+    with tramo("sustitutos.lote", tipo=tipo, cantidad=len(semillas)):
+        H = np.vstack([
+            entropia_sustituto(generar_sustituto(_SUSTITUTOS["x"], tipo, np.random.default_rng(ss)),
+                               dim, tau, win, step, estimador)
+            for ss in semillas
+        ]).astype(np.float32)
+    return inicio, H, perfilado.extraer()
+
+
+def sustitutos_paralelo(signal, n, tipo, dim, tau, win, step, estimador="clasica", semilla=0,
+                        n_procesos=None, al_lote=None):
+    """
+    H_norm por ventana de n sustitutos: matriz (n, n_ventanas) en float32.
+    al_lote(hechos, matriz, terminadas) se llama cada vez que termina un
+    lote; terminadas es la máscara booleana de las filas ya calculadas (las
+    que faltan quedan en NaN).
+    """
+    if n_procesos is None:
+        n_procesos = os.cpu_count() or 1
+    n_procesos = max(1, min(n_procesos, n))
+    # lotes chicos para que la envolvente se actualice seguido, pero no tanto
+    # como para que domine el ida y vuelta con el Pool
+    tamano = max(1, min(25, -(-n // (4 * n_procesos))))
+    semillas = np.random.SeedSequence(semilla).spawn(n)
+    tareas = [(i, semillas[i:i + tamano], tipo, dim, tau, win, step, estimador)
+              for i in range(0, n, tamano)]
+
+    n_ventanas = len(range(0, len(signal) - win + 1, step))
+    matriz = np.full((n, n_ventanas), np.nan, dtype=np.float32)
+    terminadas = np.zeros(n, dtype=bool)
+    hechos = 0
+    def _recibir(resultados):
+        nonlocal hechos
+        for inicio, H, tiempos in resultados:
+            perfilado.importar(tiempos)
+            matriz[inicio:inicio + len(H)] = H
+            terminadas[inicio:inicio + len(H)] = True
+            hechos += len(H)
+            if al_lote is not None:
+                al_lote(hechos, matriz, terminadas)
+
+    if n_procesos == 1:
+        _iniciar_sustitutos(signal)
+        _recibir(map(_lote_sustitutos, tareas))
+    else:
+        with Pool(processes=n_procesos, initializer=_iniciar_sustitutos, initargs=(signal,)) as pool:
+            _recibir(pool.imap_unordered(_lote_sustitutos, tareas))
+    _SUSTITUTOS.clear()
+    return matriz
+
+
+def worker_sustitutos(signal, n, tipo, dim, tau, win, step, estimador, semilla, queue,
+                      percentiles=(2.5, 50.0, 97.5), clave_cache=None, codigos=None):
+    """
+    Prueba con sustitutos de la curva de H_norm. Manda ("parcial", payload)
+    con la envolvente de los sustitutos terminados hasta el momento y al
+    final ("ok", payload); payload = (hechos, n, Hnorm, envolventes) con
+    envolventes (len(percentiles), n_ventanas).
+    """
+    try:
+        with tramo("worker.sustitutos", memoria=True, D=dim, n=len(signal), sustitutos=n, tipo=tipo):
+            ident, sembrados = _sembrar_codigos(signal, codigos)
+            _, Hnorm, _ = band_and_pompe(signal, dim, tau, win, step, graf=False, beat_times=None,
+                                         estimador=estimador)
+            _devolver_codigos(queue, ident, sembrados)
+
+            ultimo = [0.0]
+            def _al_lote(hechos, matriz, terminadas):
+                queue.put(("progreso", (hechos, n, "sustitutos")))
+                ahora = time.monotonic()
+                if hechos < n and ahora - ultimo[0] >= INTERVALO_ENVOLVENTE:
+                    ultimo[0] = ahora
+                    # solo las filas terminadas: nanpercentile sobre todo el relleno es ~5 veces más lento
+                    envolventes = np.percentile(matriz[terminadas], percentiles, axis=0)
+                    queue.put(("parcial", (hechos, n, Hnorm, envolventes)))
+
+            matriz = sustitutos_paralelo(signal, n, tipo, dim, tau, win, step, estimador, semilla,
+                                         al_lote=_al_lote)
+            with tramo("sustitutos.percentiles", sustitutos=n):
+                envolventes = np.percentile(matriz, percentiles, axis=0)
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, Hnorm=Hnorm, envolventes=envolventes,
+                                        percentiles=np.asarray(percentiles))
+        _devolver_tiempos(queue)
+        queue.put(("ok", (n, n, Hnorm, envolventes)))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+################################################################################
+# Sincronía ordinal entre canales. Primero se codifica cada canal una sola vez
+# (una tarea por canal, leído de forma perezosa del EDF); después los pares de
+# canales se reparten en bloques entre procesos que reciben los códigos de
+# todos los canales una vez, por el initializer del Pool.
+################################################################################
+_SINCRONIA = {}
+
+
+def _codigos_canal(args):
+    path, idx, dim, tau, largo, step, n_ventanas = args
+    signal = leer_canal_edf(path, idx)
+    with tramo("codificar_patrones", D=dim, tau=tau, n=len(signal)):
+        codigos = codificar_patrones(signal, dim, tau)
+    # entropía marginal de cada ventana, la usan todos los pares del canal
+    H = entropia_codigos_por_ventana(codigos, math.factorial(dim), largo, step, n_ventanas) \
+        if len(codigos) >= (n_ventanas - 1) * step + largo else None
+    return idx, (codigos, H)
+
+
+def _iniciar_sincronia(codigos, entropias):
+    _SINCRONIA["codigos"] = codigos
+    _SINCRONIA["entropias"] = entropias
+
+
+def _bloque_pares(args):
+    p0, pares, n_categorias, largo, step, n_ventanas, medida = args
+    with tramo("sincronia.bloque", pares=len(pares), medida=medida):
+        valores = sincronia_pares(_SINCRONIA["codigos"], pares, n_categorias, largo, step,
+                                  n_ventanas, medida, _SINCRONIA["entropias"])
+    return p0, valores.astype(np.float32), perfilado.extraer()
+
+
+def sincronia_paralelo(codigos, entropias, n_categorias, largo, step, n_ventanas, medida,
+                       queue=None, n_procesos=None):
+    """
+    Sincronía ordinal por ventana, como dict con triangulo (n_ventanas,
+    C*(C-1)/2), los pares i < j en orden de filas, y diagonal (n_ventanas, C):
+    la matriz es simétrica, así que el cubo (n_ventanas, C, C) ocuparía el
+    doble sin aportar nada (core.estadisticas.matriz_sincronia arma la de una
+    ventana). codigos es (canales, n); entropias (canales, n_ventanas) las
+    marginales. La diagonal es H(X) para la información mutua y 1 para la
+    coincidencia. Con queue informa ("progreso", (hechos, total, "pares")).
+    """
+    C = len(codigos)
+    diagonal = entropias if medida == "informacion_mutua" else np.ones((C, n_ventanas))
+    pares = [(i, j) for i in range(C) for j in range(i + 1, C)]
+    resultado = {"triangulo": np.empty((n_ventanas, len(pares)), dtype=np.float32),
+                 "diagonal": np.ascontiguousarray(diagonal.T, dtype=np.float32)}
+    if not pares:
+        return resultado
+    if n_procesos is None:
+        n_procesos = os.cpu_count() or 1
+    n_procesos = max(1, min(n_procesos, len(pares)))
+    # varios bloques por proceso para repartir bien y dar progreso seguido
+    n_bloques = min(len(pares), 4 * n_procesos)
+    bordes = np.linspace(0, len(pares), n_bloques + 1).astype(int)
+    tareas = [(a, pares[a:b], n_categorias, largo, step, n_ventanas, medida)
+              for a, b in zip(bordes[:-1], bordes[1:])]
+
+    triangulo = resultado["triangulo"]
+    hechos = 0
+    def _recibir(resultados):
+        nonlocal hechos
+        for p0, valores, tiempos in resultados:
+            perfilado.importar(tiempos)
+            triangulo[:, p0:p0 + len(valores)] = valores.T
+            hechos += len(valores)
+            if queue is not None:
+                queue.put(("progreso", (hechos, len(pares), "pares")))
+
+    if n_procesos == 1:
+        _iniciar_sincronia(codigos, entropias)
+        _recibir(map(_bloque_pares, tareas))
+    else:
+        with Pool(processes=n_procesos, initializer=_iniciar_sincronia,
+                  initargs=(codigos, entropias)) as pool:
+            _recibir(pool.imap_unordered(_bloque_pares, tareas))
+    _SINCRONIA.clear()
+    return resultado
+
+
+def worker_sincronia(path, canales, dim, tau, win, step, medida, queue, n_procesos=None,
+                     clave_cache=None):
+    """
+    Sincronía ordinal entre todos los pares de `canales` del EDF, por ventana.
+    Devuelve ("ok", resultado) con el dict triangulo / diagonal de
+    sincronia_paralelo.
+    """
+    try:
+        with tramo("worker.sincronia", canales=len(canales), medida=medida):
+            n = abrir_edf(path).n_times
+            if n < win:
+                raise ValueError("El tamaño de ventana excede la longitud de la señal.")
+            n_ventanas = len(range(0, n - win + 1, step))
+            largo = win - (dim - 1) * tau
+            if largo <= 1:
+                raise ValueError("La ventana es demasiado corta para el embedding indicado.")
+
+            tareas = [(path, idx, dim, tau, largo, step, n_ventanas) for idx in canales]
+            resultados = _mapear_canales(_codigos_canal, tareas, queue, n_procesos)
+            if any(resultados[idx][1] is None for idx in canales):
+                raise ValueError("Los canales no tienen todos la misma cantidad de muestras.")
+            # mismo largo en todos: se recorta a lo que usan las ventanas
+            usado = (n_ventanas - 1) * step + largo
+            codigos = np.stack([resultados[idx][0][:usado] for idx in canales])
+            entropias = np.stack([resultados[idx][1] for idx in canales])
+            resultados.clear()
+
+            resultado = sincronia_paralelo(codigos, entropias, math.factorial(dim), largo, step,
+                                           n_ventanas, medida, queue, n_procesos)
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, **resultado)
+        _devolver_tiempos(queue)
+        queue.put(("ok", resultado))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+################################################################################
+# SampEn / ApEn: las ventanas se reparten en bloques contiguos; cada bloque
+# recibe solo las muestras que cubren sus ventanas (como Bandt & Pompe).
+################################################################################
+def _sampen_bloque(args):
+    k0, segmento, m, r_factor, win, step = args
+    sampen, apen, _ = sampen_apen_ventanas(segmento, m, r_factor, win, step)
+    return k0, sampen, apen, perfilado.extraer()
+
+
+def sampen_apen_paralelo(signal, m, r_factor, win, step, queue=None, n_procesos=None):
+    """
+    Igual que sampen_apen_ventanas pero con bloques de ventanas en un Pool.
+    Con queue informa ("progreso", (hechos, total, "ventanas")) por bloque.
+    """
+    if len(signal) < win:
+        raise ValueError("El tamaño de ventana excede la longitud de la serie.")
+    n_ventanas = len(range(0, len(signal) - win + 1, step))
+    if n_procesos is None:
+        n_procesos = os.cpu_count() or 1
+    n_procesos = max(1, min(n_procesos, n_ventanas))
+    # varios bloques por proceso: las ventanas no cuestan lo mismo (depende
+    # de cuántos vecinos tenga cada plantilla) y así se reparte mejor
+    n_bloques = min(n_ventanas, 4 * n_procesos)
+    bordes = np.linspace(0, n_ventanas, n_bloques + 1).astype(int)
+    tareas = [(k0, signal[k0 * step:(k1 - 1) * step + win], m, r_factor, win, step)
+              for k0, k1 in zip(bordes[:-1], bordes[1:])]
+
+    sampen = np.empty(n_ventanas)
+    apen = np.empty(n_ventanas)
+    hechos = 0
+    def _recibir(resultados):
+        nonlocal hechos
+        for k0, s, a, tiempos in resultados:
+            perfilado.importar(tiempos)
+            sampen[k0:k0 + len(s)] = s
+            apen[k0:k0 + len(a)] = a
+            hechos += len(s)
+            if queue is not None:
+                queue.put(("progreso", (hechos, n_ventanas, "ventanas")))
+
+    if n_procesos == 1:
+        _recibir(map(_sampen_bloque, tareas))
+    else:
+        with Pool(processes=n_procesos) as pool:
+            _recibir(pool.imap_unordered(_sampen_bloque, tareas))
+    return sampen, apen, np.arange(n_ventanas) * step
+
+
+def worker_sampen_apen(signal, m, r_factor, win, step, queue, clave_cache=None):
+    try:
+        with tramo("worker.sampen_apen", memoria=True, m=m, n=len(signal)):
+            sampen, apen, times = sampen_apen_paralelo(signal, m, r_factor, win, step, queue)
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, sampen=sampen, apen=apen, times=times)
+        _devolver_tiempos(queue)
+        queue.put(("ok", (sampen, apen, times)))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+def worker_dfa(signal, fs, ventana, paso, orden, queue, clave_cache=None):
+    """
+    DFA de la serie IBI (si fs no es None se detectan los picos R de la
+    señal) o de la señal tal cual. Devuelve ("ok", resultado) con un dict:
+    escalas, F (serie completa), alfa1, alfa2 y, si la serie alcanza para
+    una ventana, alfas (n_ventanas, 2) e inicios de la DFA por ventanas.
+    """
+    try:
+        with tramo("worker.dfa", memoria=True, n=len(signal), orden=orden):
+            if fs is not None:
+                with tramo("ibi", n=len(signal)):
+                    serie, _ = ibi_from_signal(signal, fs)
+            else:
+                serie = np.asarray(signal, dtype=float)
+            escalas = escalas_dfa(RANGO_ALFA1[0], min(RANGO_ALFA2[1], len(serie) // 4))
+            if len(escalas) < 2:
+                raise ValueError("La serie es demasiado corta para DFA (mínimo 32 valores).")
+            F = dfa(serie, escalas, orden)
+            resultado = {
+                "escalas": escalas, "F": F,
+                "alfa1": exponentes_dfa(escalas, F, RANGO_ALFA1)[0],
+                "alfa2": exponentes_dfa(escalas, F, RANGO_ALFA2)[0],
+                "n": len(serie),
+            }
+            # por ventanas: escalas que entran al menos 4 veces en la ventana
+            escalas_v = escalas[escalas <= ventana // 4]
+            if len(serie) >= ventana and len(escalas_v) >= 2:
+                Fv, inicios = dfa_ventanas(serie, ventana, paso, escalas_v, orden)
+                resultado["alfas"] = np.column_stack([exponentes_dfa(escalas_v, Fv, RANGO_ALFA1),
+                                                      exponentes_dfa(escalas_v, Fv, RANGO_ALFA2)])
+                resultado["inicios"] = inicios
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, **resultado)
+        _devolver_tiempos(queue)
+        queue.put(("ok", resultado))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+def worker_hrv(signal, fs, ventana_s, paso_s, umbral, queue, clave_cache=None):
+    """
+    Detecta los picos R, filtra los latidos ectópicos y calcula la HRV
+    global y por ventanas (core.estadisticas.resultado_hrv). Devuelve
+    ("ok", resultado) con el dict de arrays.
+    """
+    try:
+        with tramo("worker.hrv", memoria=True, n=len(signal), ventana=ventana_s, paso=paso_s):
+            with tramo("ibi", n=len(signal)):
+                ibi_ms, picos = ibi_from_signal(signal, fs)
+            # instante de cada latido: el pico R que cierra su intervalo
+            resultado = resultado_hrv(ibi_ms, picos[1:] / fs, ventana_s, paso_s, umbral)
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, **resultado)
+        _devolver_tiempos(queue)
+        queue.put(("ok", resultado))
+    except Exception as e:
+        queue.put(("error", str(e)))
+
+
+# ---------------------------------------------------------------------------
+# Espectro (Welch / espectrograma) por tramos
+# ---------------------------------------------------------------------------
+_ESPECTRO = {}
+
+
+def _iniciar_espectro(fuente, fs, nperseg, paso):
+    _ESPECTRO.update(fuente=fuente, fs=fs, nperseg=nperseg, paso=paso)
+
+
+def _leer_fuente(fuente, inicio, fin):
+    """fuente es (path, idx) de un canal EDF, que se lee de a tramos, o un vector."""
+    if isinstance(fuente, tuple):
+        return leer_tramo_edf(fuente[0], fuente[1], inicio, fin)
+    return fuente[inicio:fin]
+
+
+def _bloque_espectro(rango):
+    s0, s1 = rango
+    e = _ESPECTRO
+    with tramo("espectro.bloque", segmentos=s1 - s0):
+        P = espectro_bloque(lambda a, b: _leer_fuente(e["fuente"], a, b),
+                            s0, s1, e["fs"], e["nperseg"], e["paso"])
+    return s0, P.astype(np.float32), P.sum(axis=1), perfilado.extraer()
+
+
+def espectro_paralelo(fuente, n_muestras, fs, nperseg, solape, queue=None, n_procesos=None):
+    """
+    Versión en paralelo de core.estadisticas.espectrograma: cada tarea del
+    Pool lee (de forma perezosa, si la fuente es un canal EDF) y transforma
+    un tramo de segmentos. Devuelve (f, t, Sxx, psd). Con queue informa
+    ("progreso", (hechos, total, "bloques")).
+    """
+    paso, n_seg = segmentos_espectro(n_muestras, nperseg, solape)
+    comprobar_memoria_espectro(nperseg, n_seg)
+    f = frecuencias_espectro(fs, nperseg)
+    rangos = rangos_segmentos(n_seg, nperseg, paso)
+    Sxx = np.empty((len(f), n_seg), dtype=np.float32)
+    suma = np.zeros(len(f))
+    if n_procesos is None:
+        n_procesos = os.cpu_count() or 1
+    n_procesos = max(1, min(n_procesos, len(rangos)))
+
+    hechos = 0
+    def _recibir(resultados):
+        nonlocal hechos, suma
+        for s0, P, parcial, tiempos in resultados:
+            perfilado.importar(tiempos)
+            Sxx[:, s0:s0 + P.shape[1]] = P
+            suma += parcial
+            hechos += 1
+            if queue is not None:
+                queue.put(("progreso", (hechos, len(rangos), "bloques")))
+
+    if n_procesos == 1:
+        _iniciar_espectro(fuente, fs, nperseg, paso)
+        _recibir(map(_bloque_espectro, rangos))
+    else:
+        with Pool(processes=n_procesos, initializer=_iniciar_espectro,
+                  initargs=(fuente, fs, nperseg, paso)) as pool:
+            _recibir(pool.imap_unordered(_bloque_espectro, rangos))
+    _ESPECTRO.clear()
+    t = (np.arange(n_seg) * paso + nperseg / 2) / fs
+    return f, t, Sxx, suma / n_seg
+
+
+def worker_espectro(fuente, fs, nperseg, solape, queue, n_procesos=None, clave_cache=None):
+    """
+    Espectrograma y PSD de Welch de un canal EDF (fuente = (path, idx), sin
+    decodificarlo entero) o de un vector. Devuelve ("ok", resultado) con un
+    dict f, t, Sxx (float32) y psd.
+    """
+    try:
+        if isinstance(fuente, tuple):
+            n_muestras = abrir_edf(fuente[0]).n_times
+        else:
+            fuente = np.asarray(fuente, dtype=float)
+            n_muestras = len(fuente)
+        with tramo("worker.espectro", memoria=True, n=n_muestras, nperseg=nperseg, solape=solape):
+            f, t, Sxx, psd = espectro_paralelo(fuente, n_muestras, fs, nperseg, solape, queue, n_procesos)
+            resultado = {"f": f, "t": t, "Sxx": Sxx, "psd": psd}
+            if clave_cache is not None:
+                with tramo("cache_disco.guardar"):
+                    cache_disco.guardar(clave_cache, **resultado)
+        _devolver_tiempos(queue)
+        queue.put(("ok", resultado))
+    except Exception as e:
+        queue.put(("error", str(e)))
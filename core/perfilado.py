@@ -0,0 +1,199 @@
+"""
+Instrumentación liviana: tramos de tiempo con nombre.
+
+    with tramo("abrir_edf", archivo=path):
+        ...
+
+Con la instrumentación apagada `tramo` devuelve siempre el mismo objeto
+nulo, así que el costo es una llamada a función y un if. Encendida, cada
+tramo registra su duración (y opcionalmente el pico de memoria con
+tracemalloc) en un buffer circular que lee el panel de Rendimiento y en un
+log JSON lines.
+
+El estado se guarda también en variables de entorno para que los procesos
+worker, que se crean después de activarla, arranquen con la misma
+configuración. Los workers mandan sus tramos a la GUI por la Queue
+(mensaje "tiempos") y la GUI los incorpora con importar().
+"""
+import os
+import json
+import time
+import functools
+import threading
+import tracemalloc
+import multiprocessing
+from collections import deque
+
+_ENV_ACTIVO = "EDF_VIEWER_PERFILADO"
+_ENV_MEMORIA = "EDF_VIEWER_PERFILADO_MEMORIA"
+
+ARCHIVO_LOG = os.environ.get(
+    "EDF_VIEWER_PERFILADO_LOG",
+    os.path.join(os.path.expanduser("~"), ".edf_viewer", "perfilado.jsonl")
+)
+
+
+class _Estado:
+    activo = os.environ.get(_ENV_ACTIVO) == "1"
+    memoria = os.environ.get(_ENV_MEMORIA) == "1"
+
+
+_registros = deque(maxlen=5000)
+_lock = threading.Lock()
+
+
+def activar(activo=True, memoria=None):
+    """Enciende/apaga la instrumentación (y la medición de memoria, si se indica)."""
+    _Estado.activo = bool(activo)
+    os.environ[_ENV_ACTIVO] = "1" if activo else "0"
+    if memoria is not None:
+        _Estado.memoria = bool(memoria)
+        os.environ[_ENV_MEMORIA] = "1" if memoria else "0"
+
+
+def esta_activo():
+    return _Estado.activo
+
+
+def mide_memoria():
+    return _Estado.memoria
+
+
+class _TramoNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _TramoNulo()
+
+
+class _Tramo:
+    __slots__ = ("nombre", "datos", "memoria", "_t0", "_inicio", "_propio_tracemalloc")
+
+    def __init__(self, nombre, memoria, datos):
+        self.nombre = nombre
+        self.datos = datos
+        self.memoria = memoria and _Estado.memoria
+        self._propio_tracemalloc = False
+
+    def __enter__(self):
+        if self.memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._propio_tracemalloc = True
+            tracemalloc.reset_peak()
+        self._inicio = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        duracion = time.perf_counter() - self._t0
+        registro = {
+            "nombre": self.nombre,
+            "inicio": self._inicio,
+            "duracion": duracion,
+            "pid": os.getpid(),
+        }
+        if self.memoria:
+            registro["pico_memoria"] = tracemalloc.get_traced_memory()[1]
+            if self._propio_tracemalloc:
+                tracemalloc.stop()
+        if tipo is not None:
+            registro["error"] = tipo.__name__
+        if self.datos:
+            registro["datos"] = {k: str(v) for k, v in self.datos.items()}
+        _agregar(registro)
+        return False
+
+
+def tramo(nombre, memoria=False, **datos):
+    """
+    Context manager que mide el bloque como un tramo `nombre`.
+    memoria=True registra además el pico de memoria del bloque (solo si la
+    medición de memoria está activada; tracemalloc tiene un costo apreciable).
+    """
+    if not _Estado.activo:
+        return _NULO
+    return _Tramo(nombre, memoria, datos)
+
+
+def medido(nombre):
+    """Decorador: mide cada llamada a la función como un tramo `nombre`."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with tramo(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def _agregar(registro):
+    with _lock:
+        _registros.append(registro)
+    # solo el proceso principal escribe el log; los workers devuelven sus tramos
+    if multiprocessing.parent_process() is None:
+        _escribir_log([registro])
+
+
+def _escribir_log(registros):
+    try:
+        os.makedirs(os.path.dirname(ARCHIVO_LOG), exist_ok=True)
+        with open(ARCHIVO_LOG, "a", encoding="utf-8") as f:
+            for r in registros:
+                f.write(json.dumps(r) + "\n")
+    except OSError:
+        pass
+
+
+def extraer():
+    """Saca y devuelve los tramos acumulados (lo usan los workers antes de terminar)."""
+    with _lock:
+        registros = list(_registros)
+        _registros.clear()
+    return registros
+
+
+def importar(registros):
+    """Incorpora los tramos que mandó un worker (o un proceso de su Pool)."""
+    if not registros:
+        return
+    with _lock:
+        _registros.extend(registros)
+    if multiprocessing.parent_process() is None:
+        _escribir_log(registros)
+
+
+def registros():
+    with _lock:
+        return list(_registros)
+
+
+def limpiar():
+    with _lock:
+        _registros.clear()
+
+
+def resumen():
+    """
+    Agrega los tramos por nombre: {nombre: {n, total, media, maximo, ultimo,
+    pico_memoria}} ordenado por tiempo total descendente.
+    """
+    por_nombre = {}
+    for r in registros():
+        a = por_nombre.setdefault(r["nombre"], {"n": 0, "total": 0.0, "maximo": 0.0,
+                                                "ultimo": 0.0, "pico_memoria": None})
+        a["n"] += 1
+        a["total"] += r["duracion"]
+        a["maximo"] = max(a["maximo"], r["duracion"])
+        a["ultimo"] = r["duracion"]
+        if "pico_memoria" in r:
+            a["pico_memoria"] = max(a["pico_memoria"] or 0, r["pico_memoria"])
+    for a in por_nombre.values():
+        a["media"] = a["total"] / a["n"]
+    return dict(sorted(por_nombre.items(), key=lambda kv: -kv[1]["total"]))
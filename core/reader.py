@@ -1,38 +1,214 @@
 import os
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from scipy.io import loadmat
-import mne
-from scipy.io import savemat
+import numpy as np
+from core.perfilado import tramo
+from core.memoria import gestor_memoria, tic
 
+# scipy, mne y h5py se importan recién al leer el primer archivo: importarlos
+# acá retrasaba varios segundos la apertura de la ventana principal.
 
-try:
-    import h5py
-    HAS_H5PY = True
-except Exception:
-    HAS_H5PY = False
+
+def _importar_h5py():
+    """h5py es opcional (solo hace falta para los .mat v7.3); None si no está."""
+    try:
+        import h5py
+        return h5py
+    except Exception:
+        return None
+
+
+def leer_mat(path):
+    """
+    Lee un archivo .mat y devuelve un dict con sus variables, sin interfaz
+    gráfica (lo usan también los procesos por lotes). Los .mat v7.3 (HDF5)
+    se leen con h5py si está instalado; si no se puede leer lanza la excepción.
+    """
+    from scipy.io import loadmat
+    try:
+        return loadmat(path, simplify_cells=True)
+    except Exception:
+        h5py = _importar_h5py()
+        if h5py is None:
+            raise
+        data = {}
+        with h5py.File(path, 'r') as f:
+            def visit(name, obj):
+                if isinstance(obj, h5py.Dataset):
+                    try:
+                        data[name] = obj[()]
+                    except Exception:
+                        pass
+            f.visititems(visit)
+        return data
 
 
 def read_mat_safely(path):
     """Lee un archivo .mat y devuelve un dict con sus variables."""
     try:
-        data = loadmat(path, simplify_cells=True)
-        return data
-    except Exception:
-        if HAS_H5PY:
-            try:
-                data = {}
-                with h5py.File(path, 'r') as f:
-                    def visit(name, obj):
-                        if isinstance(obj, h5py.Dataset):
-                            try:
-                                data[name] = obj[()]
-                            except Exception:
-                                pass
-                    f.visititems(visit)
-                return data
-            except Exception as e:
-                messagebox.showerror("Error", f"No se pudo leer el archivo .mat:\n{e}")
+        return leer_mat(path)
+    except Exception as e:
+        from tkinter import messagebox
+        if _importar_h5py() is not None:
+            messagebox.showerror("Error", f"No se pudo leer el archivo .mat:\n{e}")
         else:
             messagebox.showerror("Error", "Archivo .mat no compatible y h5py no instalado.")
-        return None
\ No newline at end of file
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Lectura perezosa de canales EDF (usada por los workers multicanal)
+# ---------------------------------------------------------------------------
+_EDF_ABIERTOS = {}
+
+
+def abrir_edf(path):
+    """
+    Abre un EDF sin precargar las señales (preload=False), reintentando con
+    encoding latin1 si el encabezado trae bytes inválidos. Cada proceso
+    mantiene abierto un único Raw por ruta.
+    """
+    raw = _EDF_ABIERTOS.get(path)
+    if raw is not None:
+        return raw
+    import mne
+    with tramo("abrir_edf", archivo=os.path.basename(path)):
+        try:
+            raw = mne.io.read_raw_edf(path, preload=False, verbose=False)
+        except Exception as e:
+            if "invalid byte" not in str(e).lower():
+                raise
+            raw = mne.io.read_raw_edf(path, preload=False, verbose=False, encoding="latin1")
+    _EDF_ABIERTOS[path] = raw
+    return raw
+
+
+def leer_canal_edf(path, idx):
+    """Decodifica solo el canal idx del EDF y lo devuelve como vector float."""
+    raw = abrir_edf(path)
+    with tramo("decodificar_canal", canal=idx):
+        return raw.get_data(picks=[idx])[0]
+
+
+def leer_tramo_edf(path, idx, inicio, fin):
+    """Decodifica solo las muestras [inicio, fin) del canal idx del EDF."""
+    raw = abrir_edf(path)
+    with tramo("decodificar_tramo", canal=idx, muestras=fin - inicio):
+        return raw.get_data(picks=[idx], start=int(inicio), stop=int(fin))[0]
+
+
+class CanalesEDF:
+    """
+    Canales de un EDF abierto, decodificados bajo demanda y de a uno:
+    canales[idx] devuelve el vector float del canal. Los canales ya leídos se
+    guardan mientras el gestor de memoria no necesite el lugar; si los
+    desaloja, el próximo acceso los vuelve a leer del archivo.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._canales = {}   # idx -> vector
+        self._usos = {}      # idx -> tic() del último acceso
+        gestor_memoria.registrar(self)
+
+    def __len__(self):
+        return len(self.raw.ch_names)
+
+    def __getitem__(self, idx):
+        canal = self._canales.get(idx)
+        if canal is None:
+            with tramo("decodificar_canal", canal=idx):
+                canal = self.raw.get_data(picks=[idx])[0]
+            self._canales[idx] = canal
+            self._usos[idx] = tic()
+            gestor_memoria.equilibrar(proteger=(self, idx))
+        else:
+            self._usos[idx] = tic()
+        return canal
+
+    def bytes_usados(self):
+        return sum(c.nbytes for c in self._canales.values())
+
+    def desalojables(self):
+        return [(self._usos[i], i, c.nbytes) for i, c in self._canales.items()]
+
+    def desalojar(self, idx):
+        canal = self._canales.pop(idx, None)
+        self._usos.pop(idx, None)
+        return 0 if canal is None else canal.nbytes
+
+    def cerrar(self):
+        """Suelta todos los canales y sale del gestor; devuelve los bytes liberados."""
+        liberados = self.bytes_usados()
+        self._canales.clear()
+        self._usos.clear()
+        gestor_memoria.quitar(self)
+        return liberados
+
+
+def _bytes_variable(valor):
+    # no se usa summarizer.nbytes_total: loadmat devuelve vistas sobre el
+    # buffer leído, que ahí no suman
+    return valor.nbytes if isinstance(valor, np.ndarray) else 0
+
+
+class VariablesMAT:
+    """
+    Variables de un .mat abierto en el visor: variables[nombre] devuelve su
+    valor. Se leen todas al abrir (hace falta listarlas), pero quedan
+    registradas en el gestor de memoria; una variable desalojada se vuelve a
+    leer sola del archivo (loadmat con variable_names) en el próximo acceso.
+    """
+
+    def __init__(self, path):
+        from scipy.io import loadmat
+        self.path = path
+        with tramo("abrir_mat", archivo=os.path.basename(path)):
+            data = loadmat(path)
+        # sin los metadatos de MATLAB (__header__, __version__, __globals__)
+        self._variables = {k: v for k, v in data.items() if not k.startswith("__")}
+        self.nombres = list(self._variables)
+        # forma y tipo para listarlas sin tener que releer las desalojadas
+        self.formas = {}
+        for k, v in self._variables.items():
+            try:
+                self.formas[k] = (str(np.shape(v)), type(v).__name__)
+            except Exception:
+                self.formas[k] = ("-", "-")
+        self._usos = {k: tic() for k in self._variables}
+        gestor_memoria.registrar(self)
+        gestor_memoria.equilibrar()
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __contains__(self, nombre):
+        return nombre in self.nombres
+
+    def __getitem__(self, nombre):
+        if nombre not in self.nombres:
+            raise KeyError(nombre)
+        if nombre not in self._variables:
+            from scipy.io import loadmat
+            with tramo("releer_variable_mat", variable=nombre):
+                self._variables[nombre] = loadmat(self.path, variable_names=[nombre])[nombre]
+            self._usos[nombre] = tic()
+            gestor_memoria.equilibrar(proteger=(self, nombre))
+        else:
+            self._usos[nombre] = tic()
+        return self._variables[nombre]
+
+    def bytes_usados(self):
+        return sum(_bytes_variable(v) for v in self._variables.values())
+
+    def desalojables(self):
+        return [(self._usos[k], k, _bytes_variable(v)) for k, v in self._variables.items()]
+
+    def desalojar(self, nombre):
+        valor = self._variables.pop(nombre, None)
+        return _bytes_variable(valor)
+
+    def cerrar(self):
+        """Suelta todas las variables y sale del gestor; devuelve los bytes liberados."""
+        liberados = self.bytes_usados()
+        self._variables.clear()
+        gestor_memoria.quitar(self)
+        return liberados
@@ -8,3 +8,23 @@ def arr_summary(value, maxitems=6):
         return f"ndarray shape={value.shape}, dtype={value.dtype}, data=[{snippet}{'...' if value.size > maxitems else ''}]"
     else:
         return repr(value)[:200]
+
+
+def nbytes_total(value, _vistos=None):
+    """
+    Bytes ocupados por los arrays NumPy de una variable (recorre dicts, listas
+    y tuplas). Las vistas no suman, porque su memoria es del array base, y un
+    mismo array referenciado dos veces se cuenta una sola vez.
+    """
+    if _vistos is None:
+        _vistos = set()
+    if isinstance(value, np.ndarray):
+        if value.base is not None or id(value) in _vistos:
+            return 0
+        _vistos.add(id(value))
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(nbytes_total(v, _vistos) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes_total(v, _vistos) for v in value)
+    return 0
@@ -3,15 +3,77 @@
 """
 Simple Viewer
 Autor: Pedro Enrique Rueda
+
+Al arrancar solo se importan Tk y el esqueleto de menús. Los módulos pesados
+(mne, scipy, matplotlib, los visores y las estadísticas) se cargan la primera
+vez que se usan o, antes, en un hilo en segundo plano que arranca apenas se
+muestra la ventana.
+
+    python main.py --medir-arranque   # imprime el tiempo hasta ver la ventana y sale
+    python main.py --sin-precarga     # no precargar en segundo plano
 """
+import time
+T_INICIO = time.perf_counter()
 
-from ui.main_window import MainWindow
+import argparse
+import importlib
+import threading
+from multiprocessing import freeze_support
 import tkinter as tk
 
-def main():
+from ui.main_window import MainWindow
+
+# En orden: primero lo que necesita abrir un archivo, después las estadísticas.
+MODULOS_PRECARGA = (
+    "numpy",
+    "scipy.io",
+    "matplotlib.pyplot",
+    "matplotlib.backends.backend_tkagg",
+    "mne",
+    "ui.pestanas.edf_viewer_frame",
+    "ui.pestanas.mat_viewer_frame",
+    "scipy.signal",
+    "core.estadisticas",
+    "core.mp_workers",
+    "ui.estadisticas.stat_subtab",
+)
+
+
+def precargar_modulos():
+    """Importa los módulos pesados; un módulo que falte se deja para su primer uso."""
+    for nombre in MODULOS_PRECARGA:
+        try:
+            importlib.import_module(nombre)
+        except Exception:
+            pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Visor de archivos EDF y MAT.")
+    parser.add_argument("--medir-arranque", action="store_true",
+                        help="Imprime los segundos hasta que la ventana está visible y sale.")
+    parser.add_argument("--sin-precarga", action="store_true",
+                        help="No precargar los módulos pesados en segundo plano.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     root = tk.Tk()
     app = MainWindow(root)
+
+    if args.medir_arranque:
+        def reportar():
+            root.update()   # la ventana ya quedó mapeada y dibujada
+            print(f"arranque: {time.perf_counter() - T_INICIO:.3f} s")
+            root.destroy()
+        root.after_idle(reportar)
+    elif not args.sin_precarga:
+        # daemon: no retiene el cierre de la aplicación si todavía está importando
+        root.after_idle(lambda: threading.Thread(target=precargar_modulos, daemon=True).start())
+
     root.mainloop()
 
 if __name__ == "__main__":
+    freeze_support()
     main()
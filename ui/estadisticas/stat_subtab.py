@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from core.summarizer import nbytes_total
+from core.memoria import gestor_memoria
 
 
 """Crea una nueva sub-pestaña en el sub-notebook para una estadística."""
@@ -29,6 +31,10 @@ class AddStatSubtab(ttk.Frame):
         self.controls_frame = ttk.Frame(self)
         self.controls_frame.pack(fill="x", pady=(0, 6))
 
+        # Línea de estado (progreso de los cálculos en segundo plano)
+        self.estado_var = tk.StringVar(value="")
+        ttk.Label(self, textvariable=self.estado_var, foreground="gray").pack(anchor="w", padx=4)
+
         # Panel de figura
         self.fig_frame = ttk.Frame(self)
         self.fig_frame.pack(fill="both", expand=True)
@@ -41,6 +47,9 @@ class AddStatSubtab(ttk.Frame):
         toolbar = NavigationToolbar2Tk(self.canvas, self.fig_frame)
         toolbar.update()
 
+    def set_estado(self, texto):
+        self.estado_var.set(texto)
+
     def disable_controls(self):
         for w in self.controls_frame.winfo_children():
             try: w.configure(state='disabled')
@@ -50,3 +59,62 @@ class AddStatSubtab(ttk.Frame):
         for w in self.controls_frame.winfo_children():
             try: w.configure(state='normal')
             except: pass
+
+    def _cancelar_after(self):
+        """Cancela los after() pendientes de esta sub-pestaña (p.ej. el sondeo de la cola)."""
+        propios = set(self._tclCommands or ())
+        for id_after in self.tk.splitlist(self.tk.call("after", "info")):
+            try:
+                script = self.tk.splitlist(self.tk.call("after", "info", id_after))[0]
+            except tk.TclError:
+                continue
+            if script in propios:
+                self.after_cancel(id_after)
+
+    def uso_memoria(self):
+        """
+        Bytes de los resultados (arrays) guardados en la sub-pestaña, de su
+        pirámide de dibujo y de los derivados que guarda para redibujar.
+        """
+        uso = nbytes_total(list(vars(self).values()))
+        for nombre in ("_lienzo", "_derivados"):
+            almacen = getattr(self, nombre, None)
+            if almacen is not None:
+                uso += almacen.bytes_usados()
+        return uso
+
+    def cerrar(self):
+        """
+        Libera la sub-pestaña: termina el cálculo en curso, suelta los
+        resultados guardados, vacía la figura y destruye los widgets.
+        Devuelve los bytes de arrays liberados.
+        """
+        self._cancelar_after()
+
+        p = getattr(self, "mp_process", None)
+        if p is not None and p.is_alive():
+            p.terminate()
+            p.join(timeout=1)
+        q = getattr(self, "mp_queue", None)
+        if q is not None:
+            q.cancel_join_thread()
+            q.close()
+        self.mp_process = None
+        self.mp_queue = None
+
+        liberados = 0
+        derivados = getattr(self, "_derivados", None)
+        if derivados is not None:
+            liberados += derivados.vaciar()
+            gestor_memoria.quitar(derivados)
+        for nombre, valor in list(vars(self).items()):
+            n = nbytes_total(valor)
+            if n:
+                liberados += n
+                setattr(self, nombre, None)
+
+        if self.fig is not None:
+            self.fig.clear()
+        self.fig = self.ax = self.canvas = None
+        self.destroy()
+        return liberados
@@ -0,0 +1,171 @@
+import os
+import tkinter as tk
+from multiprocessing import Process, Queue
+from tkinter import ttk, filedialog, messagebox
+from core.exportar_figuras import FIGURAS, FORMATOS, trabajos_desde_entradas
+
+# ---------------------------
+# Exportación de figuras por lotes
+# ---------------------------
+class ExportarFigurasWindow(tk.Toplevel):
+    """
+    Arma la lista de trabajos (archivo, canal, figura) a partir de los
+    archivos elegidos, los selectores de canal y las figuras marcadas, y la
+    exporta en un proceso aparte (core.exportar_figuras, con un Pool de
+    procesos que dibujan con Agg). La ventana solo sondea el avance.
+    """
+    SONDEO_MS = 300
+
+    def __init__(self, master, archivos=()):
+        super().__init__(master)
+        self.title("Exportar figuras")
+        self.geometry("560x520")
+        self.mp_process = None
+        self.mp_queue = None
+        self._after_id = None
+
+        # --- archivos ---
+        marco = ttk.LabelFrame(self, text="Archivos")
+        marco.pack(fill="both", expand=True, padx=6, pady=4)
+        self.lista = tk.Listbox(marco, height=8, selectmode="extended")
+        self.lista.pack(side="left", fill="both", expand=True, padx=4, pady=4)
+        botones = ttk.Frame(marco)
+        botones.pack(side="right", fill="y", padx=4)
+        ttk.Button(botones, text="Agregar...", command=self.agregar_archivos).pack(fill="x", pady=2)
+        ttk.Button(botones, text="Quitar", command=self.quitar_archivos).pack(fill="x", pady=2)
+        for path in archivos:
+            self.lista.insert("end", path)
+
+        # --- qué exportar ---
+        marco = ttk.LabelFrame(self, text="Figuras")
+        marco.pack(fill="x", padx=6, pady=4)
+        self.figuras_vars = {}
+        for i, figura in enumerate(FIGURAS):
+            var = tk.BooleanVar(value=figura in ("senal", "entropia"))
+            ttk.Checkbutton(marco, text=figura, variable=var).grid(row=0, column=i, padx=4, sticky='w')
+            self.figuras_vars[figura] = var
+
+        ttk.Label(marco, text="Canales:").grid(row=1, column=0, padx=4, pady=2, sticky='e')
+        self.canales_var = tk.StringVar()
+        ttk.Entry(marco, textvariable=self.canales_var, width=30).grid(
+            row=1, column=1, columnspan=3, padx=4, pady=2, sticky='ew')
+        ttk.Label(marco, text="(nombres, comodines o índices; vacío = todos)", foreground="gray").grid(
+            row=2, column=1, columnspan=4, padx=4, sticky='w')
+
+        ttk.Label(marco, text="Formato:").grid(row=3, column=0, padx=4, pady=2, sticky='e')
+        self.formato_var = tk.StringVar(value=FORMATOS[0])
+        ttk.Combobox(marco, textvariable=self.formato_var, values=FORMATOS, state='readonly',
+                     width=6).grid(row=3, column=1, padx=4, sticky='w')
+        ttk.Label(marco, text="DPI:").grid(row=3, column=2, padx=4, sticky='e')
+        self.dpi_var = tk.IntVar(value=150)
+        ttk.Spinbox(marco, from_=50, to=600, width=6, textvariable=self.dpi_var).grid(
+            row=3, column=3, padx=4, sticky='w')
+
+        # --- parámetros de los análisis ---
+        marco = ttk.LabelFrame(self, text="Parámetros")
+        marco.pack(fill="x", padx=6, pady=4)
+        self.param_vars = {}
+        for i, (nombre, texto, valor) in enumerate((
+                ("dim", "Dimensión:", 3), ("tau", "Retardo:", 1), ("tau_max", "Tau máx.:", 10),
+                ("ventana", "Ventana:", 100), ("paso", "Paso:", 1), ("procesos", "Procesos:", os.cpu_count() or 1))):
+            ttk.Label(marco, text=texto).grid(row=i // 3, column=2 * (i % 3), padx=4, pady=2, sticky='e')
+            var = tk.IntVar(value=valor)
+            ttk.Spinbox(marco, from_=1, to=100000, width=7, textvariable=var).grid(
+                row=i // 3, column=2 * (i % 3) + 1, padx=4, sticky='w')
+            self.param_vars[nombre] = var
+        ttk.Label(marco, text="fs (.mat):").grid(row=2, column=0, padx=4, pady=2, sticky='e')
+        self.fs_var = tk.StringVar()
+        ttk.Entry(marco, textvariable=self.fs_var, width=8).grid(row=2, column=1, padx=4, sticky='w')
+
+        # --- salida ---
+        marco = ttk.Frame(self)
+        marco.pack(fill="x", padx=6, pady=4)
+        ttk.Label(marco, text="Carpeta de salida:").pack(side="left")
+        self.salida_var = tk.StringVar()
+        ttk.Entry(marco, textvariable=self.salida_var).pack(side="left", fill="x", expand=True, padx=4)
+        ttk.Button(marco, text="Elegir...", command=self.elegir_salida).pack(side="left")
+
+        barra = ttk.Frame(self)
+        barra.pack(fill="x", padx=6, pady=6)
+        self.estado_var = tk.StringVar()
+        ttk.Label(barra, textvariable=self.estado_var).pack(side="left")
+        self.boton = ttk.Button(barra, text="Exportar", command=self.exportar)
+        self.boton.pack(side="right")
+
+    def destroy(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        if self.mp_process is not None and self.mp_process.is_alive():
+            self.mp_process.terminate()
+        super().destroy()
+
+    # ------------------------------------------------------------------
+    def agregar_archivos(self):
+        paths = filedialog.askopenfilenames(
+            parent=self, title="Seleccionar archivos",
+            filetypes=[("EDF y MAT", "*.edf *.mat"), ("Todos", "*.*")])
+        actuales = set(self.lista.get(0, "end"))
+        for path in paths:
+            if path not in actuales:
+                self.lista.insert("end", path)
+
+    def quitar_archivos(self):
+        for i in reversed(self.lista.curselection()):
+            self.lista.delete(i)
+
+    def elegir_salida(self):
+        carpeta = filedialog.askdirectory(parent=self, title="Carpeta de salida")
+        if carpeta:
+            self.salida_var.set(carpeta)
+
+    def _config(self):
+        config = {nombre: var.get() for nombre, var in self.param_vars.items()}
+        fs = self.fs_var.get().strip()
+        config.update(salida=self.salida_var.get().strip(), formato=self.formato_var.get(),
+                      dpi=self.dpi_var.get(), fs=float(fs) if fs else None)
+        return config
+
+    def exportar(self):
+        archivos = list(self.lista.get(0, "end"))
+        figuras = [f for f, var in self.figuras_vars.items() if var.get()]
+        if not archivos or not figuras:
+            messagebox.showinfo("Atención", "Elija al menos un archivo y una figura.", parent=self)
+            return
+        try:
+            config = self._config()
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Error", f"Parámetro inválido: {e}", parent=self)
+            return
+        if not config["salida"]:
+            messagebox.showinfo("Atención", "Elija una carpeta de salida.", parent=self)
+            return
+
+        trabajos = trabajos_desde_entradas(archivos, self.canales_var.get().split(), figuras)
+
+        from core.mp_workers import worker_exportar_figuras
+        self.mp_queue = Queue()
+        self.mp_process = Process(target=worker_exportar_figuras,
+                                  args=(trabajos, config, self.mp_queue))
+        self.mp_process.start()
+        self.boton.config(state='disabled')
+        self.estado_var.set(f"Exportando {len(trabajos)} figuras...")
+        self._sondear()
+
+    def _sondear(self):
+        self._after_id = None
+        while not self.mp_queue.empty():
+            status, payload = self.mp_queue.get()
+            if status == "progreso":
+                hechos, total = payload
+                self.estado_var.set(f"Procesando {hechos}/{total} tareas...")
+                continue
+            self.mp_process.join(timeout=0.1)
+            self.boton.config(state='normal')
+            if status == "error":
+                self.estado_var.set("")
+                messagebox.showerror("Error al exportar", payload, parent=self)
+            else:
+                self.estado_var.set(f"Listo. Resumen en {payload}")
+            return
+        self._after_id = self.after(self.SONDEO_MS, self._sondear)
@@ -1,12 +1,15 @@
 import os
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
 from ui.menus.menu_archivo import MenuArchivo
 from ui.menus.menu_estadisticas import MenuEstadisticas
+from ui.menus.menu_rendimiento import MenuRendimiento
 from ui.menu_sobre_pestanas.menu_sobre_pestanas import MenuSobrePestanas
+from core.memoria import gestor_memoria
 
 class MainWindow:
+    REFRESCO_MEMORIA_MS = 2000
+
     def __init__(self, root):
         self.root = root
         self.root.title("EDF Viewr")
@@ -17,6 +20,14 @@ class MainWindow:
         menubar = tk.Menu(root)
         root.config(menu=menubar)
 
+        # Barra de estado (abajo); se empaqueta antes del notebook para que no la tape
+        barra = ttk.Frame(root, relief="sunken")
+        barra.pack(side="bottom", fill="x")
+        self.estado_var = tk.StringVar(value="")
+        ttk.Label(barra, textvariable=self.estado_var, anchor="w").pack(side="left", padx=4)
+        self.memoria_var = tk.StringVar(value="")
+        ttk.Label(barra, textvariable=self.memoria_var, anchor="e").pack(side="right", padx=4)
+
         # Área principal: Notebook (pestañas)
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill="both", expand=True)
@@ -30,5 +41,28 @@ class MainWindow:
         MenuArchivo(self, root, menubar, self.notebook)
         # Menú Estadísticas
         MenuEstadisticas(self, menubar,self.notebook)
+        # Menú Rendimiento (instrumentación de tiempos)
+        MenuRendimiento(self, root, menubar)
         # Menu sobre pestañas
         MenuSobrePestanas(self, root, self.notebook)
+
+        self._actualizar_memoria()
+
+    def set_estado(self, texto):
+        self.estado_var.set(texto)
+
+    def _actualizar_memoria(self):
+        """Refresca en la barra de estado el uso de memoria total y por pestaña."""
+        partes = []
+        for tab_id in self.notebook.tabs():
+            for hijo in self.notebook.nametowidget(tab_id).winfo_children():
+                uso_memoria = getattr(hijo, "uso_memoria", None)
+                if uso_memoria is not None:
+                    nombre = self.notebook.tab(tab_id, "text")
+                    partes.append(f"{nombre}: {uso_memoria() / 1e6:.0f} MB")
+        texto = (f"Re-derivables: {gestor_memoria.uso() / 1e6:.0f}"
+                 f"/{gestor_memoria.presupuesto / 1e6:.0f} MB")
+        if partes:
+            texto += "  |  " + "  ".join(partes)
+        self.memoria_var.set(texto)
+        self.root.after(self.REFRESCO_MEMORIA_MS, self._actualizar_memoria)
@@ -1,3 +1,4 @@
+import gc
 import tkinter as tk
 
 class MenuSobrePestanas:
@@ -31,9 +32,37 @@ class MenuSobrePestanas:
         self.tab_menu.tk_popup(event.x_root, event.y_root)
 
     def _close_current_tab(self):
-        """Cierra la pestaña seleccionada vía menú contextual."""
-        if hasattr(self, "_tab_to_close"):
+        """
+        Cierra la pestaña seleccionada vía menú contextual. Antes de sacarla
+        del notebook se llama a cerrar() del visor o sub-pestaña que contiene,
+        para que termine sus cálculos y suelte datos, figuras y caché.
+        """
+        if self._tab_to_close is None:
+            return
+        try:
+            widget = self.notebook.nametowidget(self.notebook.tabs()[self._tab_to_close])
+            self.notebook.forget(self._tab_to_close)
+        except Exception:
+            return
+        self._tab_to_close = None
+
+        # la pestaña puede ser el recurso (sub-pestaña) o contenerlo (visor)
+        recursos = [widget] if hasattr(widget, "cerrar") else [
+            w for w in widget.winfo_children() if hasattr(w, "cerrar")]
+        liberados = 0
+        for recurso in recursos:
             try:
-                self.notebook.forget(self._tab_to_close)
-            except Exception:
-                pass
+                liberados += recurso.cerrar()
+            except Exception as e:
+                print(f" Error liberando la pestaña: {e}")
+        widget.destroy()
+        # las figuras de matplotlib quedan en ciclos de referencias
+        gc.collect()
+        self._reportar(f"Pestaña cerrada: {liberados / 1e6:.1f} MB liberados")
+
+    def _reportar(self, texto):
+        set_estado = getattr(self.mainwindow, "set_estado", None)
+        if set_estado is not None:
+            set_estado(texto)
+        else:
+            print(f" {texto}")
@@ -1,13 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from ui.pestanas.edf_viewer_frame import EDFViewerFrame
-from ui.pestanas.mat_viewer_frame import MatViewerFrame
 import os
-from core.reader import read_mat_safely
-from core.summarizer import arr_summary
-import numpy as np
-from pathlib import Path
-import mne
+
+# Los visores (mne, scipy, matplotlib) se importan al abrir el primer archivo,
+# no al arrancar; main.py además los precarga en segundo plano.
 
 class MenuArchivo:
     def __init__(self, mainwindow, root, menubar,notebook):
@@ -32,6 +28,8 @@ class MenuArchivo:
         archivo_menu.add_command(label="Abrir archivo .mat",command=self.open_mat)
         archivo_menu.add_command(label="Abrir archivo .edf",command=self.open_edf)
         archivo_menu.add_separator()
+        archivo_menu.add_command(label="Exportar figuras por lotes...", command=self.exportar_figuras)
+        archivo_menu.add_separator()
         archivo_menu.add_command(label="Salir", command=self.root.quit)
 
     def open_edf(self):
@@ -48,6 +46,7 @@ class MenuArchivo:
         self.notebook.add(tab, text=os.path.basename(path))
 
         # Insertar el visor dentro de la pestaña
+        from ui.pestanas.edf_viewer_frame import EDFViewerFrame
         viewer = EDFViewerFrame(tab, path)
         viewer.pack(fill="both", expand=True)
 
@@ -69,6 +68,7 @@ class MenuArchivo:
         self.notebook.add(tab, text=os.path.basename(path))
 
         # Insertar el visor dentro de la pestaña
+        from ui.pestanas.mat_viewer_frame import MatViewerFrame
         viewer = MatViewerFrame(tab, path)
         viewer.pack(fill="both", expand=True)
 
@@ -76,6 +76,19 @@ class MenuArchivo:
         self.notebook.select(tab)
 
 
+    def exportar_figuras(self):
+        """Abre el diálogo de exportación con los archivos de las pestañas abiertas."""
+        archivos = []
+        for tab_id in self.notebook.tabs():
+            for hijo in self.notebook.nametowidget(tab_id).winfo_children():
+                path = getattr(hijo, "path", None)
+                if path and path not in archivos:
+                    archivos.append(path)
+
+        from ui.exportar_window import ExportarFigurasWindow
+        ExportarFigurasWindow(self.root, archivos)
+
+
     # def load_mat(self, path):
     #     data = read_mat_safely(path)
     #     if data is None:
@@ -1,20 +1,72 @@
-
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog 
-from ui.pestanas.mat_viewer_frame import MatViewerFrame
-from ui.pestanas.edf_viewer_frame import EDFViewerFrame
-from core.estadisticas import band_and_pompe, calculate_ibi, calculate_tau_d_heatmap
+from core.cache_disco import cache_disco, clave_resultado
+from core.cache_patrones import cache_patrones, identidad_senal
+from core import perfilado
+from core.perfilado import tramo, medido
+from core.memoria import Derivados
+from utils.plotting import lienzo_de, colores_patrones
+from utils.piramide import AGREGACIONES
+import math
 import numpy as np
-from ui.estadisticas.stat_subtab import AddStatSubtab
-from scipy.io import savemat # Requerir scipy.io para guardar .mat
 
 from multiprocessing import Process, Queue
-from core.mp_workers import worker_bandt_pompe, worker_tau_d_heatmap
-from core.mp_workers import worker_patrones_apilados
-import matplotlib.transforms as mtransforms
+
+# core.estadisticas, core.mp_workers, scipy y la sub-pestaña (matplotlib) se
+# importan dentro de cada método: este módulo se carga al arrancar la ventana
+# y solo tiene que armar el menú.
+
+# Texto del selector -> variante de core.estadisticas.VARIANTES_MULTIESCALA
+VARIANTES_MULTIESCALA = {
+    "Estándar (MPE)": "estandar",
+    "Compuesta (CMPE)": "compuesta",
+    "Refinada (RCMPE)": "refinada",
+}
+
+# Texto del selector -> métrica de core.estadisticas.METRICAS_TRANSICIONES
+METRICAS_TRANSICIONES = {
+    "Entropía de aristas": ("entropia_aristas", "Entropía de aristas [nats]"),
+    "Prob. de autolazo": ("autolazos", "P(patrón se repite)"),
+    "Nodos": ("nodos", "Patrones distintos"),
+    "Aristas": ("aristas", "Transiciones distintas"),
+}
+
+# Texto del selector -> (medida de core.estadisticas.MEDIDAS_SINCRONIA, etiqueta del colorbar)
+MEDIDAS_SINCRONIA = {
+    "Información mutua": ("informacion_mutua", "I(X;Y) [nats]"),
+    "Tasa de coincidencia": ("coincidencia", "Fracción de patrones iguales"),
+}
+
+# Texto del selector -> (clave de core.estadisticas.METRICAS_HRV, etiqueta del eje Y)
+METRICAS_HRV = {
+    "SDNN": ("sdnn", "SDNN (ms)"),
+    "RMSSD": ("rmssd", "RMSSD (ms)"),
+    "pNN50": ("pnn50", "pNN50 (%)"),
+    "NN medio": ("media_nn", "NN medio (ms)"),
+    "LF (0.04-0.15 Hz)": ("lf", "LF (ms²)"),
+    "HF (0.15-0.4 Hz)": ("hf", "HF (ms²)"),
+    "LF/HF": ("lf_hf", "LF/HF"),
+}
+
+# Texto del selector -> tipo de core.estadisticas.TIPOS_SUSTITUTOS
+TIPOS_SUSTITUTOS = {
+    "Barajado": "barajado",
+    "Fases aleatorias": "fase",
+    "IAAFT": "iaaft",
+}
+
+# Texto del selector -> estimador de core.estadisticas.ESTIMADORES
+ESTIMADORES_BP = {
+    "Clásica": "clasica",
+    "Ponderada (WPE)": "ponderada",
+    "Amplitud (AAPE)": "amplitud",
+}
 
 
 class MenuEstadisticas:
+    # artistas de la envolvente de sustitutos sobre la curva de Bandt & Pompe
+    ARTISTAS_SUSTITUTOS = ("sust_banda", "sust_mediana")
+
     def __init__(self,mainwindow,menubar,notebook):
         self.mainwindow=mainwindow
         self.menubar = menubar
@@ -28,6 +80,14 @@ class MenuEstadisticas:
         stats_menu.add_command(label="IBI", command=lambda: self.open_stat_tab("IBI"))
         stats_menu.add_command(label = "tau(d) HeatMap", command = lambda: self.open_stat_tab("tau_d_heatmap"))
         stats_menu.add_command(label= "Patrones Apilados", command= lambda: self.open_stat_tab("patrones_apilados"))
+        stats_menu.add_command(label="Plano Complejidad-Entropía", command=lambda: self.open_stat_tab("plano_hc"))
+        stats_menu.add_command(label="Entropía Multiescala", command=lambda: self.open_stat_tab("multiescala"))
+        stats_menu.add_command(label="Patrones Faltantes", command=lambda: self.open_stat_tab("patrones_faltantes"))
+        stats_menu.add_command(label="Redes de Transición Ordinal", command=lambda: self.open_stat_tab("transiciones"))
+        stats_menu.add_command(label="Sincronía Ordinal (EDF)", command=lambda: self.open_stat_tab("sincronia"))
+        stats_menu.add_command(label="SampEn / ApEn", command=lambda: self.open_stat_tab("sampen_apen"))
+        stats_menu.add_command(label="DFA", command=lambda: self.open_stat_tab("dfa"))
+        stats_menu.add_command(label="PSD / Espectrograma", command=lambda: self.open_stat_tab("espectro"))
 
     def open_stat_tab(self, stat_name):
         """Abre una sub-pestaña de estadística en la pestaña actual."""
@@ -44,6 +104,7 @@ class MenuEstadisticas:
 
 
             # subtab = viewer_frame.add_stat_subtab(stat_name)
+            from ui.estadisticas.stat_subtab import AddStatSubtab
             subtab = AddStatSubtab(viewer_frame, stat_name)
             
             # Agregar controles específicos para la estadística
@@ -55,6 +116,22 @@ class MenuEstadisticas:
                 self.setup_tau_d_heatmap(viewer_frame,subtab)
             elif stat_name == "patrones_apilados":
                 self.setup_patrones_apilados(viewer_frame,subtab)
+            elif stat_name == "plano_hc":
+                self.setup_plano_hc(viewer_frame, subtab)
+            elif stat_name == "multiescala":
+                self.setup_multiescala(viewer_frame, subtab)
+            elif stat_name == "patrones_faltantes":
+                self.setup_patrones_faltantes(viewer_frame, subtab)
+            elif stat_name == "transiciones":
+                self.setup_transiciones(viewer_frame, subtab)
+            elif stat_name == "sincronia":
+                self.setup_sincronia(viewer_frame, subtab)
+            elif stat_name == "sampen_apen":
+                self.setup_sampen_apen(viewer_frame, subtab)
+            elif stat_name == "dfa":
+                self.setup_dfa(viewer_frame, subtab)
+            elif stat_name == "espectro":
+                self.setup_espectro(viewer_frame, subtab)
         else:
             messagebox.showinfo("Error", "No hay contenido en la pestaña seleccionada.")
 
@@ -63,11 +140,34 @@ class MenuEstadisticas:
         current_tab = self.notebook.nametowidget(self.notebook.select())
 
         for child in current_tab.winfo_children():
-            if isinstance(child, (EDFViewerFrame, MatViewerFrame)):
+            if getattr(child, "TIPO", None) in ("edf", "mat"):
                 return child
         return None
 
-    def run_bandt_pompe(self, tab, tau, dim, step, win):
+    def _codigos_senal(self, viewer, signal):
+        """
+        Códigos de patrones ya calculados para la señal. La identidad queda
+        anotada en el visor para liberar esas entradas cuando se cierre.
+        """
+        ident = identidad_senal(signal)
+        viewer.identidades.add(ident)
+        return cache_patrones.exportar(ident)
+
+    def _clave_cache(self, viewer, funcion, **parametros):
+        """
+        Clave de la caché en disco para la señal actual del visor, o None si
+        la señal no tiene una identidad estable (p.ej. el archivo ya no existe).
+        """
+        try:
+            clave_senal = viewer.get_current_signal_key()
+        except OSError:
+            return None
+        if clave_senal is None:
+            return None
+        huella, canal = clave_senal
+        return clave_resultado(huella, canal, funcion, **parametros)
+
+    def run_bandt_pompe(self, tab, tau, dim, step, win, todos=False, estimador="clasica"):
         # Obtener el viewer activo en la pestaña actual
         # edf_mat_frame = self.get_current_viewer()
         viewer = self.get_current_viewer()
@@ -76,6 +176,14 @@ class MenuEstadisticas:
             messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
             return
 
+        # el estimador clásico conserva las claves de caché de siempre
+        tab._bp_estimador = estimador
+        extra = {} if estimador == "clasica" else {"estimador": estimador}
+
+        if todos:
+            self.run_bandt_pompe_canales(viewer, tab, tau, dim, step, win, estimador, extra)
+            return
+
         signal = viewer.get_current_signal()
         
         if signal is None:
@@ -84,10 +192,20 @@ class MenuEstadisticas:
         
         signal = np.asarray(signal, dtype=float)
 
+        # -------------------- caché en disco --------------------
+        clave = self._clave_cache(viewer, "band_and_pompe", D=dim, tau=tau, window=win, step=step, **extra)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_bandt_pompe(tab, (cacheado["freqs"], cacheado["Hnorm"], cacheado["times"]))
+            return
+
         # -------------------- multiprocessing --------------------
+        codigos = self._codigos_senal(viewer, signal)
+
         queue = Queue()
+        from core.mp_workers import worker_bandt_pompe
         p = Process(target=worker_bandt_pompe,
-                    args=(signal, dim, tau, win, step, queue))
+                    args=(signal, dim, tau, win, step, queue, clave, codigos, estimador))
         p.start()
 
         tab.mp_process = p
@@ -101,35 +219,174 @@ class MenuEstadisticas:
 
 
     def _check_bandt_pompe(self, tab):
-        if tab.mp_queue.empty():
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
             tab.after(150, lambda: self._check_bandt_pompe(tab))
             return
 
-        status, payload = tab.mp_queue.get()
-
-        try:
-            tab.mp_process.join(timeout=0.1)
-        except:
-            pass
+        status, payload = resultado
 
         if status == "error":
             messagebox.showerror("Error Bandt & Pompe", payload)
             return
 
+        self._plot_bandt_pompe(tab, payload)
+
+        if hasattr(tab, "enable_controls"):
+            tab.enable_controls()
+
+    @medido("render.bandt_pompe")
+    def _plot_bandt_pompe(self, tab, payload):
         freqs, Hnorm, times = payload
 
-        tab.ax.clear()
-        tab.ax.plot(Hnorm, linewidth=1)
-        tab.ax.set_title("Entropía Bandt & Pompe (normalizada)")
-        tab.ax.set_xlabel("Ventana")
-        tab.ax.set_ylabel("H_norm")
+        lienzo = lienzo_de(tab)
+        lienzo.usar("curva")
+        # una envolvente de sustitutos anterior no corresponde a esta curva
+        lienzo.quitar(*self.ARTISTAS_SUSTITUTOS)
+        if tab.ax.get_legend() is not None:
+            tab.ax.get_legend().remove()
+        lienzo.linea("Hnorm", np.arange(len(Hnorm)), Hnorm, linewidth=1)
+        lienzo.textos(self._titulo_bp(tab), "Ventana", "H_norm")
         tab.ax.grid(True)
-        tab.canvas.draw()
+        lienzo.redibujar()
+
+    # ---------------- Modo todos los canales (solo EDF) ----------------
+    def _canales_edf(self, viewer):
+        """Devuelve (path, nombres de canal) si el visor es un EDF, sino None."""
+        if getattr(viewer, "TIPO", None) != "edf":
+            messagebox.showinfo("Atención", "El modo 'todos los canales' solo está disponible para archivos EDF.")
+            return None
+        return viewer.path, list(viewer.ch_names)
+
+    def _claves_cache_canales(self, viewer, ch_names, funcion, **parametros):
+        """Una clave de caché por canal del EDF (None si no se pudo leer la huella)."""
+        try:
+            huella = viewer.get_huella()
+        except OSError:
+            return None
+        return [clave_resultado(huella, ch, funcion, **parametros) for ch in ch_names]
+
+    def run_bandt_pompe_canales(self, viewer, tab, tau, dim, step, win, estimador="clasica", extra=None):
+        canales_edf = self._canales_edf(viewer)
+        if canales_edf is None:
+            return
+        path, ch_names = canales_edf
 
-        if hasattr(tab, "enable_controls"):
+        claves = self._claves_cache_canales(viewer, ch_names, "band_and_pompe",
+                                            D=dim, tau=tau, window=win, step=step, **(extra or {}))
+
+        queue = Queue()
+        from core.mp_workers import worker_bandt_pompe_canales
+        p = Process(target=worker_bandt_pompe_canales,
+                    args=(path, list(range(len(ch_names))), dim, tau, win, step, queue, None, claves,
+                          estimador))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+        tab._ch_names = ch_names
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+        tab.set_estado(f"Procesando 0/{len(ch_names)} canales...")
+
+        self._check_bandt_pompe_canales(tab)
+
+    def _recibir_resultado(self, tab):
+        """
+        Consume los mensajes pendientes de la cola del worker. Los mensajes de
+        progreso actualizan la línea de estado, los de códigos alimentan la
+        caché de patrones, los de tiempos van al registro de perfilado y los
+        parciales a tab.al_parcial; devuelve (status, payload) cuando llega el
+        resultado final, o None si todavía no terminó.
+        """
+        while not tab.mp_queue.empty():
+            with tramo("cola.get"):
+                status, payload = tab.mp_queue.get()
+            if status == "tiempos":
+                perfilado.importar(payload)
+                continue
+            if status == "progreso":
+                hechos, total = payload[:2]
+                unidad = payload[2] if len(payload) > 2 else "canales"
+                tab.set_estado(f"Procesando {hechos}/{total} {unidad}...")
+                continue
+            if status == "codigos":
+                ident, entradas = payload
+                cache_patrones.importar(ident, entradas)
+                continue
+            if status == "parcial":
+                # resultado intermedio: lo dibuja quien lanzó el worker
+                tab.al_parcial(payload)
+                continue
+            try:
+                tab.mp_process.join(timeout=0.1)
+            except:
+                pass
+            tab.set_estado("")
+            return status, payload
+        return None
+
+    def _check_bandt_pompe_canales(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_bandt_pompe_canales(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error Bandt & Pompe", payload)
             tab.enable_controls()
+            return
+
+        self._plot_bandt_pompe_canales(tab, payload)
+        tab.enable_controls()
+
+    def _titulo_bp(self, tab):
+        estimador = getattr(tab, "_bp_estimador", "clasica")
+        if estimador == "clasica":
+            return "Entropía Bandt & Pompe (normalizada)"
+        nombre = next(k for k, v in ESTIMADORES_BP.items() if v == estimador)
+        return f"Entropía Bandt & Pompe (normalizada) — {nombre}"
+
+    def _replot_bandt_pompe_canales(self, tab):
+        matriz = getattr(tab, "bandt_pompe_canales_data", None)
+        if matriz is not None:
+            self._plot_bandt_pompe_canales(tab, matriz)
+
+    @medido("render.bandt_pompe_canales")
+    def _plot_bandt_pompe_canales(self, tab, matriz):
+        tab.bandt_pompe_canales_data = matriz
+        ch_names = tab._ch_names
+
+        lienzo = lienzo_de(tab)
+        lienzo.usar("imagen")
+        lienzo.imagen_piramide(matriz, self._agregacion(tab), etiqueta="H_norm",
+                               cmap='jet', interpolation='nearest')
 
+        ax = tab.ax
+        ax.set_yticks(np.arange(len(ch_names)))
+        ax.set_yticklabels(ch_names, fontsize=7)
+        lienzo.textos(self._titulo_bp(tab) + " por canal", "Ventana", "Canal")
+        lienzo.redibujar()
+
+
+
+    def _control_agregacion(self, controls, subtab, row, column, redibujar):
+        """
+        Selector de cómo se reducen las ventanas de los mapas de calor grandes
+        (pirámide de resoluciones): máximo o media. Al cambiarlo se redibuja.
+        """
+        ttk.Label(controls, text="Reducción de ventanas:").grid(row=row, column=column, padx=4, pady=2, sticky='e')
+        subtab.agregacion_var = tk.StringVar(value=AGREGACIONES[0])
+        combo = ttk.Combobox(controls, textvariable=subtab.agregacion_var, values=AGREGACIONES,
+                             state='readonly', width=7)
+        combo.grid(row=row, column=column + 1, padx=4, pady=2, sticky='w')
+        combo.bind("<<ComboboxSelected>>", lambda e: redibujar())
 
+    def _agregacion(self, tab):
+        var = getattr(tab, "agregacion_var", None)
+        return var.get() if var is not None else AGREGACIONES[0]
 
     def setup_bandt_pompe_controls(self, viewer, subtab):
         """Agrega controles específicos de Bandt & Pompe en la sub-pestaña."""
@@ -153,14 +410,57 @@ class MenuEstadisticas:
         win_var = tk.IntVar(value=100)
         ttk.Spinbox(controls, from_=10, to=1000, width=6, textvariable=win_var).grid(row=1, column=3, padx=4)
 
+        todos_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(controls, text="Todos los canales (EDF)", variable=todos_var).grid(
+            row=2, column=0, columnspan=2, padx=4, sticky='w')
+
+        self._control_agregacion(controls, subtab, 3, 0, lambda: self._replot_bandt_pompe_canales(subtab))
+
+        ttk.Label(controls, text="Estimador:").grid(row=4, column=0, padx=4, pady=2, sticky='e')
+        estimador_var = tk.StringVar(value="Clásica")
+        ttk.Combobox(controls, textvariable=estimador_var, values=list(ESTIMADORES_BP),
+                     state='readonly', width=16).grid(row=4, column=1, columnspan=2, padx=4, sticky='w')
+
         ttk.Button(controls, text="Calcular",
                             command=lambda: self.run_bandt_pompe(
                                 subtab,
                                 tau_var.get(),
                                 dim_var.get(),
                                 step_var.get(),
-                                win_var.get()
-                            )).grid(row=2, column=0, columnspan=4, pady=6)
+                                win_var.get(),
+                                todos_var.get(),
+                                ESTIMADORES_BP[estimador_var.get()]
+                            )).grid(row=2, column=2, columnspan=2, pady=6)
+
+        # ---- prueba con sustitutos: mismos parámetros que la curva ----
+        sust = ttk.LabelFrame(subtab.controls_frame, text="Prueba con sustitutos")
+        sust.pack(fill="x", padx=2, pady=4)
+
+        ttk.Label(sust, text="Cantidad:").grid(row=0, column=0, padx=4, pady=2)
+        n_var = tk.IntVar(value=100)
+        ttk.Spinbox(sust, from_=10, to=10000, width=6, textvariable=n_var).grid(row=0, column=1, padx=4)
+
+        ttk.Label(sust, text="Semilla:").grid(row=0, column=2, padx=4, pady=2)
+        semilla_var = tk.IntVar(value=0)
+        ttk.Spinbox(sust, from_=0, to=2**31 - 1, width=8, textvariable=semilla_var).grid(row=0, column=3, padx=4)
+
+        ttk.Label(sust, text="Tipo:").grid(row=1, column=0, padx=4, pady=2)
+        tipo_var = tk.StringVar(value=next(iter(TIPOS_SUSTITUTOS)))
+        ttk.Combobox(sust, textvariable=tipo_var, values=list(TIPOS_SUSTITUTOS),
+                     state='readonly', width=16).grid(row=1, column=1, columnspan=2, padx=4, sticky='w')
+
+        ttk.Button(sust, text="Calcular sustitutos",
+                   command=lambda: self.run_sustitutos(
+                       subtab,
+                       tau_var.get(),
+                       dim_var.get(),
+                       step_var.get(),
+                       win_var.get(),
+                       ESTIMADORES_BP[estimador_var.get()],
+                       n_var.get(),
+                       TIPOS_SUSTITUTOS[tipo_var.get()],
+                       semilla_var.get()
+                   )).grid(row=2, column=0, columnspan=4, pady=6)
 
     def setup_IBI_controls(self, viewer, subtab):
         controls_frame = subtab.controls_frame
@@ -202,6 +502,40 @@ class MenuEstadisticas:
                 )
                 ).grid(row=3, column=0, columnspan=2, pady=6, padx=4, sticky='ew')
 
+        # ---- HRV sobre los latidos detectados ----
+        hrv_controls = ttk.LabelFrame(controls_frame, text="Variabilidad de la frecuencia cardíaca (HRV)")
+        hrv_controls.pack(fill="x", padx=2, pady=4)
+        ttk.Label(hrv_controls, text="Ventana (s):").grid(row=0, column=0, padx=4, pady=2, sticky='e')
+        ventana_var = tk.DoubleVar(value=300.0)
+        ttk.Spinbox(hrv_controls, from_=30, to=86400, width=8, textvariable=ventana_var).grid(row=0, column=1, padx=4, sticky='w')
+        ttk.Label(hrv_controls, text="Paso (s):").grid(row=0, column=2, padx=4, pady=2, sticky='e')
+        paso_var = tk.DoubleVar(value=30.0)
+        ttk.Spinbox(hrv_controls, from_=1, to=86400, width=8, textvariable=paso_var).grid(row=0, column=3, padx=4, sticky='w')
+        ttk.Label(hrv_controls, text="Ectópicos (% de la mediana local):").grid(row=1, column=0, columnspan=2, padx=4, pady=2, sticky='e')
+        umbral_var = tk.DoubleVar(value=20.0)
+        ttk.Spinbox(hrv_controls, from_=1, to=100, width=6, textvariable=umbral_var).grid(row=1, column=2, padx=4, sticky='w')
+
+        # la métrica solo cambia el dibujo, no recalcula
+        ttk.Label(hrv_controls, text="Métrica:").grid(row=2, column=0, padx=4, pady=2, sticky='e')
+        subtab.metrica_hrv_var = tk.StringVar(value=next(iter(METRICAS_HRV)))
+        combo = ttk.Combobox(hrv_controls, textvariable=subtab.metrica_hrv_var, values=list(METRICAS_HRV),
+                             state='readonly', width=16)
+        combo.grid(row=2, column=1, columnspan=2, padx=4, sticky='w')
+        combo.bind("<<ComboboxSelected>>", lambda e: self._replot_hrv(subtab))
+
+        subtab.exportar_hrv_button = ttk.Button(hrv_controls, text="Exportar HRV (.csv / .mat)",
+                                                command=lambda: self.save_hrv(getattr(subtab, "hrv_data", None)),
+                                                state='disabled')
+        subtab.exportar_hrv_button.grid(row=3, column=2, columnspan=2, pady=6, padx=4, sticky='ew')
+        ttk.Button(hrv_controls, text="Calcular HRV",
+                   command=lambda: self.run_hrv(
+                       subtab,
+                       fs_var.get(),
+                       ventana_var.get(),
+                       paso_var.get(),
+                       umbral_var.get() / 100.0
+                   )).grid(row=3, column=0, columnspan=2, pady=6, padx=4, sticky='ew')
+
     def run_IBI(self, subtab, fs_value, title_text, xlabel_text, ylabel_text, save_button_ref):
         current_viewer = self.get_current_viewer()
         if current_viewer is None:
@@ -219,16 +553,18 @@ class MenuEstadisticas:
             messagebox.showerror("Error FS", str(e))
             return
         try:
-            ibi_data = calculate_ibi(
-                raw_signal=signal,
-                fs=fs,
-                tab_ax=subtab.ax,
-                tab_canvas=subtab.canvas,
-                plot_style_var='default',
-                title_var=title_text,
-                xlabel_var=xlabel_text,
-                ylabel_var=ylabel_text
-            )
+            from core.estadisticas import calculate_ibi
+            with tramo("ibi", n=len(signal)):
+                ibi_data = calculate_ibi(
+                    raw_signal=signal,
+                    fs=fs,
+                    tab_ax=subtab.ax,
+                    tab_canvas=subtab.canvas,
+                    plot_style_var='default',
+                    title_var=title_text,
+                    xlabel_var=xlabel_text,
+                    ylabel_var=ylabel_text
+                )
             subtab.ibi_data = ibi_data
             save_button_ref.config(state='normal')
         except Exception as e:
@@ -246,6 +582,7 @@ class MenuEstadisticas:
         if not file_path:
             return
         try:
+            from scipy.io import savemat
             data_dict = {"ibi_values_ms": ibi_data}
             savemat(file_path, data_dict)
             messagebox.showinfo("Éxito", f"Datos IBI guardados en:\n{file_path}")
@@ -254,6 +591,125 @@ class MenuEstadisticas:
         except Exception as e:
             messagebox.showerror("Error al guardar", f"Ocurrió un error al guardar el archivo: {e}")
 
+    def run_hrv(self, tab, fs_value, ventana_s, paso_s, umbral):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+        signal = viewer.get_current_signal()
+        if signal is None:
+            messagebox.showinfo("Atención", "No hay señal seleccionada.")
+            return
+        try:
+            fs = float(fs_value)
+            if fs <= 0:
+                raise ValueError("La frecuencia de muestreo debe ser un número positivo.")
+            if ventana_s <= 0 or paso_s <= 0:
+                raise ValueError("La ventana y el paso deben ser positivos.")
+        except ValueError as e:
+            messagebox.showerror("Error HRV", str(e))
+            return
+        signal = np.asarray(signal, dtype=float)
+
+        # -------------------- caché en disco --------------------
+        clave = self._clave_cache(viewer, "hrv", fs=fs, ventana=ventana_s, paso=paso_s, umbral=umbral)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_hrv(tab, cacheado)
+            return
+
+        # -------------------- multiprocessing --------------------
+        queue = Queue()
+        from core.mp_workers import worker_hrv
+        p = Process(target=worker_hrv, args=(signal, fs, ventana_s, paso_s, umbral, queue, clave))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+
+        self._check_hrv(tab)
+
+    def _check_hrv(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_hrv(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error HRV", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_hrv(tab, payload)
+        tab.enable_controls()
+
+    def _replot_hrv(self, tab):
+        datos = getattr(tab, "hrv_data", None)
+        if datos is not None:
+            self._plot_hrv(tab, datos)
+
+    @medido("render.hrv")
+    def _plot_hrv(self, tab, resultado):
+        tab.hrv_data = resultado
+        tab.exportar_hrv_button.config(state='normal')
+        clave, ylabel = METRICAS_HRV[tab.metrica_hrv_var.get()]
+        lienzo = lienzo_de(tab)
+        lienzo.usar("hrv")
+
+        if "inicios" in resultado:
+            minutos = resultado["inicios"] / 60.0
+            lienzo.linea("hrv", minutos, resultado[clave], linewidth=1)
+            lienzo.quitar("ectopicos")
+            lienzo.textos(f"HRV por ventanas — {tab.metrica_hrv_var.get()}", "Inicio de ventana (min)", ylabel)
+        else:
+            # registro más corto que una ventana: la serie NN con los ectópicos marcados
+            ibi, t, validos = resultado["ibi_ms"], resultado["tiempos"], resultado["validos"].astype(bool)
+            lienzo.linea("hrv", t / 60.0, np.where(validos, ibi, np.nan), linewidth=1)
+            lienzo.puntos("ectopicos", t[~validos] / 60.0, ibi[~validos], color="tab:red", s=12)
+            lienzo.textos("Serie NN (más corta que la ventana de HRV)", "Tiempo (min)", "IBI (ms)")
+        tab.ax.grid(True)
+        lienzo.redibujar()
+
+        g = {k: float(resultado[f"global_{k}"]) for k in ("sdnn", "rmssd", "pnn50", "lf", "hf", "lf_hf")}
+        ectopicos = int(np.count_nonzero(~resultado["validos"].astype(bool)))
+        tab.set_estado(f"SDNN = {g['sdnn']:.1f} ms   RMSSD = {g['rmssd']:.1f} ms   pNN50 = {g['pnn50']:.1f} %   "
+                       f"LF = {g['lf']:.0f} ms²   HF = {g['hf']:.0f} ms²   LF/HF = {g['lf_hf']:.2f}   "
+                       f"(ectópicos descartados: {ectopicos})")
+
+    def save_hrv(self, hrv_data):
+        if hrv_data is None:
+            messagebox.showinfo("Atención", "Primero debe calcular la HRV.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV (métricas por ventana)", "*.csv"), ("MATLAB files", "*.mat"), ("All Files", "*.*")],
+            title="Exportar HRV"
+        )
+        if not file_path:
+            return
+        try:
+            if file_path.lower().endswith(".mat"):
+                from scipy.io import savemat
+                savemat(file_path, {k: np.asarray(v) for k, v in hrv_data.items()})
+            else:
+                claves = [clave for clave, _ in METRICAS_HRV.values()]
+                if "inicios" in hrv_data:
+                    tabla = np.column_stack([hrv_data["inicios"]] + [hrv_data[k] for k in claves])
+                    primera = "inicio_s"
+                else:
+                    # sin ventanas: una sola fila con los valores globales
+                    tabla = np.array([[0.0] + [float(hrv_data[f"global_{k}"]) for k in claves]])
+                    primera = "global"
+                np.savetxt(file_path, tabla, delimiter=",", fmt="%.6g",
+                           header=",".join([primera] + claves), comments="")
+            messagebox.showinfo("Éxito", f"HRV exportada en:\n{file_path}")
+        except Exception as e:
+            messagebox.showerror("Error al guardar", f"Ocurrió un error al guardar el archivo: {e}")
+
     ########################################################################################
     # ----------------- Tau (d) HeatMap -------------------------------------------------- #
     ########################################################################################
@@ -321,6 +777,21 @@ class MenuEstadisticas:
         )
         save_button_ref.grid(row=5, column=3, columnspan=2, pady=6, padx=4, sticky='ew')
 
+        # Modo todos los canales: el resultado es un cubo (canal, tau, ventana)
+        # y el selector elige qué canal se muestra.
+        todos_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(controls, text="Todos los canales (EDF)", variable=todos_var).grid(
+            row=6, column=0, columnspan=2, padx=4, sticky='w')
+        ttk.Label(controls, text="Canal mostrado:").grid(row=6, column=2, padx=4, pady=2, sticky='e')
+        subtab._tau_canal_var = tk.StringVar()
+        subtab._tau_canal_combo = ttk.Combobox(controls, textvariable=subtab._tau_canal_var,
+                                               state='disabled', width=15)
+        subtab._tau_canal_combo.grid(row=6, column=3, padx=4, pady=2, sticky='w')
+        subtab._tau_canal_combo.bind("<<ComboboxSelected>>",
+                                     lambda e: self._plot_tau_d_cubo(subtab))
+
+        self._control_agregacion(controls, subtab, 7, 0, lambda: self._replot_tau_d(subtab))
+
         # Botón principal: calcula tau(d) heatmap
         ttk.Button(controls, text="Calcular y Graficar",
             command=lambda: self.run_tau_d_heatmap(
@@ -332,28 +803,51 @@ class MenuEstadisticas:
                 title_var.get(),
                 xlabel_var.get(),
                 ylabel_var.get(),
-                save_button_ref
+                save_button_ref,
+                todos_var.get()
             )
         ).grid(row=3, column=0, columnspan=2, pady=6, padx=4, sticky='ew')
 
 
 
-    def run_tau_d_heatmap(self, subtab, tau_max, dim, step, win, title_text, xlabel_text, ylabel_text, save_button_ref):
+    def run_tau_d_heatmap(self, subtab, tau_max, dim, step, win, title_text, xlabel_text, ylabel_text, save_button_ref, todos=False):
 
         current_viewer = self.get_current_viewer()
         if current_viewer is None:
             messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
             return
+
+        # guardo datos extra para graficar
+        subtab._tau_title = title_text
+        subtab._tau_xlabel = xlabel_text
+        subtab._tau_ylabel = ylabel_text
+        subtab._tau_save_btn = save_button_ref
+
+        if todos:
+            self.run_tau_d_heatmap_canales(current_viewer, subtab, tau_max, dim, step, win)
+            return
+
         signal = current_viewer.get_current_signal()
         if signal is None:
             messagebox.showinfo("Atención", "No hay señal seleccionada.")
             return
 
 
+        # -------------------- caché en disco --------------------
+        clave = self._clave_cache(current_viewer, "tau_d_heatmap",
+                                  D=dim, delay_max=tau_max, window=win, step=step)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_tau_d_heatmap(subtab, cacheado["mapa"])
+            return
+
         # -------------------- multiprocessing --------------------
+        codigos = self._codigos_senal(current_viewer, signal)
+
         queue = Queue()
+        from core.mp_workers import worker_tau_d_heatmap
         p = Process(target=worker_tau_d_heatmap,
-                    args=(signal, dim, tau_max, win, step, queue))
+                    args=(signal, dim, tau_max, win, step, queue, clave, codigos))
         p.start()
 
         subtab.mp_process = p
@@ -362,59 +856,129 @@ class MenuEstadisticas:
         if hasattr(subtab, "disable_controls"):
             subtab.disable_controls()
 
-        # guardo datos extra para graficar
-        subtab._tau_title = title_text
-        subtab._tau_xlabel = xlabel_text
-        subtab._tau_ylabel = ylabel_text
-        subtab._tau_save_btn = save_button_ref
-
         self._check_tau_d_heatmap(subtab)
 
-
-    def _check_tau_d_heatmap(self, subtab):
-        if subtab.mp_queue.empty():
-            subtab.after(150, lambda: self._check_tau_d_heatmap(subtab))
+    def run_tau_d_heatmap_canales(self, viewer, subtab, tau_max, dim, step, win):
+        canales_edf = self._canales_edf(viewer)
+        if canales_edf is None:
             return
+        path, ch_names = canales_edf
 
-        status, payload = subtab.mp_queue.get()
+        claves = self._claves_cache_canales(viewer, ch_names, "tau_d_heatmap",
+                                            D=dim, delay_max=tau_max, window=win, step=step)
 
-        try:
-            subtab.mp_process.join(timeout=0.1)
-        except:
-            pass
+        queue = Queue()
+        from core.mp_workers import worker_tau_d_heatmap_canales
+        p = Process(target=worker_tau_d_heatmap_canales,
+                    args=(path, list(range(len(ch_names))), dim, tau_max, win, step, queue, None, claves))
+        p.start()
+
+        subtab.mp_process = p
+        subtab.mp_queue = queue
+        subtab._ch_names = ch_names
 
+        if hasattr(subtab, "disable_controls"):
+            subtab.disable_controls()
+        subtab.set_estado(f"Procesando 0/{len(ch_names)} canales...")
+
+        self._check_tau_d_heatmap_canales(subtab)
+
+    def _check_tau_d_heatmap_canales(self, subtab):
+        resultado = self._recibir_resultado(subtab)
+        if resultado is None:
+            subtab.after(150, lambda: self._check_tau_d_heatmap_canales(subtab))
+            return
+
+        status, payload = resultado
         if status == "error":
             messagebox.showerror("Error tau(d) HeatMap", payload)
+            subtab.enable_controls()
             return
 
-        tau_d_heatmap_data = payload
-        subtab.tau_d_heatmap_data = tau_d_heatmap_data
+        subtab.tau_d_heatmap_data = payload      # cubo (n_canales, tau, ventana)
         subtab._tau_save_btn.config(state='normal')
 
-        ax = subtab.ax
-        ax.clear()
+        subtab._tau_canal_combo.config(values=subtab._ch_names, state='readonly')
+        if subtab._tau_canal_var.get() not in subtab._ch_names:
+            subtab._tau_canal_var.set(subtab._ch_names[0])
+        self._plot_tau_d_cubo(subtab)
 
-        im = ax.imshow(
-            tau_d_heatmap_data,
-            cmap='jet',
-            aspect='auto',
-            origin='lower'
+        subtab.enable_controls()
+
+    @medido("render.tau_d_cubo")
+    def _plot_tau_d_cubo(self, subtab):
+        """Grafica la rebanada (tau, ventana) del canal elegido en el selector."""
+        cubo = getattr(subtab, "tau_d_heatmap_data", None)
+        if cubo is None or cubo.ndim != 3:
+            return
+        canal = subtab._tau_canal_var.get()
+        idx = subtab._ch_names.index(canal)
+
+        # misma escala de color para todos los canales, para poder compararlos
+        lienzo = lienzo_de(subtab)
+        lienzo.usar("imagen")
+        lienzo.imagen_piramide(cubo, self._agregacion(subtab), indice=idx,
+                               vmin=np.nanmin(cubo), vmax=np.nanmax(cubo), cmap='jet')
+        lienzo.textos(f"{subtab._tau_title} — {canal}", subtab._tau_xlabel, subtab._tau_ylabel)
+        lienzo.redibujar()
+
+    def _replot_tau_d(self, subtab):
+        """Vuelve a dibujar el último mapa tau(d) (p.ej. al cambiar la agregación)."""
+        datos = getattr(subtab, "tau_d_heatmap_data", None)
+        if datos is None:
+            return
+        if datos.ndim == 3:
+            self._plot_tau_d_cubo(subtab)
+        else:
+            self._plot_tau_d_heatmap(subtab, datos)
+
+    def save_tau_d_heatmap_to_mat(self, tau_d_heatmap_data):
+        if tau_d_heatmap_data is None:
+            messagebox.showinfo("Atención", "Primero debe calcular el mapa tau(d).")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".mat",
+            filetypes=[("MATLAB files", "*.mat"), ("All Files", "*.*")],
+            title="Guardar mapa tau(d) como archivo .mat"
         )
+        if not file_path:
+            return
+        try:
+            from scipy.io import savemat
+            savemat(file_path, {"tau_d_heatmap": tau_d_heatmap_data})
+            messagebox.showinfo("Éxito", f"Mapa tau(d) guardado en:\n{file_path}")
+        except Exception as e:
+            messagebox.showerror("Error al guardar", f"Ocurrió un error al guardar el archivo: {e}")
 
-        if hasattr(subtab, "colorbar") and subtab.colorbar is not None:
-            subtab.colorbar.remove()
 
-        subtab.colorbar = ax.figure.colorbar(im, ax=ax)
+    def _check_tau_d_heatmap(self, subtab):
+        resultado = self._recibir_resultado(subtab)
+        if resultado is None:
+            subtab.after(150, lambda: self._check_tau_d_heatmap(subtab))
+            return
+
+        status, payload = resultado
 
-        ax.set_title(subtab._tau_title)
-        ax.set_xlabel(subtab._tau_xlabel)
-        ax.set_ylabel(subtab._tau_ylabel)
+        if status == "error":
+            messagebox.showerror("Error tau(d) HeatMap", payload)
+            return
 
-        subtab.canvas.draw()
+        self._plot_tau_d_heatmap(subtab, payload)
 
         if hasattr(subtab, "enable_controls"):
             subtab.enable_controls()
 
+    @medido("render.tau_d_heatmap")
+    def _plot_tau_d_heatmap(self, subtab, tau_d_heatmap_data):
+        subtab.tau_d_heatmap_data = tau_d_heatmap_data
+        subtab._tau_save_btn.config(state='normal')
+
+        lienzo = lienzo_de(subtab)
+        lienzo.usar("imagen")
+        lienzo.imagen_piramide(tau_d_heatmap_data, self._agregacion(subtab), cmap='jet')
+        lienzo.textos(subtab._tau_title, subtab._tau_xlabel, subtab._tau_ylabel)
+        lienzo.redibujar()
+
 #################################################################################################
 # ---- Distribucion de Patrones Apilados --------------------------------------------------------
     def setup_patrones_apilados(self, viewer, subtab):
@@ -455,6 +1019,14 @@ class MenuEstadisticas:
                                 win_var.get()
                             )).grid(row=2, column=0, columnspan=4, pady=6)
 
+        # patrones que nunca superan este porcentaje se agrupan en "otros"
+        ttk.Label(controls, text="Umbral 'otros' (%):").grid(row=3, column=0, padx=4, pady=2)
+        subtab.umbral_otros_var = tk.DoubleVar(value=1.0)
+        ttk.Spinbox(controls, from_=0, to=50, increment=0.5, width=6,
+                    textvariable=subtab.umbral_otros_var).grid(row=3, column=1, padx=4)
+        ttk.Button(controls, text="Redibujar",
+                   command=lambda: self._plot_patrones_apilados(subtab)).grid(row=3, column=2, columnspan=2, pady=4)
+
     def run_patrones_apilados(self,tab,tau_var,dim_var,step_var,win_var):
 
         # Obtener el viewer activo en la pestaña actual
@@ -472,10 +1044,21 @@ class MenuEstadisticas:
         
         signal = np.asarray(signal, dtype=float)
 
+        # ------------- caché en disco (misma entrada que Bandt & Pompe) -------------
+        clave = self._clave_cache(viewer, "band_and_pompe",
+                                  D=dim_var, tau=tau_var, window=win_var, step=step_var)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_patrones_apilados(tab, (cacheado["freqs"], dim_var))
+            return
+
         # -------------------- multiprocessing --------------------
+        codigos = self._codigos_senal(viewer, signal)
+
         queue = Queue()
+        from core.mp_workers import worker_patrones_apilados
         p = Process(target=worker_patrones_apilados,
-                    args=(signal, dim_var, tau_var, win_var, step_var, queue))
+                    args=(signal, dim_var, tau_var, win_var, step_var, queue, clave, codigos))
         p.start()
 
         tab.mp_process = p
@@ -489,64 +1072,1228 @@ class MenuEstadisticas:
 
     def _check_patrones_apilados(self, tab):
 
-        if tab.mp_queue.empty():
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
             tab.after(150, lambda: self._check_patrones_apilados(tab))
             return
 
-        status, payload = tab.mp_queue.get()
-
-        try:
-            tab.mp_process.join(timeout=0.1)
-        except:
-            pass
+        status, payload = resultado
 
         if status == "error":
             messagebox.showerror("Error Patrones Apilados", payload)
             return
 
-        n_windows, n_patterns, cum, indices, mid, colors, handles = payload
+        self._plot_patrones_apilados(tab, payload)
+
+        if hasattr(tab, "enable_controls"):
+            tab.enable_controls()
+
+    @medido("render.patrones_apilados")
+    def _plot_patrones_apilados(self, tab, payload=None):
+        """
+        Dibuja las bandas apiladas. Sin payload vuelve a dibujar las últimas
+        frecuencias (p.ej. al cambiar el umbral de "otros") sin recalcular.
+        """
+        from core.estadisticas import patrones_apilados
+
+        if payload is not None:
+            tab.patrones_freqs, tab.patrones_dim = payload
+        if getattr(tab, "patrones_freqs", None) is None:
+            return
+
+        umbral = max(tab.umbral_otros_var.get(), 0.0) / 100.0
+        cum, patrones, etiquetas = patrones_apilados(tab.patrones_freqs, tab.patrones_dim, umbral)
+        n_patterns = tab.patrones_freqs.shape[1]
+
+        # un solo artista (polígonos o imagen); las etiquetas salen al pasar el mouse
+        lienzo = lienzo_de(tab)
+        lienzo.apilado(cum, etiquetas, colores_patrones(patrones, n_patterns))
 
-        tab.ax.clear()
         ax = tab.ax
-        # Graficar áreas apiladas
-        for k in range(n_patterns):
-            ax.fill_between(indices,cum[:, k],cum[:, k+1],color=colors[k],alpha=0.85)
-        # Ajustes de ejes
         ax.set_ylim(-0.02, 1.02)
-        ax.set_xlim(0, n_windows - 1)
-        ax.set_ylabel('Frecuencia relativa (pₖ)')
-        ax.set_xlabel('Índice de ventana')
-        # Escribir índices al final de cada área
-        for k in range(n_patterns):
-            ax.text(n_windows - 1 + 0.3,mid[-1, k],f'{k}',va='center',fontsize=9)
-        # Construcción de leyenda
-        leg = ax.legend(
-            handles=handles,
-            bbox_to_anchor=(1.02, 1),
-            loc='upper left',
-            title="índice → orden"
-        )
+        ax.grid(True)
+        lienzo.textos("Frecuencia de Patrones Apilados", "Ventana", "Frecuencia relativa (pₖ)")
+
+        # un solo redibujado, cuando Tk quede libre
+        lienzo.redibujar(reescalar=False)
 
-        # --- AJUSTE FUNDAMENTAL ---
-        fig = ax.figure
 
-        # Ajustar márgenes para hacer espacio al legend
-        fig.tight_layout()
-        fig.subplots_adjust(right=0.82)   # empuja el gráfico hacia la izquierda
+#################################################################################################
+# ---- Plano Complejidad-Entropía ----------------------------------------------------------------
+    def setup_plano_hc(self, viewer, subtab):
+        controls = ttk.LabelFrame(subtab.controls_frame, text="Plano Complejidad-Entropía (Jensen-Shannon)")
+        controls.pack(fill="x", padx=2, pady=4)
 
-        # Forzar a Tkinter a recalcular el espacio visual del canvas
-        tab.canvas.get_tk_widget().update_idletasks()
+        ttk.Label(controls, text="Retardo:").grid(row=0, column=0, padx=4, pady=2)
+        tau_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=20, width=5, textvariable=tau_var).grid(row=0, column=1, padx=4)
 
-        # Redibujar
-        tab.canvas.draw()
+        ttk.Label(controls, text="Dimensión embedding:").grid(row=0, column=2, padx=4, pady=2)
+        dim_var = tk.IntVar(value=4)
+        ttk.Spinbox(controls, from_=2, to=10, width=5, textvariable=dim_var).grid(row=0, column=3, padx=4)
 
-        # leg.set_draggable(True) # permite mover el legend
-        tab.ax.set_title("Frecuencia de Patrones Apilados")
-        tab.ax.set_xlabel("Ventana")
-        tab.ax.set_ylabel("H_norm")
-        tab.ax.grid(True)
-        tab.canvas.draw()
+        ttk.Label(controls, text="Paso:").grid(row=1, column=0, padx=4, pady=2)
+        step_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=10, width=5, textvariable=step_var).grid(row=1, column=1, padx=4)
 
+        ttk.Label(controls, text="Ventana:").grid(row=1, column=2, padx=4, pady=2)
+        win_var = tk.IntVar(value=100)
+        ttk.Spinbox(controls, from_=10, to=1000, width=6, textvariable=win_var).grid(row=1, column=3, padx=4)
 
-        if hasattr(tab, "enable_controls"):
+        ttk.Button(controls, text="Calcular",
+                   command=lambda: self.run_plano_hc(
+                       subtab,
+                       tau_var.get(),
+                       dim_var.get(),
+                       step_var.get(),
+                       win_var.get()
+                   )).grid(row=2, column=0, columnspan=4, pady=6)
+
+    def run_plano_hc(self, tab, tau, dim, step, win):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+
+        signal = viewer.get_current_signal()
+        if signal is None:
+            messagebox.showinfo("Atención", "No hay señal seleccionada.")
+            return
+        signal = np.asarray(signal, dtype=float)
+
+        # ------------- caché en disco (misma entrada que Bandt & Pompe) -------------
+        clave = self._clave_cache(viewer, "band_and_pompe", D=dim, tau=tau, window=win, step=step)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            from core.estadisticas import complejidad_js
+            Hnorm = cacheado["Hnorm"]
+            self._plot_plano_hc(tab, (Hnorm, complejidad_js(cacheado["freqs"], Hnorm), dim))
+            return
+
+        # -------------------- multiprocessing --------------------
+        codigos = self._codigos_senal(viewer, signal)
+
+        queue = Queue()
+        from core.mp_workers import worker_complejidad
+        p = Process(target=worker_complejidad,
+                    args=(signal, dim, tau, win, step, queue, clave, codigos))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+
+        self._check_plano_hc(tab)
+
+    def _check_plano_hc(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_plano_hc(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error Complejidad-Entropía", payload)
             tab.enable_controls()
+            return
+
+        self._plot_plano_hc(tab, payload)
+        tab.enable_controls()
+
+    @medido("render.plano_hc")
+    def _plot_plano_hc(self, tab, payload):
+        """Cada ventana es un punto (H_norm, C), coloreado por su índice, entre las cotas teóricas."""
+        from core.estadisticas import curvas_complejidad
+        Hnorm, C, dim = payload
+        tab.plano_hc_data = (Hnorm, C)
+
+        (H_min, C_min), (H_max, C_max) = curvas_complejidad(math.factorial(dim))
+
+        lienzo = lienzo_de(tab)
+        lienzo.usar("plano_hc")
+        lienzo.linea("cota_min", H_min, C_min, color="gray", linestyle="--", linewidth=0.8)
+        lienzo.linea("cota_max", H_max, C_max, color="gray", linestyle="--", linewidth=0.8)
+        lienzo.puntos("ventanas", Hnorm, C, valores=np.arange(len(Hnorm)), etiqueta="Ventana",
+                      s=6, cmap="viridis")
+
+        ax = tab.ax
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, max(np.max(C_max), np.max(C, initial=0.0)) * 1.05)
+        ax.grid(True)
+        lienzo.textos(f"Plano Complejidad-Entropía (D={dim})", "Entropía normalizada H", "Complejidad C_JS")
+        lienzo.redibujar(reescalar=False)
+
+
+#################################################################################################
+# ---- Entropía Multiescala ---------------------------------------------------------------------
+    def setup_multiescala(self, viewer, subtab):
+        controls = ttk.LabelFrame(subtab.controls_frame, text="Entropía de permutaciones multiescala")
+        controls.pack(fill="x", padx=2, pady=4)
+
+        ttk.Label(controls, text="Retardo:").grid(row=0, column=0, padx=4, pady=2)
+        tau_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=20, width=5, textvariable=tau_var).grid(row=0, column=1, padx=4)
+
+        ttk.Label(controls, text="Dimensión embedding:").grid(row=0, column=2, padx=4, pady=2)
+        dim_var = tk.IntVar(value=4)
+        ttk.Spinbox(controls, from_=2, to=10, width=5, textvariable=dim_var).grid(row=0, column=3, padx=4)
+
+        ttk.Label(controls, text="Paso:").grid(row=1, column=0, padx=4, pady=2)
+        step_var = tk.IntVar(value=10)
+        ttk.Spinbox(controls, from_=1, to=10000, width=6, textvariable=step_var).grid(row=1, column=1, padx=4)
+
+        ttk.Label(controls, text="Ventana:").grid(row=1, column=2, padx=4, pady=2)
+        win_var = tk.IntVar(value=1000)
+        ttk.Spinbox(controls, from_=10, to=100000, width=7, textvariable=win_var).grid(row=1, column=3, padx=4)
+
+        ttk.Label(controls, text="Escala máxima:").grid(row=2, column=0, padx=4, pady=2)
+        escala_var = tk.IntVar(value=10)
+        ttk.Spinbox(controls, from_=1, to=100, width=5, textvariable=escala_var).grid(row=2, column=1, padx=4)
+
+        ttk.Label(controls, text="Variante:").grid(row=2, column=2, padx=4, pady=2)
+        variante_var = tk.StringVar(value=next(iter(VARIANTES_MULTIESCALA)))
+        ttk.Combobox(controls, textvariable=variante_var, values=list(VARIANTES_MULTIESCALA),
+                     state='readonly', width=16).grid(row=2, column=3, padx=4, sticky='w')
+
+        ttk.Label(controls, text="Estimador:").grid(row=3, column=0, padx=4, pady=2)
+        estimador_var = tk.StringVar(value="Clásica")
+        ttk.Combobox(controls, textvariable=estimador_var, values=list(ESTIMADORES_BP),
+                     state='readonly', width=16).grid(row=3, column=1, columnspan=2, padx=4, sticky='w')
+
+        self._control_agregacion(controls, subtab, 4, 0, lambda: self._replot_multiescala(subtab))
+
+        ttk.Button(controls, text="Calcular",
+                   command=lambda: self.run_multiescala(
+                       subtab,
+                       tau_var.get(),
+                       dim_var.get(),
+                       step_var.get(),
+                       win_var.get(),
+                       escala_var.get(),
+                       VARIANTES_MULTIESCALA[variante_var.get()],
+                       ESTIMADORES_BP[estimador_var.get()]
+                   )).grid(row=5, column=0, columnspan=4, pady=6)
+
+    def run_multiescala(self, tab, tau, dim, step, win, escala_max, variante, estimador):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+
+        signal = viewer.get_current_signal()
+        if signal is None:
+            messagebox.showinfo("Atención", "No hay señal seleccionada.")
+            return
+        signal = np.asarray(signal, dtype=float)
+        escalas = list(range(1, escala_max + 1))
+        tab._multiescala_variante = variante
+
+        # -------------------- caché en disco --------------------
+        extra = {} if estimador == "clasica" else {"estimador": estimador}
+        clave = self._clave_cache(viewer, "entropia_multiescala", D=dim, tau=tau, window=win, step=step,
+                                  escalas=escala_max, variante=variante, **extra)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_multiescala(tab, (cacheado["matriz"], escalas))
+            return
+
+        # -------------------- multiprocessing --------------------
+        codigos = self._codigos_senal(viewer, signal)
+
+        queue = Queue()
+        from core.mp_workers import worker_multiescala
+        p = Process(target=worker_multiescala,
+                    args=(signal, escalas, dim, tau, win, step, variante, estimador, queue, clave, codigos))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+        tab.set_estado(f"Procesando 0/{len(escalas)} escalas...")
+
+        self._check_multiescala(tab)
+
+    def _check_multiescala(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_multiescala(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error Entropía Multiescala", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_multiescala(tab, payload)
+        tab.enable_controls()
+
+    def _replot_multiescala(self, tab):
+        datos = getattr(tab, "multiescala_data", None)
+        if datos is not None:
+            self._plot_multiescala(tab, (datos, tab._multiescala_escalas))
+
+    @medido("render.multiescala")
+    def _plot_multiescala(self, tab, payload):
+        """Mapa de calor escala x ventana (mismas ventanas que Bandt & Pompe)."""
+        matriz, escalas = payload
+        tab.multiescala_data = matriz
+        tab._multiescala_escalas = escalas
+
+        lienzo = lienzo_de(tab)
+        lienzo.usar("imagen")
+        lienzo.imagen_piramide(matriz, self._agregacion(tab), etiqueta="H_norm",
+                               cmap='jet', interpolation='nearest')
+
+        ax = tab.ax
+        marcas = np.unique(np.linspace(0, len(escalas) - 1, min(len(escalas), 10)).astype(int))
+        ax.set_yticks(marcas)
+        ax.set_yticklabels([str(escalas[i]) for i in marcas])
+        variante = next(k for k, v in VARIANTES_MULTIESCALA.items()
+                        if v == getattr(tab, "_multiescala_variante", "estandar"))
+        lienzo.textos(f"Entropía multiescala — {variante}", "Ventana", "Escala")
+        lienzo.redibujar()
+
+
+#################################################################################################
+# ---- Patrones Faltantes -----------------------------------------------------------------------
+    def setup_patrones_faltantes(self, viewer, subtab):
+        controls = ttk.LabelFrame(subtab.controls_frame, text="Patrones faltantes / prohibidos")
+        controls.pack(fill="x", padx=2, pady=4)
+
+        ttk.Label(controls, text="Retardo:").grid(row=0, column=0, padx=4, pady=2)
+        tau_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=20, width=5, textvariable=tau_var).grid(row=0, column=1, padx=4)
+
+        ttk.Label(controls, text="Dimensión embedding:").grid(row=0, column=2, padx=4, pady=2)
+        dim_var = tk.IntVar(value=5)
+        ttk.Spinbox(controls, from_=2, to=10, width=5, textvariable=dim_var).grid(row=0, column=3, padx=4)
+
+        ttk.Label(controls, text="Paso:").grid(row=1, column=0, padx=4, pady=2)
+        step_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=10000, width=6, textvariable=step_var).grid(row=1, column=1, padx=4)
+
+        ttk.Label(controls, text="Ventana:").grid(row=1, column=2, padx=4, pady=2)
+        win_var = tk.IntVar(value=1000)
+        ttk.Spinbox(controls, from_=10, to=100000, width=7, textvariable=win_var).grid(row=1, column=3, padx=4)
+
+        ttk.Button(controls, text="Calcular",
+                   command=lambda: self.run_patrones_faltantes(
+                       subtab,
+                       tau_var.get(),
+                       dim_var.get(),
+                       step_var.get(),
+                       win_var.get()
+                   )).grid(row=2, column=0, columnspan=4, pady=6)
+
+    def run_patrones_faltantes(self, tab, tau, dim, step, win):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+
+        signal = viewer.get_current_signal()
+        if signal is None:
+            messagebox.showinfo("Atención", "No hay señal seleccionada.")
+            return
+        signal = np.asarray(signal, dtype=float)
+
+        # -------------------- caché en disco --------------------
+        clave = self._clave_cache(viewer, "patrones_faltantes", D=dim, tau=tau, window=win, step=step)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_patrones_faltantes(
+                tab, (cacheado["n_faltantes"], cacheado["ausentes"], cacheado["times"], dim))
+            return
+
+        # -------------------- multiprocessing --------------------
+        codigos = self._codigos_senal(viewer, signal)
+
+        queue = Queue()
+        from core.mp_workers import worker_patrones_faltantes
+        p = Process(target=worker_patrones_faltantes,
+                    args=(signal, dim, tau, win, step, queue, clave, codigos))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+
+        self._check_patrones_faltantes(tab)
+
+    def _check_patrones_faltantes(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_patrones_faltantes(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error Patrones Faltantes", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_patrones_faltantes(tab, payload)
+        tab.enable_controls()
+
+    @medido("render.patrones_faltantes")
+    def _plot_patrones_faltantes(self, tab, payload):
+        """
+        Patrones que no aparecen en cada ventana. La línea punteada marca los
+        que no aparecen en ninguna: ninguna ventana puede bajar de ahí.
+        """
+        n_faltantes, ausentes, times, dim = payload
+        tab.patrones_faltantes_data = (n_faltantes, ausentes)
+        n_patrones = math.factorial(dim)
+
+        lienzo = lienzo_de(tab)
+        lienzo.usar("patrones_faltantes")
+        x = np.arange(len(n_faltantes))
+        lienzo.linea("faltantes", x, n_faltantes, linewidth=1, label="Faltantes en la ventana")
+        lienzo.linea("ausentes", [0, max(len(x) - 1, 1)], [len(ausentes)] * 2,
+                     color="red", linestyle="--", linewidth=0.8,
+                     label=f"Prohibidos en toda la señal ({len(ausentes)})")
+
+        ax = tab.ax
+        ax.legend(loc="best")
+        ax.grid(True)
+        lienzo.textos(f"Patrones faltantes por ventana (D={dim}, {n_patrones} patrones)",
+                      "Ventana", "Patrones faltantes")
+        lienzo.redibujar()
+
+        if len(ausentes):
+            from core.estadisticas import patron_de_indice
+            nombres = [str(patron_de_indice(int(i), dim)) for i in ausentes[:8]]
+            resto = f" y {len(ausentes) - len(nombres)} más" if len(ausentes) > len(nombres) else ""
+            tab.set_estado("Prohibidos: " + ", ".join(nombres) + resto)
+        else:
+            tab.set_estado("Todos los patrones aparecen en alguna ventana.")
+
+
+#################################################################################################
+# ---- Redes de Transición Ordinal --------------------------------------------------------------
+    def setup_transiciones(self, viewer, subtab):
+        controls = ttk.LabelFrame(subtab.controls_frame, text="Redes de transición ordinal")
+        controls.pack(fill="x", padx=2, pady=4)
+
+        ttk.Label(controls, text="Retardo:").grid(row=0, column=0, padx=4, pady=2)
+        tau_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=20, width=5, textvariable=tau_var).grid(row=0, column=1, padx=4)
+
+        ttk.Label(controls, text="Dimensión embedding:").grid(row=0, column=2, padx=4, pady=2)
+        dim_var = tk.IntVar(value=5)
+        ttk.Spinbox(controls, from_=2, to=10, width=5, textvariable=dim_var).grid(row=0, column=3, padx=4)
+
+        ttk.Label(controls, text="Paso:").grid(row=1, column=0, padx=4, pady=2)
+        step_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=10000, width=6, textvariable=step_var).grid(row=1, column=1, padx=4)
+
+        ttk.Label(controls, text="Ventana:").grid(row=1, column=2, padx=4, pady=2)
+        win_var = tk.IntVar(value=1000)
+        ttk.Spinbox(controls, from_=10, to=100000, width=7, textvariable=win_var).grid(row=1, column=3, padx=4)
+
+        # cambiar de métrica solo redibuja: se calculan todas juntas
+        ttk.Label(controls, text="Métrica:").grid(row=2, column=0, padx=4, pady=2)
+        subtab.metrica_var = tk.StringVar(value=next(iter(METRICAS_TRANSICIONES)))
+        combo = ttk.Combobox(controls, textvariable=subtab.metrica_var, values=list(METRICAS_TRANSICIONES),
+                             state='readonly', width=20)
+        combo.grid(row=2, column=1, columnspan=2, padx=4, sticky='w')
+        combo.bind("<<ComboboxSelected>>", lambda e: self._replot_transiciones(subtab))
+
+        ttk.Button(controls, text="Calcular",
+                   command=lambda: self.run_transiciones(
+                       subtab,
+                       tau_var.get(),
+                       dim_var.get(),
+                       step_var.get(),
+                       win_var.get()
+                   )).grid(row=3, column=0, columnspan=4, pady=6)
+
+    def run_transiciones(self, tab, tau, dim, step, win):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+
+        signal = viewer.get_current_signal()
+        if signal is None:
+            messagebox.showinfo("Atención", "No hay señal seleccionada.")
+            return
+        signal = np.asarray(signal, dtype=float)
+
+        # -------------------- caché en disco --------------------
+        clave = self._clave_cache(viewer, "transiciones_ordinales", D=dim, tau=tau, window=win, step=step)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            from scipy.sparse import csr_matrix
+            from core.estadisticas import METRICAS_TRANSICIONES as METRICAS
+            n = math.factorial(dim)
+            red = csr_matrix((cacheado["red_conteos"], (cacheado["red_filas"], cacheado["red_columnas"])),
+                             shape=(n, n))
+            self._plot_transiciones(tab, ({k: cacheado[k] for k in METRICAS}, red, dim))
+            return
+
+        # -------------------- multiprocessing --------------------
+        codigos = self._codigos_senal(viewer, signal)
+
+        queue = Queue()
+        from core.mp_workers import worker_transiciones
+        p = Process(target=worker_transiciones,
+                    args=(signal, dim, tau, win, step, queue, clave, codigos))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+
+        self._check_transiciones(tab)
+
+    def _check_transiciones(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_transiciones(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error Redes de Transición", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_transiciones(tab, payload)
+        tab.enable_controls()
+
+    def _replot_transiciones(self, tab):
+        datos = getattr(tab, "transiciones_data", None)
+        if datos is not None:
+            self._plot_transiciones(tab, datos)
+
+    @medido("render.transiciones")
+    def _plot_transiciones(self, tab, payload):
+        """La métrica elegida por ventana; la red global se resume en la barra de estado."""
+        metricas, red, dim = payload
+        tab.transiciones_data = payload
+        clave, ylabel = METRICAS_TRANSICIONES[tab.metrica_var.get()]
+        valores = metricas[clave]
+
+        lienzo = lienzo_de(tab)
+        lienzo.usar("transiciones")
+        lienzo.linea("metrica", np.arange(len(valores)), valores, linewidth=1)
+        tab.ax.grid(True)
+        lienzo.textos(f"Red de transición ordinal — {tab.metrica_var.get()} (D={dim})", "Ventana", ylabel)
+        lienzo.redibujar()
+
+        total = red.sum()
+        nodos = np.count_nonzero(np.asarray(red.sum(axis=0)).ravel() + np.asarray(red.sum(axis=1)).ravel())
+        autolazos = red.diagonal().sum() / total if total else 0.0
+        tab.set_estado(f"Red global: {nodos} nodos, {red.nnz} aristas, "
+                       f"{int(total)} transiciones, autolazos {autolazos:.1%}")
+
+
+#################################################################################################
+# ---- Prueba con sustitutos (sobre la curva de Bandt & Pompe) ----------------------------------
+    def run_sustitutos(self, tab, tau, dim, step, win, estimador, n, tipo, semilla):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+
+        signal = viewer.get_current_signal()
+        if signal is None:
+            messagebox.showinfo("Atención", "No hay señal seleccionada.")
+            return
+        signal = np.asarray(signal, dtype=float)
+        tab._bp_estimador = estimador
+        tab._sustitutos_tipo = tipo
+
+        # -------------------- caché en disco --------------------
+        # con la misma semilla los sustitutos son los mismos: se puede guardar
+        extra = {} if estimador == "clasica" else {"estimador": estimador}
+        clave = self._clave_cache(viewer, "sustitutos", D=dim, tau=tau, window=win, step=step,
+                                  n=n, tipo=tipo, semilla=semilla, **extra)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_sustitutos(tab, (n, n, cacheado["Hnorm"], cacheado["envolventes"]))
+            return
+
+        # -------------------- multiprocessing --------------------
+        codigos = self._codigos_senal(viewer, signal)
+
+        queue = Queue()
+        from core.mp_workers import worker_sustitutos
+        p = Process(target=worker_sustitutos,
+                    args=(signal, n, tipo, dim, tau, win, step, estimador, semilla, queue),
+                    kwargs={"clave_cache": clave, "codigos": codigos})
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+        # la envolvente se va dibujando a medida que terminan los lotes
+        tab.al_parcial = lambda payload: self._plot_sustitutos(tab, payload)
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+        tab.set_estado(f"Procesando 0/{n} sustitutos...")
+
+        self._check_sustitutos(tab)
+
+    def _check_sustitutos(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_sustitutos(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error Sustitutos", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_sustitutos(tab, payload)
+        tab.enable_controls()
+
+    @medido("render.sustitutos")
+    def _plot_sustitutos(self, tab, payload):
+        """
+        Curva original sobre la franja 2.5–97.5 % de los sustitutos y su
+        mediana. Se llama con cada envolvente parcial y con la final.
+        """
+        hechos, total, Hnorm, (inferior, mediana, superior) = payload
+        x = np.arange(len(Hnorm))
+
+        lienzo = lienzo_de(tab)
+        lienzo.usar("curva")
+        lienzo.banda("sust_banda", x, inferior, superior, color="gray", alpha=0.3, linewidth=0,
+                     label="Sustitutos 2.5–97.5 %")
+        lienzo.linea("sust_mediana", x, mediana, color="gray", linewidth=0.8, linestyle="--",
+                     label="Mediana sustitutos")
+        lienzo.linea("Hnorm", x, Hnorm, linewidth=1, label="Señal")
+        tab.ax.legend(loc="best")
+        tab.ax.grid(True)
+        tipo = next(k for k, v in TIPOS_SUSTITUTOS.items() if v == tab._sustitutos_tipo)
+        lienzo.textos(f"{self._titulo_bp(tab)} vs. {hechos}/{total} sustitutos ({tipo})",
+                      "Ventana", "H_norm")
+        lienzo.redibujar()
+
+        if hechos == total:
+            debajo = np.mean(Hnorm < inferior)
+            encima = np.mean(Hnorm > superior)
+            tab.set_estado(f"Ventanas fuera de la envolvente: {debajo:.1%} por debajo, {encima:.1%} por encima")
+
+
+#################################################################################################
+# ---- Sincronía Ordinal entre canales (solo EDF) -----------------------------------------------
+    # milisegundos entre cuadros de la animación
+    INTERVALO_ANIMACION = 120
+
+    def setup_sincronia(self, viewer, subtab):
+        controls = ttk.LabelFrame(subtab.controls_frame, text="Sincronía ordinal entre canales")
+        controls.pack(fill="x", padx=2, pady=4)
+
+        ttk.Label(controls, text="Retardo:").grid(row=0, column=0, padx=4, pady=2)
+        tau_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=20, width=5, textvariable=tau_var).grid(row=0, column=1, padx=4)
+
+        ttk.Label(controls, text="Dimensión embedding:").grid(row=0, column=2, padx=4, pady=2)
+        dim_var = tk.IntVar(value=3)
+        ttk.Spinbox(controls, from_=2, to=7, width=5, textvariable=dim_var).grid(row=0, column=3, padx=4)
+
+        ttk.Label(controls, text="Paso:").grid(row=1, column=0, padx=4, pady=2)
+        step_var = tk.IntVar(value=100)
+        ttk.Spinbox(controls, from_=1, to=100000, width=7, textvariable=step_var).grid(row=1, column=1, padx=4)
+
+        ttk.Label(controls, text="Ventana:").grid(row=1, column=2, padx=4, pady=2)
+        win_var = tk.IntVar(value=1000)
+        ttk.Spinbox(controls, from_=10, to=100000, width=7, textvariable=win_var).grid(row=1, column=3, padx=4)
+
+        ttk.Label(controls, text="Medida:").grid(row=2, column=0, padx=4, pady=2)
+        medida_var = tk.StringVar(value=next(iter(MEDIDAS_SINCRONIA)))
+        ttk.Combobox(controls, textvariable=medida_var, values=list(MEDIDAS_SINCRONIA),
+                     state='readonly', width=20).grid(row=2, column=1, columnspan=2, padx=4, sticky='w')
+
+        ttk.Button(controls, text="Calcular",
+                   command=lambda: self.run_sincronia(
+                       subtab,
+                       tau_var.get(),
+                       dim_var.get(),
+                       step_var.get(),
+                       win_var.get(),
+                       medida_var.get()
+                   )).grid(row=3, column=0, columnspan=4, pady=6)
+
+        # ---- navegación por ventanas ----
+        nav = ttk.LabelFrame(subtab.controls_frame, text="Ventana")
+        nav.pack(fill="x", padx=2, pady=4)
+        subtab.ventana_var = tk.IntVar(value=0)
+        subtab.ventana_scale = tk.Scale(nav, from_=0, to=0, orient="horizontal", showvalue=True,
+                                        variable=subtab.ventana_var,
+                                        command=lambda v: self._plot_sincronia_ventana(subtab))
+        subtab.ventana_scale.pack(side="left", fill="x", expand=True, padx=4)
+        subtab.animando = False
+        subtab.boton_animar = ttk.Button(nav, text="Reproducir", command=lambda: self._alternar_animacion(subtab))
+        subtab.boton_animar.pack(side="right", padx=4)
+
+    def run_sincronia(self, tab, tau, dim, step, win, medida_texto):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+        canales_edf = self._canales_edf(viewer)
+        if canales_edf is None:
+            return
+        path, ch_names = canales_edf
+        medida = MEDIDAS_SINCRONIA[medida_texto][0]
+        self._detener_animacion(tab)
+        tab._sincronia_medida = medida_texto
+        tab._ch_names = ch_names
+
+        # -------------------- caché en disco (una entrada por archivo) --------------------
+        try:
+            clave = clave_resultado(viewer.get_huella(), "*", "sincronia_ordinal", D=dim, tau=tau,
+                                    window=win, step=step, medida=medida)
+        except OSError:
+            clave = None
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        # las entradas viejas guardaban el cubo entero: se recalculan
+        if cacheado is not None and "triangulo" in cacheado:
+            self._plot_sincronia(tab, cacheado)
+            return
+
+        # -------------------- multiprocessing --------------------
+        queue = Queue()
+        from core.mp_workers import worker_sincronia
+        p = Process(target=worker_sincronia,
+                    args=(path, list(range(len(ch_names))), dim, tau, win, step, medida, queue, None, clave))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+        tab.set_estado(f"Procesando 0/{len(ch_names)} canales...")
+
+        self._check_sincronia(tab)
+
+    def _check_sincronia(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_sincronia(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error Sincronía Ordinal", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_sincronia(tab, payload)
+        tab.enable_controls()
+
+    def _plot_sincronia(self, tab, resultado):
+        """
+        Guarda el resultado (triángulo superior y diagonal por ventana), fija
+        la escala de color común y muestra una ventana.
+        """
+        tab.sincronia_data = resultado
+        # misma escala en todas las ventanas para que la animación sea comparable;
+        # la diagonal de la información mutua (H(X)) no entra en la escala
+        triangulo, diagonal = resultado["triangulo"], resultado["diagonal"]
+        valores = triangulo if triangulo.shape[1] else diagonal
+        tab._sincronia_rango = (float(np.nanmin(valores)), float(np.nanmax(valores)))
+        n_ventanas = len(diagonal)
+        tab.ventana_scale.configure(to=max(n_ventanas - 1, 0))
+        tab.ventana_var.set(min(tab.ventana_var.get(), n_ventanas - 1))
+        self._plot_sincronia_ventana(tab)
+
+    @medido("render.sincronia")
+    def _plot_sincronia_ventana(self, tab):
+        from core.estadisticas import matriz_sincronia
+        resultado = getattr(tab, "sincronia_data", None)
+        if resultado is None:
+            return
+        k = int(tab.ventana_var.get())
+        vmin, vmax = tab._sincronia_rango
+        etiqueta = MEDIDAS_SINCRONIA[tab._sincronia_medida][1]
+        n_ventanas, C = resultado["diagonal"].shape
+        # solo se arma la matriz de la ventana que se muestra
+        matriz = matriz_sincronia(resultado["triangulo"][k], resultado["diagonal"][k])
+
+        lienzo = lienzo_de(tab)
+        nuevo = lienzo.tipo != "sincronia"
+        lienzo.usar("sincronia")
+        lienzo.imagen(matriz, etiqueta=etiqueta, vmin=vmin, vmax=vmax, cmap='viridis',
+                      interpolation='nearest', origin='upper', aspect='equal',
+                      extent=(-0.5, C - 0.5, C - 0.5, -0.5))
+        if nuevo:
+            nombres = tab._ch_names
+            marcas = np.arange(C) if C <= 32 else np.unique(np.linspace(0, C - 1, 16).astype(int))
+            tab.ax.set_xticks(marcas)
+            tab.ax.set_yticks(marcas)
+            tab.ax.set_xticklabels([nombres[i] for i in marcas], rotation=90, fontsize=7)
+            tab.ax.set_yticklabels([nombres[i] for i in marcas], fontsize=7)
+        lienzo.textos(f"{tab._sincronia_medida} — ventana {k + 1}/{n_ventanas}")
+        lienzo.redibujar(reescalar=False)
+
+    def _alternar_animacion(self, tab):
+        if tab.animando:
+            self._detener_animacion(tab)
+        elif getattr(tab, "sincronia_data", None) is not None:
+            tab.animando = True
+            tab.boton_animar.configure(text="Pausa")
+            self._avanzar_animacion(tab)
+
+    def _detener_animacion(self, tab):
+        tab.animando = False
+        tab.boton_animar.configure(text="Reproducir")
+
+    def _avanzar_animacion(self, tab):
+        if not tab.animando or not tab.winfo_exists():
+            return
+        n_ventanas = len(tab.sincronia_data["diagonal"])
+        tab.ventana_var.set((tab.ventana_var.get() + 1) % n_ventanas)
+        self._plot_sincronia_ventana(tab)
+        tab.after(self.INTERVALO_ANIMACION, lambda: self._avanzar_animacion(tab))
+
+
+#################################################################################################
+# ---- Entropía Muestral y Aproximada -----------------------------------------------------------
+    def setup_sampen_apen(self, viewer, subtab):
+        controls = ttk.LabelFrame(subtab.controls_frame, text="Entropía muestral (SampEn) y aproximada (ApEn)")
+        controls.pack(fill="x", padx=2, pady=4)
+
+        ttk.Label(controls, text="m (largo plantilla):").grid(row=0, column=0, padx=4, pady=2)
+        m_var = tk.IntVar(value=2)
+        ttk.Spinbox(controls, from_=1, to=10, width=5, textvariable=m_var).grid(row=0, column=1, padx=4)
+
+        ttk.Label(controls, text="r (× desvío):").grid(row=0, column=2, padx=4, pady=2)
+        r_var = tk.DoubleVar(value=0.2)
+        ttk.Spinbox(controls, from_=0.01, to=2.0, increment=0.05, width=6, textvariable=r_var).grid(
+            row=0, column=3, padx=4)
+
+        ttk.Label(controls, text="Paso:").grid(row=1, column=0, padx=4, pady=2)
+        step_var = tk.IntVar(value=500)
+        ttk.Spinbox(controls, from_=1, to=100000, width=7, textvariable=step_var).grid(row=1, column=1, padx=4)
+
+        ttk.Label(controls, text="Ventana:").grid(row=1, column=2, padx=4, pady=2)
+        win_var = tk.IntVar(value=2000)
+        ttk.Spinbox(controls, from_=20, to=100000, width=7, textvariable=win_var).grid(row=1, column=3, padx=4)
+
+        ttk.Button(controls, text="Calcular",
+                   command=lambda: self.run_sampen_apen(
+                       subtab,
+                       m_var.get(),
+                       r_var.get(),
+                       step_var.get(),
+                       win_var.get()
+                   )).grid(row=2, column=0, columnspan=4, pady=6)
+
+    def run_sampen_apen(self, tab, m, r_factor, step, win):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+
+        signal = viewer.get_current_signal()
+        if signal is None:
+            messagebox.showinfo("Atención", "No hay señal seleccionada.")
+            return
+        signal = np.asarray(signal, dtype=float)
+        tab._sampen_parametros = (m, r_factor)
+
+        # -------------------- caché en disco --------------------
+        clave = self._clave_cache(viewer, "sampen_apen", m=m, r=r_factor, window=win, step=step)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_sampen_apen(tab, (cacheado["sampen"], cacheado["apen"], cacheado["times"]))
+            return
+
+        # -------------------- multiprocessing --------------------
+        queue = Queue()
+        from core.mp_workers import worker_sampen_apen
+        p = Process(target=worker_sampen_apen,
+                    args=(signal, m, r_factor, win, step, queue, clave))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+        tab.set_estado("Procesando ventanas...")
+
+        self._check_sampen_apen(tab)
+
+    def _check_sampen_apen(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_sampen_apen(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error SampEn / ApEn", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_sampen_apen(tab, payload)
+        tab.enable_controls()
+
+    @medido("render.sampen_apen")
+    def _plot_sampen_apen(self, tab, payload):
+        sampen, apen, times = payload
+        tab.sampen_apen_data = (sampen, apen)
+        m, r_factor = tab._sampen_parametros
+        x = np.arange(len(sampen))
+
+        lienzo = lienzo_de(tab)
+        lienzo.usar("sampen_apen")
+        lienzo.linea("sampen", x, sampen, linewidth=1, label="SampEn")
+        lienzo.linea("apen", x, apen, linewidth=1, label="ApEn")
+        tab.ax.legend(loc="best")
+        tab.ax.grid(True)
+        lienzo.textos(f"Entropía muestral y aproximada (m={m}, r={r_factor:g}·σ)", "Ventana", "Entropía [nats]")
+        lienzo.redibujar()
+
+        sin_definir = int(np.isnan(sampen).sum())
+        if sin_definir:
+            tab.set_estado(f"SampEn sin definir en {sin_definir} ventanas (ninguna coincidencia de largo m+1)")
+
+
+#################################################################################################
+# ---- DFA (fluctuaciones sin tendencia) --------------------------------------------------------
+    FUENTES_DFA = ("IBI (picos R de la señal)", "Señal seleccionada")
+    VISTAS_DFA = ("F(n) log-log", "α1 / α2 por ventana")
+
+    def setup_dfa(self, viewer, subtab):
+        controls = ttk.LabelFrame(subtab.controls_frame, text="Análisis de fluctuaciones sin tendencia (DFA)")
+        controls.pack(fill="x", padx=2, pady=4)
+
+        ttk.Label(controls, text="Serie:").grid(row=0, column=0, padx=4, pady=2)
+        fuente_var = tk.StringVar(value=self.FUENTES_DFA[0])
+        ttk.Combobox(controls, textvariable=fuente_var, values=self.FUENTES_DFA,
+                     state='readonly', width=24).grid(row=0, column=1, columnspan=2, padx=4, sticky='w')
+
+        ttk.Label(controls, text="FS (Hz):").grid(row=0, column=3, padx=4, pady=2)
+        fs_var = tk.DoubleVar(value=getattr(viewer, "fs", 0.0) or 0.0)
+        ttk.Entry(controls, textvariable=fs_var, width=8).grid(row=0, column=4, padx=4, sticky='w')
+
+        ttk.Label(controls, text="Orden:").grid(row=1, column=0, padx=4, pady=2)
+        orden_var = tk.IntVar(value=1)
+        ttk.Spinbox(controls, from_=1, to=3, width=5, textvariable=orden_var).grid(row=1, column=1, padx=4)
+
+        ttk.Label(controls, text="Ventana (latidos):").grid(row=2, column=0, padx=4, pady=2)
+        win_var = tk.IntVar(value=2000)
+        ttk.Spinbox(controls, from_=64, to=1000000, width=8, textvariable=win_var).grid(row=2, column=1, padx=4)
+
+        ttk.Label(controls, text="Paso:").grid(row=2, column=2, padx=4, pady=2)
+        step_var = tk.IntVar(value=100)
+        ttk.Spinbox(controls, from_=1, to=100000, width=7, textvariable=step_var).grid(row=2, column=3, padx=4)
+
+        # la vista solo cambia el dibujo, no recalcula
+        ttk.Label(controls, text="Vista:").grid(row=3, column=0, padx=4, pady=2)
+        subtab.vista_dfa_var = tk.StringVar(value=self.VISTAS_DFA[0])
+        combo = ttk.Combobox(controls, textvariable=subtab.vista_dfa_var, values=self.VISTAS_DFA,
+                             state='readonly', width=20)
+        combo.grid(row=3, column=1, columnspan=2, padx=4, sticky='w')
+        combo.bind("<<ComboboxSelected>>", lambda e: self._replot_dfa(subtab))
+
+        ttk.Button(controls, text="Calcular",
+                   command=lambda: self.run_dfa(
+                       subtab,
+                       fuente_var.get() == self.FUENTES_DFA[0],
+                       fs_var.get(),
+                       orden_var.get(),
+                       win_var.get(),
+                       step_var.get()
+                   )).grid(row=4, column=0, columnspan=5, pady=6)
+
+    def run_dfa(self, tab, desde_ibi, fs, orden, win, step):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+
+        signal = viewer.get_current_signal()
+        if signal is None:
+            messagebox.showinfo("Atención", "No hay señal seleccionada.")
+            return
+        if desde_ibi and not fs > 0:
+            messagebox.showerror("Error FS", "La frecuencia de muestreo debe ser un número positivo.")
+            return
+        signal = np.asarray(signal, dtype=float)
+        fs = float(fs) if desde_ibi else None
+
+        # -------------------- caché en disco --------------------
+        clave = self._clave_cache(viewer, "dfa", fs=fs, orden=orden, window=win, step=step)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_dfa(tab, cacheado)
+            return
+
+        # -------------------- multiprocessing --------------------
+        queue = Queue()
+        from core.mp_workers import worker_dfa
+        p = Process(target=worker_dfa, args=(signal, fs, win, step, orden, queue, clave))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+
+        self._check_dfa(tab)
+
+    def _check_dfa(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_dfa(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error DFA", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_dfa(tab, payload)
+        tab.enable_controls()
+
+    def _replot_dfa(self, tab):
+        datos = getattr(tab, "dfa_data", None)
+        if datos is not None:
+            self._plot_dfa(tab, datos)
+
+    @medido("render.dfa")
+    def _plot_dfa(self, tab, resultado):
+        from core.estadisticas import RANGO_ALFA1, RANGO_ALFA2
+        tab.dfa_data = resultado
+        alfa1, alfa2 = float(resultado["alfa1"]), float(resultado["alfa2"])
+        lienzo = lienzo_de(tab)
+
+        if tab.vista_dfa_var.get() == self.VISTAS_DFA[0]:
+            escalas, F = resultado["escalas"], resultado["F"]
+            lienzo.usar("dfa_loglog")
+            lienzo.linea("F", escalas, F, linestyle="none", marker="o", markersize=4, label="F(n)")
+            # rectas de ajuste de cada rango, ancladas en la media geométrica de sus puntos
+            for nombre, rango, alfa, color in (("ajuste1", RANGO_ALFA1, alfa1, "tab:red"),
+                                               ("ajuste2", RANGO_ALFA2, alfa2, "tab:green")):
+                usar = (escalas >= rango[0]) & (escalas <= rango[1])
+                n = escalas[usar]
+                if len(n) >= 2 and np.isfinite(alfa):
+                    c = np.mean(np.log(F[usar])) - alfa * np.mean(np.log(n))
+                    lienzo.linea(nombre, n, np.exp(c) * n ** alfa, color=color, linewidth=1.2,
+                                 label=f"α{nombre[-1]} = {alfa:.3f} ({rango[0]}–{rango[1]})")
+                else:
+                    lienzo.quitar(nombre)
+            tab.ax.set_xscale("log")
+            tab.ax.set_yscale("log")
+            tab.ax.legend(loc="best")
+            tab.ax.grid(True, which="both", alpha=0.4)
+            lienzo.textos(f"DFA (n = {int(resultado['n'])})", "Tamaño de caja n", "F(n)")
+        else:
+            if "alfas" not in resultado:
+                messagebox.showinfo("Atención", "La serie es más corta que la ventana: no hay DFA por ventanas.")
+                tab.vista_dfa_var.set(self.VISTAS_DFA[0])
+                self._plot_dfa(tab, resultado)
+                return
+            alfas = resultado["alfas"]
+            x = np.arange(len(alfas))
+            lienzo.usar("dfa_ventanas")
+            lienzo.linea("alfa1", x, alfas[:, 0], linewidth=1, label="α1")
+            lienzo.linea("alfa2", x, alfas[:, 1], linewidth=1, label="α2")
+            tab.ax.legend(loc="best")
+            tab.ax.grid(True)
+            lienzo.textos("DFA por ventanas", "Ventana", "Exponente α")
+        lienzo.redibujar()
+        tab.set_estado(f"α1 = {alfa1:.3f}   α2 = {alfa2:.3f}")
+
+
+#################################################################################################
+# ---- PSD de Welch y espectrograma -------------------------------------------------------------
+    VISTAS_ESPECTRO = ("Espectrograma", "PSD (Welch)", "Potencia por bandas")
+    # rango dinámico del espectrograma en dB: por debajo, saturado al color mínimo
+    RANGO_DB = 100.0
+
+    def setup_espectro(self, viewer, subtab):
+        controls = ttk.LabelFrame(subtab.controls_frame, text="PSD de Welch y espectrograma")
+        controls.pack(fill="x", padx=2, pady=4)
+
+        ttk.Label(controls, text="FS (Hz):").grid(row=0, column=0, padx=4, pady=2)
+        fs_var = tk.DoubleVar(value=getattr(viewer, "fs", 0.0) or 0.0)
+        ttk.Entry(controls, textvariable=fs_var, width=8,
+                  state='readonly' if getattr(viewer, "TIPO", None) == "edf" else 'normal'
+                  ).grid(row=0, column=1, padx=4, sticky='w')
+
+        ttk.Label(controls, text="nperseg:").grid(row=1, column=0, padx=4, pady=2)
+        nperseg_var = tk.IntVar(value=512)
+        ttk.Spinbox(controls, from_=16, to=1 << 20, width=8, textvariable=nperseg_var).grid(row=1, column=1, padx=4)
+
+        ttk.Label(controls, text="Solape:").grid(row=1, column=2, padx=4, pady=2)
+        solape_var = tk.IntVar(value=256)
+        ttk.Spinbox(controls, from_=0, to=1 << 20, width=8, textvariable=solape_var).grid(row=1, column=3, padx=4)
+
+        # vista, frecuencia máxima y agregación solo cambian el dibujo, no recalculan
+        ttk.Label(controls, text="Vista:").grid(row=2, column=0, padx=4, pady=2)
+        subtab.vista_espectro_var = tk.StringVar(value=self.VISTAS_ESPECTRO[0])
+        combo = ttk.Combobox(controls, textvariable=subtab.vista_espectro_var, values=self.VISTAS_ESPECTRO,
+                             state='readonly', width=18)
+        combo.grid(row=2, column=1, columnspan=2, padx=4, sticky='w')
+        combo.bind("<<ComboboxSelected>>", lambda e: self._replot_espectro(subtab))
+
+        ttk.Label(controls, text="F máx. (Hz):").grid(row=3, column=0, padx=4, pady=2)
+        subtab.fmax_var = tk.DoubleVar(value=40.0)
+        ttk.Spinbox(controls, from_=1, to=100000, width=8, textvariable=subtab.fmax_var,
+                    command=lambda: self._replot_espectro(subtab)).grid(row=3, column=1, padx=4)
+
+        self._control_agregacion(controls, subtab, 4, 0, lambda: self._replot_espectro(subtab))
+
+        ttk.Button(controls, text="Calcular",
+                   command=lambda: self.run_espectro(
+                       subtab,
+                       fs_var.get(),
+                       nperseg_var.get(),
+                       solape_var.get()
+                   )).grid(row=5, column=0, columnspan=4, pady=6)
+
+    def run_espectro(self, tab, fs, nperseg, solape):
+        viewer = self.get_current_viewer()
+        if viewer is None:
+            messagebox.showerror("Error", "No se encontró un visor EDF o MAT en esta pestaña.")
+            return
+        if not fs > 0:
+            messagebox.showerror("Error FS", "La frecuencia de muestreo debe ser un número positivo.")
+            return
+        if nperseg < 2 or not 0 <= solape < nperseg:
+            messagebox.showerror("Error", "nperseg debe ser >= 2 y el solape menor que nperseg.")
+            return
+
+        # en un EDF el canal se lee por tramos en el worker: no se decodifica entero aquí
+        if getattr(viewer, "TIPO", None) == "edf":
+            if viewer.current_channel_idx is None:
+                messagebox.showinfo("Atención", "No hay señal seleccionada.")
+                return
+            fuente = (viewer.path, viewer.current_channel_idx)
+        else:
+            fuente = viewer.get_current_signal()
+            if fuente is None:
+                messagebox.showinfo("Atención", "No hay señal seleccionada.")
+                return
+            fuente = np.asarray(fuente, dtype=float)
+
+        # -------------------- caché en disco --------------------
+        clave = self._clave_cache(viewer, "espectro", fs=float(fs), nperseg=nperseg, solape=solape)
+        cacheado = cache_disco.obtener(clave) if clave is not None else None
+        if cacheado is not None:
+            self._plot_espectro(tab, cacheado)
+            return
+
+        # -------------------- multiprocessing --------------------
+        queue = Queue()
+        from core.mp_workers import worker_espectro
+        p = Process(target=worker_espectro, args=(fuente, float(fs), nperseg, solape, queue, None, clave))
+        p.start()
+
+        tab.mp_process = p
+        tab.mp_queue = queue
+
+        if hasattr(tab, "disable_controls"):
+            tab.disable_controls()
+
+        self._check_espectro(tab)
+
+    def _check_espectro(self, tab):
+        resultado = self._recibir_resultado(tab)
+        if resultado is None:
+            tab.after(150, lambda: self._check_espectro(tab))
+            return
+
+        status, payload = resultado
+        if status == "error":
+            messagebox.showerror("Error espectro", payload)
+            tab.enable_controls()
+            return
+
+        self._plot_espectro(tab, payload)
+        tab.enable_controls()
+
+    def _replot_espectro(self, tab):
+        datos = getattr(tab, "espectro_data", None)
+        if datos is not None:
+            self._plot_espectro(tab, datos)
+
+    def _espectro_db(self, tab, fmax):
+        """
+        Filas del espectrograma hasta fmax, en dB. Se guarda (desalojable) para
+        que la pirámide se reutilice entre redibujos.
+        """
+        def calcular():
+            datos = tab.espectro_data
+            filas = max(int(np.searchsorted(datos["f"], fmax, side="right")), 2)
+            with np.errstate(divide="ignore"):
+                return 10.0 * np.log10(datos["Sxx"][:filas])
+        return tab._derivados.obtener("db", calcular, parametros=fmax)
+
+    def _bandas_espectro(self, tab):
+        """Potencia por banda derivada del espectrograma ya calculado (no recalcula la STFT)."""
+        from core.estadisticas import potencia_bandas
+        datos = tab.espectro_data
+        return tab._derivados.obtener("bandas", lambda: potencia_bandas(datos["f"], datos["Sxx"]))
+
+    @medido("render.espectro")
+    def _plot_espectro(self, tab, resultado):
+        from matplotlib.ticker import FuncFormatter
+        from core.estadisticas import BANDAS_EEG
+        if getattr(tab, "espectro_data", None) is not resultado:
+            tab.espectro_data = resultado
+            if getattr(tab, "_derivados", None) is None:
+                tab._derivados = Derivados()
+            tab._derivados.vaciar()
+        f, t, psd = resultado["f"], resultado["t"], resultado["psd"]
+        try:
+            fmax = float(tab.fmax_var.get())
+        except (tk.TclError, ValueError):
+            fmax = float(f[-1])
+        vista = tab.vista_espectro_var.get()
+        lienzo = lienzo_de(tab)
+
+        if vista == self.VISTAS_ESPECTRO[0]:
+            db = self._espectro_db(tab, fmax)
+            vmax = float(np.nanmax(db[np.isfinite(db)], initial=0.0))
+            lienzo.usar("imagen")
+            lienzo.imagen_piramide(db, self._agregacion(tab), etiqueta="PSD (dB/Hz)",
+                                   vmin=vmax - self.RANGO_DB, vmax=vmax, cmap='viridis')
+            ax = tab.ax
+            # filas y columnas de la imagen son índices: se rotulan en Hz y segundos
+            df = f[1] - f[0]
+            dt = t[1] - t[0] if len(t) > 1 else 1.0
+            ax.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f"{y * df:.1f}"))
+            ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f"{t[0] + x * dt:.0f}"))
+            lienzo.textos("Espectrograma", "Tiempo (s)", "Frecuencia (Hz)")
+        elif vista == self.VISTAS_ESPECTRO[1]:
+            usar = f <= fmax
+            lienzo.usar("psd")
+            lienzo.linea("psd", f[usar], psd[usar], linewidth=1)
+            tab.ax.set_yscale("log")
+            tab.ax.grid(True, which="both", alpha=0.4)
+            lienzo.textos(f"PSD de Welch ({len(t)} segmentos)", "Frecuencia (Hz)", "PSD (unidades²/Hz)")
+        else:
+            bandas = self._bandas_espectro(tab)
+            lienzo.usar("bandas")
+            for (nombre, (f0, f1)), potencia in zip(BANDAS_EEG, bandas):
+                lienzo.linea(nombre, t / 60.0, potencia, linewidth=1, label=f"{nombre} ({f0:g}-{f1:g} Hz)")
+            tab.ax.set_yscale("log")
+            tab.ax.legend(loc="best")
+            tab.ax.grid(True, which="both", alpha=0.4)
+            lienzo.textos("Potencia por bandas", "Tiempo (min)", "Potencia (unidades²)")
+        lienzo.redibujar()
+        tab.set_estado(f"{len(t)} segmentos, resolución {f[1] - f[0]:.3g} Hz")
@@ -0,0 +1,55 @@
+import tkinter as tk
+from tkinter import simpledialog
+from core import perfilado
+from core.memoria import gestor_memoria
+from ui.rendimiento_window import RendimientoWindow
+
+
+class MenuRendimiento:
+    def __init__(self, mainwindow, root, menubar):
+        """
+        Menú para encender la instrumentación de tiempos (core.perfilado),
+        abrir el panel de rendimiento y fijar el presupuesto de memoria.
+        """
+        self.root = root
+        self.mainwindow = mainwindow
+        self.menubar = menubar
+        self.ventana = None
+
+        self.activo_var = tk.BooleanVar(value=perfilado.esta_activo())
+        self.memoria_var = tk.BooleanVar(value=perfilado.mide_memoria())
+        self._build_menu()
+
+    def _build_menu(self):
+        menu = tk.Menu(self.menubar, tearoff=0)
+        self.menubar.add_cascade(label="Rendimiento", menu=menu)
+
+        menu.add_checkbutton(label="Instrumentación activa", variable=self.activo_var,
+                             command=self._actualizar)
+        menu.add_checkbutton(label="Medir memoria (tracemalloc)", variable=self.memoria_var,
+                             command=self._actualizar)
+        menu.add_separator()
+        menu.add_command(label="Panel de rendimiento...", command=self.abrir_panel)
+        menu.add_command(label="Presupuesto de memoria...", command=self.pedir_presupuesto)
+
+    def _actualizar(self):
+        perfilado.activar(self.activo_var.get(), memoria=self.memoria_var.get())
+
+    def abrir_panel(self):
+        if self.ventana is not None and self.ventana.winfo_exists():
+            self.ventana.lift()
+            return
+        self.ventana = RendimientoWindow(self.root)
+
+    def pedir_presupuesto(self):
+        actual = int(gestor_memoria.presupuesto / (1024 * 1024))
+        mb = simpledialog.askinteger(
+            "Presupuesto de memoria",
+            "MB para datos re-derivables (canales decodificados y caché de patrones):",
+            initialvalue=actual, minvalue=64, parent=self.root
+        )
+        if mb is not None:
+            liberados = gestor_memoria.fijar_presupuesto(mb * 1024 * 1024)
+            if hasattr(self.mainwindow, "set_estado"):
+                self.mainwindow.set_estado(
+                    f"Presupuesto de memoria: {mb} MB ({liberados / 1e6:.0f} MB liberados)")
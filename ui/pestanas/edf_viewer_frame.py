@@ -7,42 +7,52 @@ import mne
 from scipy.io import savemat
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from ui.menu_sobre_pestanas.menu_sobre_pestanas import MenuSobrePestanas
-import pyedflib
+from core.cache_disco import huella_archivo
+from core.cache_patrones import cache_patrones
+from core.reader import CanalesEDF
+from core.perfilado import tramo, medido
+from utils.plotting import lienzo_de
 
 # ---------------------------
 # Ventana para archivos EDF
 # ---------------------------
 class EDFViewerFrame(ttk.Frame):
+    TIPO = "edf"   # lo usa MenuEstadisticas para reconocer visores sin importar esta clase
+
     def __init__(self, master, path):
         super().__init__(master)
+        self.path = path
+        self.huella = None   # huella de contenido para la caché de resultados
+        self.identidades = set()   # señales de este visor con entradas en la caché de patrones
 
-        try:
+        with tramo("abrir_edf", archivo=os.path.basename(path)):
             try:
-                # Primer intento
-                self.raw = mne.io.read_raw_edf(path, preload=False, verbose=False)
-            except Exception as e1:
-                if "invalid byte" in str(e1).lower():
-                    # Reintento con codificación Latin1
-                    try:
-                        self.raw = mne.io.read_raw_edf(path, preload=False, verbose=False, encoding="latin1")
-                        print(" Se releyó con encoding='latin1'\n")
-                    except Exception as e2:
-                        print(f" \n Error leyendo el archivo con latin1. Error: {e2} \n")
+                try:
+                    # Primer intento
+                    self.raw = mne.io.read_raw_edf(path, preload=False, verbose=False)
+                except Exception as e1:
+                    if "invalid byte" in str(e1).lower():
+                        # Reintento con codificación Latin1
+                        try:
+                            self.raw = mne.io.read_raw_edf(path, preload=False, verbose=False, encoding="latin1")
+                            print(" Se releyó con encoding='latin1'\n")
+                        except Exception as e2:
+                            print(f" \n Error leyendo el archivo con latin1. Error: {e2} \n")
+                            self.destroy()
+                            return 
+                    else:
+                        print(f" \n Error leyendo el archivo. Error: {e1} \n")
                         self.destroy()
                         return 
-                else:
-                    print(f" \n Error leyendo el archivo. Error: {e1} \n")
-                    self.destroy()
-                    return 
 
-        except Exception as e:
-            # Cualquier cosa inesperada (muy raro)
-            messagebox.showerror(
-                "Error",
-                f"Ocurrió un error inesperado al cargar el archivo EDF:\n\n{e}"
-            )
-            self.destroy()
-            return
+            except Exception as e:
+                # Cualquier cosa inesperada (muy raro)
+                messagebox.showerror(
+                    "Error",
+                    f"Ocurrió un error inesperado al cargar el archivo EDF:\n\n{e}"
+                )
+                self.destroy()
+                return
 
 
         # try:
@@ -72,7 +82,9 @@ class EDFViewerFrame(ttk.Frame):
 
 
         # señales y metadatos
-        self.data = self.raw.get_data()            # shape: (n_channels, n_samples)
+        # los canales se decodifican recién cuando se usan (ver core.reader.CanalesEDF)
+        self.canales = CanalesEDF(self.raw)
+        self.n_muestras = self.raw.n_times
         self.info = self.raw.info
         self.ch_names = self.info["ch_names"]
         self.fs = float(self.info["sfreq"])
@@ -119,7 +131,7 @@ class EDFViewerFrame(ttk.Frame):
         ttk.Label(info_frame, text=f"Archivo: {os.path.basename(path)}", font=("Segoe UI", 10, "bold")).pack(anchor="w")
         ttk.Label(info_frame, text=f"Canales: {len(self.ch_names)}").pack(anchor="w")
         ttk.Label(info_frame, text=f"Fs: {self.fs} Hz").pack(anchor="w")
-        ttk.Label(info_frame, text=f"Duración: {self.data.shape[1] / self.fs:.2f} s").pack(anchor="w")
+        ttk.Label(info_frame, text=f"Duración: {self.n_muestras / self.fs:.2f} s").pack(anchor="w")
 
         ttk.Separator(left, orient="horizontal").pack(fill="x", pady=6)
 
@@ -130,7 +142,7 @@ class EDFViewerFrame(ttk.Frame):
             self.tree.heading(c, text=c)
             self.tree.column(c, anchor="w", width=160)
         for idx, ch in enumerate(self.ch_names):
-            self.tree.insert("", "end", values=(ch, str(self.data[idx].shape)))
+            self.tree.insert("", "end", values=(ch, str((self.n_muestras,))))
         self.tree.pack(fill="y", expand=True)
         self.tree.bind("<Double-1>", lambda e: self.on_channel_select())
 
@@ -250,33 +262,36 @@ class EDFViewerFrame(ttk.Frame):
         self.current_channel_idx = idx
         self.plot_channel(idx)
 
+    @medido("render.canal_edf")
     def plot_channel(self, idx):
         """Grafica la señal completa del canal idx y aplica marcadores/etiquetas actuales."""
-        y = self.data[idx, :]
+        y = self.canales[idx]
         x = np.arange(len(y)) / self.fs
 
-        self.ax.clear()
-        self.ax.plot(x, y, linewidth=0.6, label=self.ch_names[idx])
-        self.ax.set_title(self.title_entry.get() if self.title_entry.get() else f"Canal: {self.ch_names[idx]}")
-        self.ax.set_xlabel(self.xlabel_entry.get() if self.xlabel_entry.get() else "Tiempo [s]")
-        self.ax.set_ylabel(self.ylabel_entry.get() if self.ylabel_entry.get() else "Amplitud")
+        # la curva se reutiliza entre canales: solo cambian sus datos
+        lienzo = lienzo_de(self)
+        lienzo.usar("curva")
+        lienzo.linea("senal", x, y, linewidth=0.6, label=self.ch_names[idx])
+        lienzo.textos(self.title_entry.get() if self.title_entry.get() else f"Canal: {self.ch_names[idx]}",
+                      self.xlabel_entry.get() if self.xlabel_entry.get() else "Tiempo [s]",
+                      self.ylabel_entry.get() if self.ylabel_entry.get() else "Amplitud")
         self.ax.grid(True)
 
         # dibujar marcadores verticales seleccionados
-        self.current_line_objs = []
-        for i, var in enumerate(self.marker_vars):
-            if var.get() == 1 and i < len(self.annotations):
-                onset = self.annotations[i]['onset']
-                line = self.ax.axvline(onset, color='red', linestyle='--', linewidth=1.2)
-                self.current_line_objs.append(line)
+        self._dibujar_marcadores()
 
         self.ax.legend()
-        self.canvas.draw()
+        lienzo.redibujar()
 
     def update_markers_on_plot(self):
         """Actualizar solo las líneas verticales sin replotear toda la señal (si canal ya está graficado)."""
         if self.current_channel_idx is None:
             return
+        self._dibujar_marcadores()
+        self.canvas.draw_idle()
+
+    def _dibujar_marcadores(self):
+        """Reemplaza las verticales de anotaciones por las seleccionadas (sin redibujar)."""
         # quitar líneas previas
         for ln in getattr(self, "current_line_objs", []):
             try:
@@ -290,7 +305,6 @@ class EDFViewerFrame(ttk.Frame):
                 onset = self.annotations[i]['onset']
                 line = self.ax.axvline(onset, color='red', linestyle='--', linewidth=1.2)
                 self.current_line_objs.append(line)
-        self.canvas.draw()
 
     def update_plot_labels(self):
         """Leer entradas y actualizar título/labels en el plot actual."""
@@ -300,7 +314,7 @@ class EDFViewerFrame(ttk.Frame):
         self.ax.set_title(self.title_entry.get() if self.title_entry.get() else f"Canal: {self.ch_names[self.current_channel_idx]}")
         self.ax.set_xlabel(self.xlabel_entry.get() if self.xlabel_entry.get() else "Tiempo [s]")
         self.ax.set_ylabel(self.ylabel_entry.get() if self.ylabel_entry.get() else "Amplitud")
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
     def save_selection_to_mat(self):
         """Guarda en .mat: señal completa del canal seleccionado, anotaciones seleccionadas, fs y nombre canal."""
@@ -311,7 +325,7 @@ class EDFViewerFrame(ttk.Frame):
         
         idx = self.current_channel_idx
         channel_name = self.ch_names[idx]
-        signal = self.data[idx, :]
+        signal = self.canales[idx]
 
         # recolectar marcadores seleccionados
         markers = []
@@ -339,4 +353,57 @@ class EDFViewerFrame(ttk.Frame):
         if self.current_channel_idx is None:
             return None
         idx = self.current_channel_idx
-        return self.data[idx, :]
+        return self.canales[idx]
+
+    def get_huella(self):
+        if self.huella is None:
+            self.huella = huella_archivo(self.path)
+        return self.huella
+
+    def get_current_signal_key(self):
+        """(huella del archivo, canal) de la señal actual, para la caché de resultados."""
+        if self.current_channel_idx is None:
+            return None
+        return self.get_huella(), self.ch_names[self.current_channel_idx]
+
+    def cerrar(self):
+        """
+        Libera el visor antes de cerrar su pestaña: cierra las sub-pestañas de
+        estadísticas (terminando sus cálculos), saca de la caché de patrones
+        las señales de este archivo, suelta los datos y la figura y destruye
+        los widgets. Devuelve los bytes liberados.
+        """
+        liberados = 0
+        notebook = getattr(self, "sub_notebook", None)
+        if notebook is not None:
+            for hijo in notebook.winfo_children():
+                if hasattr(hijo, "cerrar"):
+                    liberados += hijo.cerrar()
+        for ident in self.identidades:
+            liberados += cache_patrones.descartar_senal(ident)
+        self.identidades.clear()
+
+        canales = getattr(self, "canales", None)
+        if canales is not None:
+            liberados += canales.cerrar()
+            self.canales = None
+        raw = getattr(self, "raw", None)
+        if raw is not None:
+            raw.close()
+            self.raw = None
+        fig = getattr(self, "fig", None)
+        if fig is not None:
+            fig.clear()
+        self.fig = self.ax = self.canvas = None
+        self.current_line_objs = []
+        self.destroy()
+        return liberados
+
+    def uso_memoria(self):
+        """Bytes que ocupa esta pestaña: canales decodificados, caché de patrones y resultados."""
+        uso = self.canales.bytes_usados() if self.canales is not None else 0
+        uso += sum(cache_patrones.bytes_senal(i) for i in self.identidades)
+        for hijo in self.sub_notebook.winfo_children():
+            if hasattr(hijo, "uso_memoria"):
+                uso += hijo.uso_memoria()
+        return uso
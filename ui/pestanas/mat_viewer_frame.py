@@ -2,21 +2,30 @@ import os
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import numpy as np
-from scipy.io import loadmat, savemat
+from scipy.io import savemat
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import pandas as pd
 from ui.menu_sobre_pestanas.menu_sobre_pestanas import MenuSobrePestanas
+from core.cache_disco import huella_archivo
+from core.cache_patrones import cache_patrones
+from core.summarizer import nbytes_total
+from core.reader import VariablesMAT
+from core.perfilado import medido
+from utils.plotting import lienzo_de
 
 
 class MatViewerFrame(ttk.Frame):
+    TIPO = "mat"   # lo usa MenuEstadisticas para reconocer visores sin importar esta clase
+
     def __init__(self, master, path):
         super().__init__(master)
+        self.path = path
+        self.huella = None   # huella de contenido para la caché de resultados
+        self.identidades = set()   # señales de este visor con entradas en la caché de patrones
 
         try:
-            data = loadmat(path)
-            # quitar metadatos de MATLAB (__header__, __version__, __globals__)
-            self.data = {k: v for k, v in data.items() if not k.startswith("__")}
+            # variables desalojables: si el gestor de memoria las suelta se releen del archivo
+            self.data = VariablesMAT(path)
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo abrir el archivo .mat:\n{e}")
             self.destroy()
@@ -26,6 +35,7 @@ class MatViewerFrame(ttk.Frame):
         self.current_var = None
         self.current_data = None
         self.selected_vector = None
+        self.selected_label = None
 
         # --- Layout principal ---
         left = ttk.Frame(self, width=400)
@@ -65,12 +75,8 @@ class MatViewerFrame(ttk.Frame):
             self.tree.heading(c, text=c)
             self.tree.column(c, anchor="w", width=100)
 
-        for k, v in self.data.items():
-            try:
-                shape = str(np.shape(v))
-                tipo = type(v).__name__
-            except Exception:
-                shape, tipo = "-", "-"
+        for k in self.data.nombres:
+            shape, tipo = self.data.formas[k]
             self.tree.insert("", "end", values=(k, shape, tipo))
         self.tree.pack(fill="both", expand=True)
         self.tree.bind("<Double-1>", self.on_variable_select)
@@ -210,6 +216,7 @@ class MatViewerFrame(ttk.Frame):
 
 
     # -------------------------------------------------------------------------
+    @medido("render.vector_mat")
     def plot_vector(self, vec, label):
         """Grafica un vector 1D."""
         try:
@@ -219,15 +226,17 @@ class MatViewerFrame(ttk.Frame):
             return
 
         x = np.arange(len(y))
-        self.ax.clear()
-        self.ax.plot(x, y, linewidth=0.8)
-        self.ax.set_title(self.title_entry.get() or label)
-        self.ax.set_xlabel(self.xlabel_entry.get() or "Índice")
-        self.ax.set_ylabel(self.ylabel_entry.get() or "Valor")
+        lienzo = lienzo_de(self)
+        lienzo.usar("curva")
+        lienzo.linea("vector", x, y, linewidth=0.8)
+        lienzo.textos(self.title_entry.get() or label,
+                      self.xlabel_entry.get() or "Índice",
+                      self.ylabel_entry.get() or "Valor")
         self.ax.grid(True)
-        self.canvas.draw()
+        lienzo.redibujar()
 
         self.selected_vector = y
+        self.selected_label = label
 
     def show_text_content(self, varname, value):
         """Muestra arrays como tablas con scroll, o texto si no son arrays."""
@@ -250,6 +259,7 @@ class MatViewerFrame(ttk.Frame):
         if isinstance(value, np.ndarray):
 
             arr = value
+            import pandas as pd   # solo hace falta para esta tabla
 
             # Convertimos a dataframe según el número de dimensiones
             if arr.ndim == 1:
@@ -338,7 +348,7 @@ class MatViewerFrame(ttk.Frame):
         self.ax.set_title(self.title_entry.get() or self.ax.get_title())
         self.ax.set_xlabel(self.xlabel_entry.get() or "Índice")
         self.ax.set_ylabel(self.ylabel_entry.get() or "Valor")
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
 
     # -------------------------------------------------------------------------
@@ -367,4 +377,54 @@ class MatViewerFrame(ttk.Frame):
     def get_current_signal(self):
         if self.selected_vector is None:
             return None
-        return self.selected_vector
\ No newline at end of file
+        return self.selected_vector
+
+    def get_huella(self):
+        if self.huella is None:
+            self.huella = huella_archivo(self.path)
+        return self.huella
+
+    def get_current_signal_key(self):
+        """(huella del archivo, variable/selección) de la señal actual, para la caché de resultados."""
+        if self.selected_vector is None or self.selected_label is None:
+            return None
+        return self.get_huella(), self.selected_label
+
+    def cerrar(self):
+        """
+        Libera el visor antes de cerrar su pestaña: cierra las sub-pestañas de
+        estadísticas (terminando sus cálculos), saca de la caché de patrones
+        las señales de este archivo, suelta los datos y la figura y destruye
+        los widgets. Devuelve los bytes liberados.
+        """
+        liberados = 0
+        notebook = getattr(self, "sub_notebook", None)
+        if notebook is not None:
+            for hijo in notebook.winfo_children():
+                if hasattr(hijo, "cerrar"):
+                    liberados += hijo.cerrar()
+        for ident in self.identidades:
+            liberados += cache_patrones.descartar_senal(ident)
+        self.identidades.clear()
+
+        if getattr(self, "data", None) is not None:
+            liberados += self.data.cerrar()
+        nombres = ("data", "current_data", "selected_vector")
+        liberados += nbytes_total([getattr(self, n, None) for n in nombres[1:]])
+        for nombre in nombres:
+            setattr(self, nombre, None)
+        fig = getattr(self, "fig", None)
+        if fig is not None:
+            fig.clear()
+        self.fig = self.ax = self.canvas = None
+        self.destroy()
+        return liberados
+
+    def uso_memoria(self):
+        """Bytes que ocupa esta pestaña: variables del .mat, caché de patrones y resultados."""
+        uso = self.data.bytes_usados() + nbytes_total(self.selected_vector)
+        uso += sum(cache_patrones.bytes_senal(i) for i in self.identidades)
+        for hijo in self.sub_notebook.winfo_children():
+            if hasattr(hijo, "uso_memoria"):
+                uso += hijo.uso_memoria()
+        return uso
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import subprocess
+import tkinter as tk
+from tkinter import ttk, messagebox
+from core import perfilado
+
+# ---------------------------
+# Panel de rendimiento
+# ---------------------------
+class RendimientoWindow(tk.Toplevel):
+    """
+    Muestra los tramos medidos por core.perfilado: una tabla agregada por
+    nombre (cuántas veces, total, media, máximo, pico de memoria) y los
+    últimos tramos registrados. Se refresca sola cada segundo.
+    """
+    REFRESCO_MS = 1000
+    N_RECIENTES = 50
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Rendimiento")
+        self.geometry("820x560")
+
+        barra = ttk.Frame(self)
+        barra.pack(fill="x", padx=6, pady=4)
+        self.estado_var = tk.StringVar()
+        ttk.Label(barra, textvariable=self.estado_var).pack(side="left")
+        ttk.Button(barra, text="Abrir log", command=self.abrir_log).pack(side="right")
+        ttk.Button(barra, text="Limpiar", command=self.limpiar).pack(side="right", padx=4)
+
+        # --- resumen por nombre ---
+        ttk.Label(self, text="Resumen por tramo").pack(anchor="w", padx=6)
+        columnas = ("n", "total", "media", "maximo", "ultimo", "memoria")
+        self.tabla = ttk.Treeview(self, columns=columnas, height=10)
+        self.tabla.heading("#0", text="Tramo")
+        self.tabla.column("#0", width=220)
+        for col, texto in zip(columnas, ("N", "Total (s)", "Media (s)", "Máx (s)",
+                                          "Último (s)", "Pico mem (MB)")):
+            self.tabla.heading(col, text=texto)
+            self.tabla.column(col, width=90, anchor="e")
+        self.tabla.pack(fill="both", expand=True, padx=6, pady=(0, 6))
+
+        # --- últimos tramos ---
+        ttk.Label(self, text="Últimos tramos").pack(anchor="w", padx=6)
+        columnas = ("hora", "duracion", "pid", "datos")
+        self.recientes = ttk.Treeview(self, columns=columnas, height=10)
+        self.recientes.heading("#0", text="Tramo")
+        self.recientes.column("#0", width=220)
+        for col, texto, ancho in zip(columnas, ("Hora", "Duración (s)", "PID", "Datos"),
+                                     (80, 90, 60, 330)):
+            self.recientes.heading(col, text=texto)
+            self.recientes.column(col, width=ancho, anchor="w" if col == "datos" else "e")
+        self.recientes.pack(fill="both", expand=True, padx=6, pady=(0, 6))
+
+        self._after_id = None
+        self._refrescar()
+
+    def destroy(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        super().destroy()
+
+    def _refrescar(self):
+        self.tabla.delete(*self.tabla.get_children())
+        for nombre, a in perfilado.resumen().items():
+            memoria = "" if a["pico_memoria"] is None else f"{a['pico_memoria'] / 1e6:.1f}"
+            self.tabla.insert("", "end", text=nombre, values=(
+                a["n"], f"{a['total']:.3f}", f"{a['media']:.4f}",
+                f"{a['maximo']:.4f}", f"{a['ultimo']:.4f}", memoria))
+
+        self.recientes.delete(*self.recientes.get_children())
+        for r in reversed(perfilado.registros()[-self.N_RECIENTES:]):
+            datos = ", ".join(f"{k}={v}" for k, v in r.get("datos", {}).items())
+            if "error" in r:
+                datos = f"[{r['error']}] {datos}"
+            self.recientes.insert("", "end", text=r["nombre"], values=(
+                time.strftime("%H:%M:%S", time.localtime(r["inicio"])),
+                f"{r['duracion']:.4f}", r["pid"], datos))
+
+        if perfilado.esta_activo():
+            self.estado_var.set("Instrumentación activa")
+        else:
+            self.estado_var.set("Instrumentación apagada (Rendimiento > Instrumentación activa)")
+
+        self._after_id = self.after(self.REFRESCO_MS, self._refrescar)
+
+    def limpiar(self):
+        perfilado.limpiar()
+
+    def abrir_log(self):
+        ruta = perfilado.ARCHIVO_LOG
+        if not os.path.exists(ruta):
+            messagebox.showinfo("Rendimiento", "Todavía no se escribió ningún tramo en el log.")
+            return
+        try:
+            if sys.platform.startswith("win"):
+                os.startfile(ruta)
+            elif sys.platform == "darwin":
+                subprocess.Popen(["open", ruta])
+            else:
+                subprocess.Popen(["xdg-open", ruta])
+        except Exception as e:
+            messagebox.showerror("Rendimiento", f"No se pudo abrir el log:\n{ruta}\n\n{e}")
@@ -0,0 +1,125 @@
+"""
+Pirámide de resoluciones para mapas de calor con muchas ventanas.
+
+Un resultado (filas, ventanas) -o un cubo (canal, filas, ventanas)- puede
+tener cientos de miles de columnas; mandarlo entero a imshow obliga a
+matplotlib a remuestrearlo completo en cada redibujado. La pirámide guarda el
+mismo resultado reducido a la mitad de columnas en cada nivel (por máximo o
+por media, sin contar NaN) y entrega solo el tramo visible del nivel más
+grueso que todavía tiene al menos una columna por píxel.
+
+    pir = Piramide(matriz, "max")
+    bloque, x_ini, x_fin = pir.ventana(0, pir.n_columnas, 800)
+
+Las filas (tau, canales) no se reducen: son pocas. Los niveles se calculan la
+primera vez que se piden y quedan guardados; el nivel 0 son los datos tal
+cual (sin copiar ni cambiar el dtype) y los reducidos conservan su dtype de
+punto flotante. Cada pirámide es un almacén del gestor de memoria: si hace
+falta lugar se descartan sus niveles reducidos y se recalculan al pedirlos.
+"""
+import numpy as np
+
+from core.memoria import gestor_memoria, tic
+
+AGREGACIONES = ("max", "media")
+
+# no se reduce por debajo de esta cantidad de columnas
+MIN_COLUMNAS = 256
+
+
+def _reducir_max(a):
+    if a.shape[-1] % 2:
+        a = np.concatenate([a, a[..., -1:]], axis=-1)
+    # fmax ignora el NaN si el otro valor no lo es
+    return np.fmax(a[..., 0::2], a[..., 1::2])
+
+
+def _reducir_media(medias, conteos):
+    if medias.shape[-1] % 2:
+        relleno = np.zeros(medias.shape[:-1] + (1,), dtype=medias.dtype)
+        medias = np.concatenate([medias, relleno], axis=-1)
+        conteos = np.concatenate([conteos, relleno.astype(conteos.dtype)], axis=-1)
+    # las sumas en float64; el nivel se guarda en el dtype de los datos
+    sumas = np.nan_to_num(medias).astype(float) * conteos
+    conteos = conteos[..., 0::2] + conteos[..., 1::2]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = ((sumas[..., 0::2] + sumas[..., 1::2]) / conteos).astype(medias.dtype)
+    return medias, conteos
+
+
+class Piramide:
+
+    def __init__(self, datos, agregacion="max"):
+        if agregacion not in AGREGACIONES:
+            raise ValueError(f"Agregación desconocida: {agregacion}")
+        self.datos = datos
+        self.agregacion = agregacion
+        self.n_columnas = datos.shape[-1]
+        datos = np.asarray(datos)
+        if datos.dtype.kind != "f":
+            datos = datos.astype(float)
+        self._base = datos
+        self._niveles = []
+        self._uso = tic()
+        gestor_memoria.registrar(self)
+
+    def _nivel(self, k):
+        if not self._niveles:
+            if self.agregacion == "max":
+                self._niveles = [self._base]
+            else:
+                self._niveles = [(self._base, (~np.isnan(self._base)).astype(np.float32))]
+        while len(self._niveles) <= k:
+            anterior = self._niveles[-1]
+            if self.agregacion == "max":
+                self._niveles.append(_reducir_max(anterior))
+            else:
+                self._niveles.append(_reducir_media(*anterior))
+        nivel = self._niveles[k]
+        return nivel if self.agregacion == "max" else nivel[0]
+
+    def nivel_para(self, n_visibles, max_columnas):
+        """Nivel más grueso con al menos max_columnas columnas en el tramo visible."""
+        k = 0
+        while (n_visibles >> (k + 1)) >= max(max_columnas, 1) and \
+                (self.n_columnas >> (k + 1)) >= MIN_COLUMNAS:
+            k += 1
+        return k
+
+    def ventana(self, inicio, fin, max_columnas, indice=None):
+        """
+        Tramo [inicio, fin) de columnas (en ventanas originales) al nivel
+        adecuado. Devuelve (bloque, x_ini, x_fin): el bloque cubre las ventanas
+        [x_ini, x_fin) con columnas de igual ancho.
+        """
+        inicio = int(np.clip(inicio, 0, self.n_columnas))
+        fin = int(np.clip(fin, inicio + 1, self.n_columnas))
+        k = self.nivel_para(fin - inicio, max_columnas)
+        paso = 1 << k
+        self._uso = tic()
+        nivel = self._nivel(k)
+        if k:
+            gestor_memoria.equilibrar(proteger=(self, "niveles"))
+        if indice is not None:
+            nivel = nivel[indice]
+        j0, j1 = inicio // paso, -(-fin // paso)
+        return nivel[..., j0:j1], j0 * paso, j1 * paso
+
+    # --- almacén del gestor de memoria: los niveles reducidos (y los conteos) ---
+    def bytes_usados(self):
+        total = 0
+        for k, nivel in enumerate(self._niveles):
+            for a in (nivel if isinstance(nivel, tuple) else (nivel,)):
+                # el nivel 0 son los datos de quien armó la pirámide
+                if k > 0 or a is not self._base:
+                    total += a.nbytes
+        return total
+
+    def desalojables(self):
+        n = self.bytes_usados()
+        return [(self._uso, "niveles", n)] if n else []
+
+    def desalojar(self, clave):
+        liberados = self.bytes_usados()
+        self._niveles = []
+        return liberados
@@ -0,0 +1,356 @@
+"""
+Capa de dibujo con artistas persistentes.
+
+En vez de ax.clear() y reconstruir todo en cada cálculo, cada eje tiene un
+Lienzo que guarda sus artistas (líneas, imagen, colorbar) y los actualiza con
+set_data / set_array. Los redibujados se piden con draw_idle, así varios
+cambios seguidos se pintan una sola vez cuando Tk queda libre.
+
+    lienzo = lienzo_de(tab)           # tab con atributos .ax y .canvas
+    lienzo.linea("H", x, y, linewidth=1)
+    lienzo.textos("Título", "Ventana", "H_norm")
+    lienzo.redibujar()
+
+Si el tipo de contenido cambia (p.ej. de una curva a un mapa de calor) el
+lienzo limpia el eje una única vez y vuelve a crear los artistas.
+
+matplotlib se importa dentro de los métodos: este módulo lo carga el menú de
+estadísticas al arrancar la ventana.
+"""
+import numpy as np
+
+
+class Lienzo:
+    # distribución apilada: con más bandas que esto se dibuja como imagen
+    MAX_POLIGONOS = 64
+    # ventanas consecutivas que se promedian para no dibujar más columnas que píxeles
+    MAX_COLUMNAS = 2000
+    FILAS_IMAGEN = 400
+
+    def __init__(self, ax, canvas):
+        self.ax = ax
+        self.canvas = canvas
+        self.tipo = None
+        self.colorbar = None
+        self._artistas = {}   # nombre -> artista
+        self._hover = None    # (cum, etiquetas) de la distribución apilada
+        self._cid_hover = None
+        self._piramide = None  # mapa de calor grande: pirámide, rebanada y callback de zoom
+        self._indice = None
+        self._cid_zoom = None
+        self._remuestreando = False
+
+    # ------------------------------------------------------------------
+    def usar(self, tipo):
+        """Prepara el eje para un tipo de contenido; limpia solo si cambió."""
+        if tipo != self.tipo:
+            self.limpiar()
+            self.tipo = tipo
+
+    def limpiar(self):
+        if self.colorbar is not None:
+            try:
+                self.colorbar.remove()
+            except (AttributeError, ValueError, KeyError):
+                pass
+            self.colorbar = None
+        if self._cid_hover is not None:
+            self.canvas.mpl_disconnect(self._cid_hover)
+            self._cid_hover = None
+        self._hover = None
+        if self._cid_zoom is not None:
+            self.ax.callbacks.disconnect(self._cid_zoom)
+            self._cid_zoom = None
+        self._piramide = None
+        self.ax.clear()
+        self._artistas = {}
+        self.tipo = None
+
+    def _vigente(self, nombre):
+        """El artista guardado, o None si ya no está en el eje (alguien hizo ax.clear())."""
+        artista = self._artistas.get(nombre)
+        if artista is not None and artista.axes is not self.ax:
+            self._artistas.pop(nombre)
+            return None
+        return artista
+
+    # ------------------------------------------------------------------
+    def linea(self, nombre, x, y, **estilo):
+        """Crea o actualiza la curva `nombre`."""
+        linea = self._vigente(nombre)
+        if linea is None:
+            linea, = self.ax.plot(x, y, **estilo)
+            self._artistas[nombre] = linea
+        else:
+            linea.set_data(x, y)
+            if "label" in estilo:
+                linea.set_label(estilo["label"])
+        return linea
+
+    def banda(self, nombre, x, y_inf, y_sup, **estilo):
+        """Crea o actualiza la franja `nombre` entre y_inf e y_sup (fill_between)."""
+        banda = self._vigente(nombre)
+        if banda is not None and hasattr(banda, "set_data"):
+            banda.set_data(x, y_inf, y_sup)
+            return banda
+        # matplotlib < 3.10: la franja no se puede actualizar, se reemplaza
+        if banda is not None:
+            banda.remove()
+        banda = self.ax.fill_between(x, y_inf, y_sup, **estilo)
+        self._artistas[nombre] = banda
+        return banda
+
+    def quitar(self, *nombres):
+        """Saca del eje los artistas `nombres` (los que no existen se ignoran)."""
+        for nombre in nombres:
+            artista = self._vigente(nombre)
+            if artista is not None:
+                artista.remove()
+                self._artistas.pop(nombre)
+
+    def puntos(self, nombre, x, y, valores=None, etiqueta=None, **estilo):
+        """
+        Crea o actualiza la nube de puntos `nombre`. Con `valores` los puntos
+        se colorean por ese valor y se agrega un colorbar con `etiqueta`.
+        """
+        offsets = np.column_stack([x, y])
+        nube = self._vigente(nombre)
+        if nube is None:
+            estilo.setdefault("rasterized", True)
+            nube = self.ax.scatter(x, y, c=valores, **estilo)
+            self._artistas[nombre] = nube
+            if valores is not None:
+                if self.colorbar is not None:
+                    self.colorbar.remove()
+                self.colorbar = self.ax.figure.colorbar(nube, ax=self.ax, label=etiqueta)
+        else:
+            nube.set_offsets(offsets)
+            if valores is not None:
+                nube.set_array(np.asarray(valores))
+                nube.set_clim(np.min(valores), np.max(valores))
+        return nube
+
+    def imagen(self, datos, etiqueta=None, vmin=None, vmax=None, extent=None, **estilo):
+        """
+        Crea o actualiza el mapa de calor con su colorbar. Sin vmin/vmax la
+        escala sigue el rango (sin NaN) de los datos.
+        """
+        datos = np.asarray(datos)
+        if vmin is None:
+            vmin = np.nanmin(datos) if datos.size else 0.0
+        if vmax is None:
+            vmax = np.nanmax(datos) if datos.size else 1.0
+        filas, columnas = datos.shape[:2]
+        if extent is None:
+            extent = (-0.5, columnas - 0.5, -0.5, filas - 0.5)
+
+        im = self._vigente("imagen")
+        if im is None:
+            estilo.setdefault("aspect", "auto")
+            estilo.setdefault("origin", "lower")
+            im = self.ax.imshow(datos, vmin=vmin, vmax=vmax, extent=extent, **estilo)
+            self._artistas["imagen"] = im
+            if self.colorbar is not None:
+                self.colorbar.remove()
+            self.colorbar = self.ax.figure.colorbar(im, ax=self.ax, label=etiqueta)
+        else:
+            im.set_data(datos)
+            im.set_extent(extent)
+            im.set_clim(vmin, vmax)   # el colorbar escucha al mappable y se actualiza solo
+            if etiqueta is not None:
+                self.colorbar.set_label(etiqueta)
+            self.ax.set_xlim(extent[0], extent[1])
+            self.ax.set_ylim(extent[2], extent[3])
+        return im
+
+    def imagen_piramide(self, datos, agregacion="max", indice=None, etiqueta=None,
+                        vmin=None, vmax=None, **estilo):
+        """
+        Mapa de calor (filas, ventanas), o la rebanada `indice` de un cubo
+        (..., filas, ventanas), dibujado desde una pirámide de resoluciones:
+        imshow recibe solo el tramo visible, con a lo sumo una columna por
+        píxel del eje. Al hacer zoom o desplazarse se vuelve a muestrear solo
+        lo visible. La pirámide se reutiliza mientras no cambien los datos ni
+        la agregación ("max" o "media").
+        """
+        from utils.piramide import Piramide
+
+        pir = self._piramide
+        if pir is None or pir.datos is not datos or pir.agregacion != agregacion:
+            pir = Piramide(datos, agregacion)
+        self._indice = indice
+
+        # la escala de color sale de los datos completos, no del nivel mostrado
+        rebanada = datos if indice is None else datos[indice]
+        if vmin is None:
+            vmin = np.nanmin(rebanada) if rebanada.size else 0.0
+        if vmax is None:
+            vmax = np.nanmax(rebanada) if rebanada.size else 1.0
+
+        self._remuestreando = True
+        try:
+            bloque, x_ini, x_fin = pir.ventana(0, pir.n_columnas, self._columnas_eje(), indice)
+            filas = bloque.shape[0]
+            self.imagen(bloque, etiqueta=etiqueta, vmin=vmin, vmax=vmax,
+                        extent=(x_ini - 0.5, x_fin - 0.5, -0.5, filas - 0.5), **estilo)
+            self.ax.set_xlim(-0.5, pir.n_columnas - 0.5)
+            self.ax.set_ylim(-0.5, filas - 0.5)
+        finally:
+            self._remuestreando = False
+
+        self._piramide = pir
+        if self._cid_zoom is None:
+            self._cid_zoom = self.ax.callbacks.connect("xlim_changed", self._al_cambiar_vista)
+
+    def bytes_usados(self):
+        """Bytes de los niveles reducidos de la pirámide del mapa de calor actual."""
+        return self._piramide.bytes_usados() if self._piramide is not None else 0
+
+    def _columnas_eje(self):
+        return max(int(self.ax.bbox.width), 100)
+
+    def _al_cambiar_vista(self, ax):
+        im = self._vigente("imagen")
+        if self._piramide is None or self._remuestreando or im is None:
+            return
+        x0, x1 = sorted(ax.get_xlim())
+        bloque, x_ini, x_fin = self._piramide.ventana(
+            np.floor(x0 + 0.5), np.ceil(x1 + 0.5), self._columnas_eje(), self._indice)
+
+        self._remuestreando = True
+        try:
+            limites = ax.get_xlim(), ax.get_ylim()
+            im.set_data(bloque)
+            im.set_extent((x_ini - 0.5, x_fin - 0.5, -0.5, bloque.shape[0] - 0.5))
+            # set_extent reajusta los límites si el autoescalado está activo
+            ax.set_xlim(limites[0], auto=None)
+            ax.set_ylim(limites[1], auto=None)
+        finally:
+            self._remuestreando = False
+        self.canvas.draw_idle()
+
+    def apilado(self, cum, etiquetas, colores):
+        """
+        Distribución apilada: la banda b ocupa [cum[:, b+1], cum[:, b]] en cada
+        ventana. Con pocas bandas se dibuja un único PolyCollection; con muchas,
+        una imagen rasterizada de las bandas. Las etiquetas se muestran al pasar
+        el mouse, no como textos fijos.
+        """
+        from matplotlib.collections import PolyCollection
+
+        self.limpiar()
+        self.tipo = "apilado"
+        n_ventanas, n_bandas = cum.shape[0], cum.shape[1] - 1
+        x, vista = _agrupar_ventanas(cum, self.MAX_COLUMNAS)
+        colores = np.asarray(colores, dtype=float)
+
+        if n_bandas <= self.MAX_POLIGONOS:
+            # contorno de cada banda: borde superior de ida, inferior de vuelta
+            X = np.concatenate([x, x[::-1]])
+            Y = np.concatenate([vista[:, :-1].T, vista[:, 1:].T[:, ::-1]], axis=1)
+            vertices = np.stack([np.broadcast_to(X, Y.shape), Y], axis=-1)
+            bandas = PolyCollection(vertices, facecolors=colores, edgecolors="none", alpha=0.85)
+            self.ax.add_collection(bandas)
+            self._artistas["bandas"] = bandas
+        else:
+            indices = _imagen_bandas(vista, self.FILAS_IMAGEN)
+            # índice n_bandas = por encima de la última banda (ventanas sin patrones)
+            paleta = np.vstack([colores, [0.0, 0.0, 0.0, 0.0]])
+            rgba = (paleta[indices] * 255).astype(np.uint8)
+            self._artistas["bandas"] = self.ax.imshow(
+                rgba, origin="lower", aspect="auto", interpolation="nearest",
+                extent=(-0.5, n_ventanas - 0.5, 0.0, 1.0))
+
+        self.ax.set_xlim(0, max(n_ventanas - 1, 1))
+        self.ax.set_ylim(0, 1)
+        self._activar_hover(cum, etiquetas)
+
+    def _activar_hover(self, cum, etiquetas):
+        self._hover = (cum, etiquetas)
+        nota = self.ax.annotate("", xy=(0, 0), xytext=(12, 12), textcoords="offset points",
+                                fontsize=8, bbox=dict(boxstyle="round", fc="white", alpha=0.9))
+        nota.set_visible(False)
+        self._artistas["nota"] = nota
+        self._cid_hover = self.canvas.mpl_connect("motion_notify_event", self._en_hover)
+
+    def _en_hover(self, event):
+        if self._hover is None:
+            return
+        cum, etiquetas = self._hover
+        nota = self._artistas["nota"]
+        visible = False
+        if event.inaxes is self.ax and event.xdata is not None:
+            w = int(np.clip(round(event.xdata), 0, cum.shape[0] - 1))
+            b = int(np.count_nonzero(cum[w, 1:] > event.ydata))
+            if b < len(etiquetas) and event.ydata <= cum[w, 0]:
+                p = cum[w, b] - cum[w, b + 1]
+                nota.xy = (event.xdata, event.ydata)
+                nota.set_text(f"{etiquetas[b]}\nventana {w}: p = {p:.3f}")
+                visible = True
+        if visible or nota.get_visible():
+            nota.set_visible(visible)
+            self.canvas.draw_idle()
+
+    def textos(self, titulo=None, xlabel=None, ylabel=None):
+        if titulo is not None and self.ax.get_title() != titulo:
+            self.ax.set_title(titulo)
+        if xlabel is not None and self.ax.get_xlabel() != xlabel:
+            self.ax.set_xlabel(xlabel)
+        if ylabel is not None and self.ax.get_ylabel() != ylabel:
+            self.ax.set_ylabel(ylabel)
+
+    def redibujar(self, reescalar=True):
+        """Reajusta los límites a las curvas (si se pide) y agenda un único redibujado."""
+        if reescalar and self.tipo != "imagen":
+            self.ax.relim()
+            self.ax.autoscale_view()
+        self.canvas.draw_idle()
+
+
+def colores_patrones(patrones, n_patrones, cmap="inferno"):
+    """Color RGBA de cada banda según su índice de patrón; gris para "otros" (-1)."""
+    from matplotlib import colormaps
+    patrones = np.asarray(patrones)
+    colores = colormaps[cmap](patrones / max(n_patrones - 1, 1))
+    colores[patrones < 0] = (0.6, 0.6, 0.6, 1.0)
+    return colores
+
+
+def _agrupar_ventanas(cum, max_columnas):
+    """Promedia ventanas consecutivas para quedarse con a lo sumo max_columnas columnas."""
+    n = cum.shape[0]
+    if n <= max_columnas:
+        return np.arange(n, dtype=float), cum
+    bordes = np.linspace(0, n, max_columnas + 1).astype(int)
+    sumas = np.add.reduceat(cum, bordes[:-1], axis=0)
+    vista = sumas / np.diff(bordes)[:, None]
+    x = (bordes[:-1] + bordes[1:] - 1) / 2.0
+    return x, vista
+
+
+def _imagen_bandas(cum, filas):
+    """
+    Índice de banda de cada píxel (filas, columnas) de la distribución apilada.
+    En cada columna la banda en la altura y es la cantidad de bordes cum[:, 1:]
+    mayores que y; se resuelve con un solo searchsorted desplazando cada
+    columna a su propio intervalo [2c-1, 2c].
+    """
+    n_col, n_bandas = cum.shape[0], cum.shape[1] - 1
+    y = (np.arange(filas) + 0.5) / filas
+    desplazamiento = 2.0 * np.arange(n_col)
+    bordes = (-cum[:, 1:] + desplazamiento[:, None]).ravel()
+    consultas = -y[:, None] + desplazamiento[None, :]
+    indices = np.searchsorted(bordes, consultas.ravel()).reshape(filas, n_col)
+    return indices - n_bandas * np.arange(n_col)[None, :]
+
+
+def lienzo_de(contenedor):
+    """
+    Lienzo asociado a un objeto con atributos .ax y .canvas (sub-pestaña o
+    visor). Se crea la primera vez y se reutiliza en los siguientes dibujos.
+    """
+    lienzo = getattr(contenedor, "_lienzo", None)
+    if lienzo is None or lienzo.ax is not contenedor.ax:
+        lienzo = Lienzo(contenedor.ax, contenedor.canvas)
+        contenedor._lienzo = lienzo
+    return lienzo